@@ -0,0 +1,60 @@
+"""listing indexes
+
+Revision ID: a4d82f1c6e97
+Revises: f2c94e7a1b63
+Create Date: 2025-06-18 11:36:54.207113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d82f1c6e97'
+down_revision: Union[str, None] = 'f2c94e7a1b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Індекси під комбінації фільтрів і сортувань списків поточних товарів
+# (назва, таблиця, колонки, умова часткового індексу)
+INDEXES = [
+    ('ix_current_batteries_price', 'current_batteries', ['price'], None),
+    ('ix_current_batteries_brand_id_price', 'current_batteries', ['brand_id', 'price'], None),
+    ('ix_current_batteries_supplier_id_price', 'current_batteries', ['supplier_id', 'price'], None),
+    ('ix_current_batteries_volume_price', 'current_batteries', ['volume', 'price'], None),
+    ('ix_current_batteries_c_amps', 'current_batteries', ['c_amps'], None),
+    ('ix_current_batteries_comparison', 'current_batteries', ['supplier_id', 'brand_id'],
+     'price > 0 AND c_amps > 0 AND volume > 0'),
+    ('ix_sollar_panels_current_price', 'sollar_panels_current', ['price'], None),
+    ('ix_sollar_panels_current_types_price', 'sollar_panels_current', ['panel_type', 'cell_type', 'price'], None),
+    ('ix_sollar_panels_current_brand_id_price', 'sollar_panels_current', ['brand_id', 'price'], None),
+    ('ix_sollar_panels_current_supplier_id_price', 'sollar_panels_current', ['supplier_id', 'price'], None),
+    ('ix_sollar_panels_current_power_price', 'sollar_panels_current', ['power', 'price'], None),
+    ('ix_sollar_panels_current_comparison', 'sollar_panels_current', ['supplier_id', 'brand_id'],
+     'price > 0 AND power > 0'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокує імпорт цін під час побудови, але не працює в транзакції
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+    for table in ('current_batteries', 'sollar_panels_current'):
+        op.execute(f'ANALYZE {table}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
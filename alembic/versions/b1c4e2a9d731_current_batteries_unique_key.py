@@ -0,0 +1,41 @@
+"""current batteries unique key
+
+Revision ID: b1c4e2a9d731
+Revises: 7929f2f89d2b
+Create Date: 2025-06-10 11:20:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1c4e2a9d731'
+down_revision: Union[str, None] = '7929f2f89d2b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Прибираємо дублікати (залишаємо найновіший рядок), інакше унікальний індекс не створиться
+    op.execute("""
+        DELETE FROM current_batteries a
+        USING current_batteries b
+        WHERE a.full_name = b.full_name
+          AND a.supplier_id = b.supplier_id
+          AND a.id < b.id
+    """)
+    op.create_index(
+        'uq_current_batteries_full_name_supplier_id',
+        'current_batteries',
+        ['full_name', 'supplier_id'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_current_batteries_full_name_supplier_id', table_name='current_batteries')
@@ -0,0 +1,71 @@
+"""canonical products
+
+Revision ID: b8e3f1d47c20
+Revises: a4d82f1c6e97
+Create Date: 2025-06-20 09:48:31.502716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e3f1d47c20'
+down_revision: Union[str, None] = 'a4d82f1c6e97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Таблиці історії та поточних цін, що отримують product_id
+PRODUCT_TABLES = [
+    'batteries',
+    'current_batteries',
+    'sollar_panels',
+    'sollar_panels_current',
+    'inverters',
+    'current_inverters',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('canonical_products',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product', sa.String(), nullable=False),
+    sa.Column('brand_id', sa.Integer(), nullable=True),
+    sa.Column('spec_key', sa.String(), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('tokens', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_canonical_products_id'), 'canonical_products', ['id'], unique=False)
+    op.create_index('ix_canonical_products_block', 'canonical_products', ['product', 'brand_id', 'spec_key'], unique=False)
+
+    # Колонка без значення за замовчуванням - без перезапису таблиць; заповнює задача match_products
+    for table in PRODUCT_TABLES:
+        op.add_column(table, sa.Column('product_id', sa.Integer(), nullable=True))
+        op.create_foreign_key(f'fk_{table}_product_id', table, 'canonical_products', ['product_id'], ['id'])
+
+    # Індекси на великих таблицях історії - без блокування імпорту
+    with op.get_context().autocommit_block():
+        for table in PRODUCT_TABLES:
+            op.create_index(
+                f'ix_{table}_product_id', table, ['product_id'], unique=False,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for table in reversed(PRODUCT_TABLES):
+            op.drop_index(f'ix_{table}_product_id', table_name=table, postgresql_concurrently=True, if_exists=True)
+    for table in reversed(PRODUCT_TABLES):
+        op.drop_constraint(f'fk_{table}_product_id', table, type_='foreignkey')
+        op.drop_column(table, 'product_id')
+    op.drop_index('ix_canonical_products_block', table_name='canonical_products')
+    op.drop_index(op.f('ix_canonical_products_id'), table_name='canonical_products')
+    op.drop_table('canonical_products')
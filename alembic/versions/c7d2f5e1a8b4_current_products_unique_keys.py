@@ -0,0 +1,46 @@
+"""current products unique keys
+
+Revision ID: c7d2f5e1a8b4
+Revises: b1c4e2a9d731
+Create Date: 2025-06-12 09:47:15.902731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2f5e1a8b4'
+down_revision: Union[str, None] = 'b1c4e2a9d731'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ['sollar_panels_current', 'current_inverters']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        # Прибираємо дублікати (залишаємо найновіший рядок), інакше унікальний індекс не створиться
+        op.execute(f"""
+            DELETE FROM {table} a
+            USING {table} b
+            WHERE a.full_name = b.full_name
+              AND a.supplier_id = b.supplier_id
+              AND a.id < b.id
+        """)
+        op.create_index(
+            f'uq_{table}_full_name_supplier_id',
+            table,
+            ['full_name', 'supplier_id'],
+            unique=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_index(f'uq_{table}_full_name_supplier_id', table_name=table)
@@ -0,0 +1,62 @@
+"""price series indexes
+
+Revision ID: c9a4e2b7d815
+Revises: b8e3f1d47c20
+Create Date: 2025-06-21 10:12:47.630184
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9a4e2b7d815'
+down_revision: Union[str, None] = 'b8e3f1d47c20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Індекси рядів цін (helpers/price_series.py): умови товару + created_at
+INDEXES = [
+    ('ix_batteries_product_id_created_at', 'batteries', ['product_id', 'created_at']),
+    ('ix_batteries_spec_created_at', 'batteries',
+     ['brand_id', 'volume', 'c_amps', 'polarity', 'region', 'created_at']),
+    ('ix_sollar_panels_product_id_created_at', 'sollar_panels', ['product_id', 'created_at']),
+    ('ix_sollar_panels_spec_created_at', 'sollar_panels',
+     ['brand_id', 'power', 'panel_type', 'cell_type', 'thickness', 'created_at']),
+    ('ix_inverters_product_id_created_at', 'inverters', ['product_id', 'created_at']),
+]
+# Одноколонкові індекси product_id історії покриває (product_id, created_at)
+REPLACED_INDEXES = [
+    ('ix_batteries_product_id', 'batteries'),
+    ('ix_sollar_panels_product_id', 'sollar_panels'),
+    ('ix_inverters_product_id', 'inverters'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+        for name, table in REPLACED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    for table in ('batteries', 'sollar_panels', 'inverters'):
+        op.execute(f'ANALYZE {table}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table in REPLACED_INDEXES:
+            op.create_index(
+                name, table, ['product_id'], unique=False,
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
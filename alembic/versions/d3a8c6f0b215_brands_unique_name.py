@@ -0,0 +1,55 @@
+"""brands unique name
+
+Revision ID: d3a8c6f0b215
+Revises: c7d2f5e1a8b4
+Create Date: 2025-06-13 15:02:33.481920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a8c6f0b215'
+down_revision: Union[str, None] = 'c7d2f5e1a8b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# таблиця брендів -> таблиці, що посилаються на неї через brand_id
+BRAND_TABLES = {
+    'batteries_brands': ['batteries', 'current_batteries'],
+    'sollar_panels_brands': ['sollar_panels', 'sollar_panels_current'],
+    'inverters_brands': ['inverters', 'current_inverters'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for brand_table, product_tables in BRAND_TABLES.items():
+        # Переводимо посилання з дублікатів на бренд з найменшим id
+        for product_table in product_tables:
+            op.execute(f"""
+                UPDATE {product_table} p
+                SET brand_id = keep.id
+                FROM {brand_table} dup
+                JOIN (SELECT name, MIN(id) AS id FROM {brand_table} GROUP BY name) keep
+                  ON keep.name = dup.name
+                WHERE p.brand_id = dup.id
+                  AND dup.id <> keep.id
+            """)
+        op.execute(f"""
+            DELETE FROM {brand_table} a
+            USING {brand_table} b
+            WHERE a.name = b.name
+              AND a.id > b.id
+        """)
+        op.create_index(f'uq_{brand_table}_name', brand_table, ['name'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for brand_table in BRAND_TABLES:
+        op.drop_index(f'uq_{brand_table}_name', table_name=brand_table)
@@ -0,0 +1,176 @@
+"""market aggregates
+
+Revision ID: d6f3b8a2c419
+Revises: c9a4e2b7d815
+Create Date: 2025-06-22 14:05:12.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6f3b8a2c419'
+down_revision: Union[str, None] = 'c9a4e2b7d815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Поточні таблиці продуктів і характеристики, за якими товари однакові (без бренду - його додають окремо).
+# NULL у кожній характеристиці замінено значеннями (0 або ''), щоб ключі агрегатів були унікальні
+# (REFRESH ... CONCURRENTLY), а JOIN ... USING у цінових індексах брендів не губив пропозиції
+PRODUCTS = {
+    'batteries': {
+        'current': 'current_batteries',
+        'suppliers': 'batteries_suppliers',
+        'brands': 'batteries_brands',
+        'spec': [
+            ('volume', 'coalesce(c.volume, 0)'),
+            ('c_amps', 'coalesce(c.c_amps, 0)'),
+            ('polarity', "coalesce(c.polarity, '')"),
+            ('region', "coalesce(c.region, '')"),
+            ('electrolyte', "coalesce(c.electrolyte, '')"),
+        ],
+        'extra': [],
+    },
+    'sollar_panels': {
+        'current': 'sollar_panels_current',
+        'suppliers': 'sollar_panels_suppliers',
+        'brands': 'sollar_panels_brands',
+        'spec': [
+            ('power', 'coalesce(c.power, 0)'),
+            ('panel_type', "coalesce(c.panel_type, '')"),
+            ('cell_type', "coalesce(c.cell_type, '')"),
+            ('thickness', 'coalesce(c.thickness, 0)'),
+        ],
+        'extra': [('price_per_w', 'c.price_per_w')],
+    },
+}
+
+
+def _median(expression: str, where: str = '') -> str:
+    condition = f' FILTER (WHERE {where})' if where else ''
+    return f'round((percentile_cont(0.5) WITHIN GROUP (ORDER BY {expression}){condition})::numeric, 2)'
+
+
+def _offers(config: dict, with_our_price: bool = False) -> str:
+    """Валідні пропозиції поточної таблиці з брендом, постачальником і ключем характеристик."""
+    spec = ', '.join(f'{expression} AS {name}' for name, expression in config['spec'])
+    extra = ''.join(f', {expression} AS {name}' for name, expression in config['extra'])
+    our_price = ''
+    if with_our_price:
+        partition = ', '.join(['coalesce(c.brand_id, 0)'] + [expression for _, expression in config['spec']])
+        our_price = (
+            f',\n            min(c.price) FILTER (WHERE coalesce(s.is_me, false)) '
+            f'OVER (PARTITION BY {partition}) AS our_price'
+        )
+    return f"""
+        SELECT
+            coalesce(c.brand_id, 0) AS brand_id, coalesce(b.name, '') AS brand,
+            c.supplier_id, s.name AS supplier,
+            coalesce(s.is_me, false) AS is_me, coalesce(s.is_competitor, false) AS is_competitor,
+            {spec}, c.price{extra}, c.updated_at{our_price}
+        FROM {config['current']} c
+        JOIN {config['suppliers']} s ON s.id = c.supplier_id
+        LEFT JOIN {config['brands']} b ON b.id = c.brand_id
+        WHERE c.price > 0"""
+
+
+def _spec_stats(config: dict) -> str:
+    """Ринок по кожному набору бренд + характеристики: ціни конкурентів, наша ціна і місце серед них."""
+    spec = ', '.join(name for name, _ in config['spec'])
+    extra = ''.join(
+        f',\n        min({name}) FILTER (WHERE NOT is_me) AS market_min_{name},'
+        f'\n        {_median(name, "NOT is_me")} AS market_median_{name},'
+        f'\n        max({name}) FILTER (WHERE NOT is_me) AS market_max_{name}'
+        for name, _ in config['extra']
+    )
+    return f"""
+    WITH offers AS ({_offers(config, with_our_price=True)}
+    )
+    SELECT
+        brand_id, min(brand) AS brand, {spec},
+        count(*) FILTER (WHERE NOT is_me) AS offers,
+        count(DISTINCT supplier_id) FILTER (WHERE NOT is_me) AS suppliers,
+        min(price) FILTER (WHERE NOT is_me) AS market_min,
+        {_median('price', 'NOT is_me')} AS market_median,
+        max(price) FILTER (WHERE NOT is_me) AS market_max{extra},
+        min(our_price) AS our_price,
+        CASE WHEN min(our_price) IS NOT NULL
+            THEN 1 + count(*) FILTER (WHERE NOT is_me AND price < our_price) END AS our_rank,
+        max(updated_at) AS updated_at
+    FROM offers
+    GROUP BY brand_id, {spec}"""
+
+
+def _supplier_coverage(config: dict) -> str:
+    """Покриття ринку кожним постачальником: скільки брендів і наборів характеристик він пропонує."""
+    spec = ', '.join(['brand_id'] + [name for name, _ in config['spec']])
+    return f"""
+    WITH offers AS ({_offers(config)}
+    ),
+    keyed AS (SELECT *, concat_ws('|', {spec}) AS spec_key FROM offers),
+    totals AS (SELECT count(DISTINCT spec_key) AS specs, count(DISTINCT brand_id) AS brands FROM keyed)
+    SELECT
+        k.supplier_id, min(k.supplier) AS supplier, bool_or(k.is_me) AS is_me, bool_or(k.is_competitor) AS is_competitor,
+        count(*) AS models,
+        count(DISTINCT k.brand_id) AS brands,
+        count(DISTINCT k.spec_key) AS specs,
+        round(count(DISTINCT k.spec_key) * 100.0 / nullif(min(t.specs), 0), 1) AS spec_coverage_pct,
+        round(count(DISTINCT k.brand_id) * 100.0 / nullif(min(t.brands), 0), 1) AS brand_coverage_pct,
+        {_median('k.price')} AS median_price,
+        max(k.updated_at) AS updated_at
+    FROM keyed k CROSS JOIN totals t
+    GROUP BY k.supplier_id"""
+
+
+def _brand_index(config: dict) -> str:
+    """
+    Ціновий індекс бренду: медіана відношення ціни до медіани ринку тих самих характеристик
+    (без бренду), x100. 100 - як ринок, 120 - бренд на 20% дорожчий за аналоги.
+    """
+    spec = ', '.join(name for name, _ in config['spec'])
+    return f"""
+    WITH offers AS ({_offers(config)}
+    ),
+    medians AS (
+        SELECT {spec}, percentile_cont(0.5) WITHIN GROUP (ORDER BY price) AS spec_median
+        FROM offers GROUP BY {spec}
+    )
+    SELECT
+        o.brand_id, min(o.brand) AS brand,
+        count(*) AS offers,
+        count(DISTINCT o.supplier_id) AS suppliers,
+        count(DISTINCT concat_ws('|', {', '.join(f'o.{name}' for name, _ in config['spec'])})) AS specs,
+        {_median('o.price')} AS median_price,
+        round((percentile_cont(0.5) WITHIN GROUP (ORDER BY o.price / m.spec_median) * 100)::numeric, 1) AS price_index,
+        round((percentile_cont(0.5) WITHIN GROUP (ORDER BY o.price / m.spec_median)
+            FILTER (WHERE o.is_me) * 100)::numeric, 1) AS our_price_index,
+        max(o.updated_at) AS updated_at
+    FROM offers o JOIN medians m USING ({spec})
+    GROUP BY o.brand_id"""
+
+
+def _views():
+    """(назва, SQL, колонки унікального індексу) для кожного продукту."""
+    for product, config in PRODUCTS.items():
+        spec = [name for name, _ in config['spec']]
+        yield f'market_spec_stats_{product}', _spec_stats(config), ['brand_id', *spec]
+        yield f'market_supplier_coverage_{product}', _supplier_coverage(config), ['supplier_id']
+        yield f'market_brand_index_{product}', _brand_index(config), ['brand_id']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, query, unique_columns in _views():
+        op.execute(f'CREATE MATERIALIZED VIEW {name} AS {query}\nWITH DATA')
+        # Унікальний індекс потрібен для REFRESH MATERIALIZED VIEW CONCURRENTLY
+        op.create_index(f'uq_{name}', name, unique_columns, unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _, _ in reversed(list(_views())):
+        op.execute(f'DROP MATERIALIZED VIEW IF EXISTS {name}')
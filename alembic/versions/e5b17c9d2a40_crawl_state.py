@@ -0,0 +1,61 @@
+"""crawl state
+
+Revision ID: e5b17c9d2a40
+Revises: d3a8c6f0b215
+Create Date: 2025-06-16 10:21:47.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b17c9d2a40'
+down_revision: Union[str, None] = 'd3a8c6f0b215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('crawl_pages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('host', sa.String(), nullable=False),
+    sa.Column('url', sa.String(), nullable=False),
+    sa.Column('content_hash', sa.String(), nullable=False),
+    sa.Column('etag', sa.String(), nullable=True),
+    sa.Column('last_modified', sa.String(), nullable=True),
+    sa.Column('last_seen', sa.DateTime(), nullable=True),
+    sa.Column('changed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_crawl_pages_id'), 'crawl_pages', ['id'], unique=False)
+    op.create_index('uq_crawl_pages_url', 'crawl_pages', ['url'], unique=True)
+    op.create_index('ix_crawl_pages_host', 'crawl_pages', ['host'], unique=False)
+
+    op.create_table('crawl_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product', sa.String(), nullable=False),
+    sa.Column('host', sa.String(), nullable=False),
+    sa.Column('content_hash', sa.String(), nullable=False),
+    sa.Column('last_seen', sa.DateTime(), nullable=True),
+    sa.Column('parsed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_crawl_items_id'), 'crawl_items', ['id'], unique=False)
+    op.create_index(
+        'uq_crawl_items_product_host_content_hash', 'crawl_items', ['product', 'host', 'content_hash'], unique=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_crawl_items_product_host_content_hash', table_name='crawl_items')
+    op.drop_index(op.f('ix_crawl_items_id'), table_name='crawl_items')
+    op.drop_table('crawl_items')
+    op.drop_index('ix_crawl_pages_host', table_name='crawl_pages')
+    op.drop_index('uq_crawl_pages_url', table_name='crawl_pages')
+    op.drop_index(op.f('ix_crawl_pages_id'), table_name='crawl_pages')
+    op.drop_table('crawl_pages')
@@ -0,0 +1,40 @@
+"""history stats
+
+Revision ID: f2c94e7a1b63
+Revises: e5b17c9d2a40
+Create Date: 2025-06-17 14:05:12.640218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c94e7a1b63'
+down_revision: Union[str, None] = 'e5b17c9d2a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('history_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product', sa.String(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('observed', sa.Integer(), nullable=False),
+    sa.Column('written', sa.Integer(), nullable=False),
+    sa.Column('compacted', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_history_stats_id'), 'history_stats', ['id'], unique=False)
+    op.create_index('uq_history_stats_product_day', 'history_stats', ['product', 'day'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_history_stats_product_day', table_name='history_stats')
+    op.drop_index(op.f('ix_history_stats_id'), table_name='history_stats')
+    op.drop_table('history_stats')
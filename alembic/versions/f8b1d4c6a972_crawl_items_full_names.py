@@ -0,0 +1,29 @@
+"""crawl items full names
+
+Revision ID: f8b1d4c6a972
+Revises: d6f3b8a2c419
+Create Date: 2025-06-23 11:42:05.318790
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8b1d4c6a972'
+down_revision: Union[str, None] = 'd6f3b8a2c419'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('crawl_items', sa.Column('full_names', postgresql.ARRAY(sa.String()), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('crawl_items', 'full_names')
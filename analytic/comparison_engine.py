@@ -0,0 +1,134 @@
+import time
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Характеристики, за якими товари різних постачальників вважаються однаковими
+BATTERY_SPEC = ("brand", "volume", "c_amps", "polarity", "region", "electrolyte")
+SOLAR_SPEC = ("brand", "power", "panel_type", "cell_type", "thickness")
+
+# Відхилення від медіани ринку (%), в межах якого ціна вважається ринковою
+ON_PAR_PCT = 1.0
+TOP_MODELS = 10
+
+
+def _normalize_spec(frame: pd.DataFrame, spec: Sequence[str]) -> pd.DataFrame:
+    """Приводить ключ порівняння до одного вигляду: текст - верхній регістр без пробілів по краях, числа - float."""
+    frame = frame.copy()
+    for column in spec:
+        if pd.api.types.is_numeric_dtype(frame[column]):
+            frame[column] = frame[column].astype(float).round(2)
+        else:
+            frame[column] = frame[column].fillna("").astype(str).str.strip().str.upper()
+    return frame
+
+
+def _records(frame: pd.DataFrame, columns: List[str]) -> List[Dict[str, Any]]:
+    frame = frame[columns].replace({np.nan: None})
+    return [
+        {key: round(value, 2) if isinstance(value, float) else value for key, value in row.items()}
+        for row in frame.to_dict("records")
+    ]
+
+
+def compare_prices(
+    my_rows: List[Dict[str, Any]],
+    competitor_rows: List[Dict[str, Any]],
+    spec: Sequence[str] = BATTERY_SPEC,
+    extra_columns: Sequence[str] = (),
+    top: int = TOP_MODELS,
+) -> Dict[str, Any]:
+    """
+    Порівнює наші ціни з конкурентами по однакових товарах (збіг усіх характеристик spec).
+
+    Args:
+        my_rows: Наші товари (full_name, price, supplier + колонки spec)
+        competitor_rows: Товари конкурентів у тому ж форматі
+        spec: Ключ збігу товарів
+        extra_columns: Додаткові колонки в топах (наприклад, price_per_w)
+        top: Скільки моделей у топах дорожчих/дешевших
+
+    Returns:
+        Зведення: покриття, медіанний розрив, розподіл дорожче/дешевше, підсумки по брендах і топи моделей
+    """
+    started = time.perf_counter()
+    spec = list(spec)
+    if not my_rows or not competitor_rows:
+        return {"summary": {"our_models": len(my_rows), "matched_models": 0}, "brands": [], "overpriced": [], "underpriced": []}
+
+    mine = _normalize_spec(pd.DataFrame(my_rows), spec)
+    mine["row"] = np.arange(len(mine))
+    competitors = _normalize_spec(pd.DataFrame(competitor_rows), spec)
+
+    # Ринок по кожному набору характеристик
+    market = competitors.groupby(spec, dropna=False).agg(
+        market_min=("price", "min"),
+        market_median=("price", "median"),
+        market_max=("price", "max"),
+        offers=("price", "size"),
+        competitors=("supplier", "nunique"),
+    ).reset_index()
+    cheapest = competitors.loc[competitors.groupby(spec, dropna=False)["price"].idxmin(), spec + ["supplier"]]
+    market = market.merge(cheapest.rename(columns={"supplier": "cheapest_competitor"}), on=spec, how="left")
+
+    matched = mine.merge(market, on=spec, how="inner")
+    if matched.empty:
+        return {
+            "summary": {"our_models": len(mine), "matched_models": 0, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)},
+            "brands": [], "overpriced": [], "underpriced": [],
+        }
+
+    # Перцентиль нашої ціни серед пропозицій конкурентів: частка дешевших за нас
+    pairs = matched[["row", "price"] + spec].merge(competitors[spec + ["price"]], on=spec, suffixes=("", "_competitor"))
+    pairs["cheaper"] = pairs["price_competitor"] < pairs["price"]
+    matched = matched.merge(
+        (pairs.groupby("row")["cheaper"].mean() * 100).rename("percentile").reset_index(), on="row", how="left"
+    )
+
+    matched["gap_min"] = matched["price"] - matched["market_min"]
+    matched["gap_min_pct"] = matched["gap_min"] / matched["market_min"] * 100
+    matched["gap_median_pct"] = (matched["price"] - matched["market_median"]) / matched["market_median"] * 100
+    matched["position"] = np.select(
+        [matched["gap_median_pct"] > ON_PAR_PCT, matched["gap_median_pct"] < -ON_PAR_PCT],
+        ["pricier", "cheaper"],
+        default="on_par",
+    )
+
+    positions = matched["position"].value_counts()
+    summary = {
+        "our_models": len(mine),
+        "matched_models": len(matched),
+        "coverage_pct": round(len(matched) / len(mine) * 100, 1),
+        "pricier": int(positions.get("pricier", 0)),
+        "cheaper": int(positions.get("cheaper", 0)),
+        "on_par": int(positions.get("on_par", 0)),
+        "cheapest_in_market": int((matched["price"] <= matched["market_min"]).sum()),
+        "median_gap_pct": round(float(matched["gap_median_pct"].median()), 2),
+        "median_percentile": round(float(matched["percentile"].median()), 1),
+    }
+    for column in extra_columns:
+        if column in matched and column in competitors:
+            summary[f"our_median_{column}"] = round(float(matched[column].median()), 2)
+            summary[f"market_median_{column}"] = round(float(competitors[column].median()), 2)
+
+    brands = matched.groupby("brand").agg(
+        models=("row", "size"),
+        median_gap_pct=("gap_median_pct", "median"),
+        pricier=("position", lambda values: int((values == "pricier").sum())),
+        cheaper=("position", lambda values: int((values == "cheaper").sum())),
+        median_percentile=("percentile", "median"),
+    ).reset_index().sort_values("median_gap_pct", ascending=False)
+
+    columns = ["full_name", *spec, "price", *[c for c in extra_columns if c in matched], "market_min",
+               "market_median", "cheapest_competitor", "competitors", "gap_min_pct", "gap_median_pct", "percentile"]
+    overpriced = matched[matched["position"] == "pricier"].nlargest(top, "gap_median_pct")
+    underpriced = matched[matched["position"] == "cheaper"].nsmallest(top, "gap_median_pct")
+
+    summary["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return {
+        "summary": summary,
+        "brands": _records(brands, list(brands.columns)),
+        "overpriced": _records(overpriced, columns),
+        "underpriced": _records(underpriced, columns),
+    }
@@ -1,3 +1,6 @@
+import json
+
+
 def get_price_comparison_prompt(product_type: str = "batteries", my_data: list = [], competitors_data: list = [], my_company_name: str = "АКУМУЛЯТОР ЦЕНТР"):
     if product_type == "batteries":
         prompt = f"""
@@ -59,4 +62,35 @@ def get_price_comparison_prompt(product_type: str = "batteries", my_data: list =
 - !!! Використовуй українську мову та якомога більше конкретних цифр і фактів.
 
 """
-    return prompt
\ No newline at end of file
+    return prompt
+
+def get_price_summary_prompt(product_type: str = "batteries", comparison: dict = None, my_company_name: str = "АКУМУЛЯТОР ЦЕНТР"):
+    """Промпт для текстового висновку за вже порахованим порівнянням (analytic/comparison_engine.py)."""
+    product_name = "автомобільних акумуляторів" if product_type == "batteries" else "сонячних панелей"
+    summary = json.dumps(comparison or {}, ensure_ascii=False, default=str)
+    prompt = f"""
+Ти — професійний аналітик ринку та спеціаліст з продажу {product_name} компанії {my_company_name}.
+
+Порівняння цін з конкурентами вже пораховано (однакові товари зіставлені за характеристиками):
+- summary: покриття асортименту, скільки моделей дорожчі/дешевші за медіану ринку, медіанний розрив у відсотках
+- brands: підсумки по брендах (median_gap_pct > 0 - ми дорожчі)
+- overpriced / underpriced: моделі з найбільшим розривом до ринку (market_min, market_median, cheapest_competitor, percentile - частка пропозицій конкурентів, дешевших за нашу)
+
+Дані:
+{summary}
+
+Завдання:
+1. Визнач, де ми дорожчі, а де дешевші (НАЗИВАЙ КОНКРЕТНІ МОДЕЛІ) з цифрами та відсотками з даних.
+2. Поясни можливі причини цінових відмінностей.
+3. Виділи бренди або моделі з потенціалом для маркетингового просування.
+4. Рекомендовані моделі для зниження ціни або акцій.
+5. Підсумуй цінову політику: що працює, що потребує змін.
+
+Відповідь:
+- Глибокий аналіз без таблиць.
+- Не вигадуй цифр, яких немає в даних.
+- Використовуй емоджі.
+- !!! Використовуй українську мову.
+
+"""
+    return prompt
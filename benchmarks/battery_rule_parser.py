@@ -0,0 +1,152 @@
+"""
+Точність локального парсера акумуляторів відносно збережених відповідей LLM.
+
+Запуск з кореня проєкту:
+    python -m benchmarks.battery_rule_parser .llm_cache
+    python -m benchmarks.battery_rule_parser export.json --threshold 0.8
+
+Приймає JSON-файли зі списком записів AI-парсера (brand, name, volume, full_name, ...)
+або директорії з ними (наприклад, LLM_CACHE_DIR). Кожен full_name + price проганяється
+через rule_parser, результат порівнюється з відповіддю LLM по кожному полю.
+Перед цим перевіряються рядки з відомими помилками парсера (REGRESSION_CASES).
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, Iterator, List
+
+from services.batteries.parsers.rule_parser import CONFIDENCE_THRESHOLD, extract_battery
+
+FIELDS = ("brand", "name", "volume", "c_amps", "region", "polarity", "electrolyte", "price")
+
+# (комірки, заголовки, очікувані поля); "confident" - чи рядок має пройти поріг без LLM
+REGRESSION_CASES = [
+    # Ціна з сусідньої комірки не повинна склеюватись з EN в кінці назви
+    (
+        ["VARTA Blue Dynamic 60Ah 540A (-/+) EN", "2500"], ["full_name", "price"],
+        {"brand": "VARTA", "volume": 60, "c_amps": 540, "polarity": "R+", "price": 2500},
+    ),
+    # Без полярності R+ - лише здогадка, рядок іде в LLM
+    (
+        ["VARTA Blue Dynamic 60Ah 540A EN", "2500"], ["full_name", "price"],
+        {"c_amps": 540, "price": 2500, "confident": False},
+    ),
+    # Струм в окремій колонці без A/EN
+    (
+        ["BOSCH S4 005 60Ah (-/+)", "540", "2500"], ["Назва", "Пусковий струм", "Ціна"],
+        {"brand": "BOSCH", "c_amps": 540, "price": 2500, "confident": True},
+    ),
+    # Назви серій (Dynamic, Standard, Start...) - не бренди
+    (
+        ["Dynamic 60Ah 540A (-/+)", "2500"], ["full_name", "price"],
+        {"brand": None, "confident": False},
+    ),
+]
+
+
+def _iter_json_files(paths: List[str]) -> Iterator[str]:
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in files:
+                    if name.endswith(".json"):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def load_llm_records(paths: List[str]) -> List[Dict]:
+    """Записи про акумулятори (з full_name і volume) з усіх файлів."""
+    records = []
+    for path in _iter_json_files(paths):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if isinstance(data, dict):
+            data = [data]
+        for entry in data if isinstance(data, list) else []:
+            if isinstance(entry, dict) and entry.get("full_name") and "volume" in entry:
+                records.append(entry)
+    return records
+
+
+def _same(field: str, expected, actual) -> bool:
+    if field in ("volume", "c_amps", "price"):
+        try:
+            return abs(float(expected or 0) - float(actual or 0)) < 0.5
+        except (TypeError, ValueError):
+            return False
+    return str(expected or "").strip().upper() == str(actual or "").strip().upper()
+
+
+def check_regressions(threshold: float = CONFIDENCE_THRESHOLD) -> List[str]:
+    """Повертає описи розбіжностей для REGRESSION_CASES (порожньо - все гаразд)."""
+    failures = []
+    for cells, headers, expected in REGRESSION_CASES:
+        entry = extract_battery(cells, headers)
+        actual = dict(entry, confident=entry["confidence"] >= threshold)
+        for field, value in expected.items():
+            same = actual[field] == value if field in ("brand", "confident") else _same(field, value, actual[field])
+            if not same:
+                failures.append(f"{cells}: {field} = {actual[field]!r}, очікувалось {value!r}")
+    return failures
+
+
+def run_benchmark(records: List[Dict], threshold: float = CONFIDENCE_THRESHOLD) -> Dict:
+    correct_all = {field: 0 for field in FIELDS}
+    correct_confident = {field: 0 for field in FIELDS}
+    confident = 0
+
+    started = time.perf_counter()
+    for record in records:
+        entry = extract_battery([record["full_name"], str(record.get("price") or "")], ["full_name", "price"])
+        is_confident = entry["confidence"] >= threshold
+        confident += is_confident
+        for field in FIELDS:
+            if _same(field, record.get(field), entry[field]):
+                correct_all[field] += 1
+                correct_confident[field] += is_confident
+    elapsed = time.perf_counter() - started
+
+    total = len(records) or 1
+    return {
+        "records": len(records),
+        "confident": confident,
+        "llm_rows_saved": round(confident / total * 100, 1),
+        "rows_per_sec": round(len(records) / elapsed) if elapsed else None,
+        "accuracy_all": {field: round(count / total * 100, 1) for field, count in correct_all.items()},
+        "accuracy_confident": {
+            field: round(count / (confident or 1) * 100, 1) for field, count in correct_confident.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="JSON-файли або директорії з відповідями LLM")
+    parser.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+    args = parser.parse_args()
+
+    failures = check_regressions(args.threshold)
+    for failure in failures:
+        print(f"❌ Регресія: {failure}")
+    print(f"Регресійних рядків: {len(REGRESSION_CASES)}, розбіжностей: {len(failures)}")
+
+    records = load_llm_records(args.paths)
+    if not records:
+        print("Не знайдено жодного запису про акумулятори")
+        return
+
+    result = run_benchmark(records, args.threshold)
+    print(f"Записів: {result['records']}, впевнених: {result['confident']} "
+          f"({result['llm_rows_saved']}% рядків не йдуть в LLM), {result['rows_per_sec']} рядків/сек")
+    print(f"{'поле':<12}{'всі, %':>10}{'впевнені, %':>14}")
+    for field in FIELDS:
+        print(f"{field:<12}{result['accuracy_all'][field]:>10}{result['accuracy_confident'][field]:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Швидкість і пам'ять конвертерів прайсів (helpers.csv_export.CONVERTERS) на власних файлах.
+
+Запуск з кореня проєкту:
+    python -m benchmarks.converters google.csv samples/
+    python -m benchmarks.converters samples/ --repeat 3
+
+Приймає файли та директорії з файлами постачальників. Формат кожного файлу визначається
+за сигнатурою, далі файл читається КОЖНИМ доступним конвертером цього формату:
+час (найкращий з --repeat), рядки/с, МБ/с та пік пам'яті (tracemalloc, окремим проходом,
+бо трасування сильно сповільнює читання). Наприкінці - порядок конвертерів за швидкістю
+у форматі змінної CONVERTER_ORDER. Конвертери, що ходять у мережу (Gemini, Google Docs), не міряються.
+"""
+import argparse
+import os
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, Iterator, List
+
+from helpers.csv_export import CONVERTERS, Converter, _normalize_row, get_converters, sniff_format
+
+
+def _iter_files(paths: List[str]) -> Iterator[str]:
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def _consume(converter: Converter, path: str) -> int:
+    rows = 0
+    for row in converter.read(path):
+        if _normalize_row(row):
+            rows += 1
+    return rows
+
+
+def measure(converter: Converter, path: str, repeat: int = 1) -> Dict:
+    """Найкращий час з repeat запусків і пік пам'яті одного запуску."""
+    best = None
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = _consume(converter, path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        _consume(converter, path)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    size = os.path.getsize(path)
+    return {
+        "rows": rows,
+        "seconds": best,
+        "rows_per_sec": rows / best if best else 0.0,
+        "mb_per_sec": size / 1024 / 1024 / best if best else 0.0,
+        "peak_mb": peak / 1024 / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="Файли або директорії з прайсами")
+    parser.add_argument("--repeat", type=int, default=1, help="Скільки разів міряти час (береться найкращий)")
+    args = parser.parse_args()
+
+    # формат -> конвертер -> сумарний час
+    totals: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    failed: Dict[str, set] = defaultdict(set)
+
+    print(f"{'файл':40} {'формат':7} {'конвертер':14} {'рядків':>8} {'сек':>8} {'рядків/с':>10} {'МБ/с':>7} {'пік МБ':>8}")
+    for path in _iter_files(args.paths):
+        try:
+            fmt = sniff_format(path)
+        except ValueError as e:
+            print(f"{os.path.basename(path)[:40]:40} пропущено: {e}")
+            continue
+
+        for converter in CONVERTERS.get(fmt, []):
+            if converter.network or not converter.available():
+                continue
+            try:
+                result = measure(converter, path, args.repeat)
+            except Exception as e:
+                failed[fmt].add(converter.name)
+                print(f"{os.path.basename(path)[:40]:40} {fmt:7} {converter.name:14} помилка: {type(e).__name__}: {e}")
+                continue
+            totals[fmt][converter.name] += result["seconds"]
+            print(
+                f"{os.path.basename(path)[:40]:40} {fmt:7} {converter.name:14} {result['rows']:>8} "
+                f"{result['seconds']:>8.3f} {result['rows_per_sec']:>10.0f} {result['mb_per_sec']:>7.2f} {result['peak_mb']:>8.1f}"
+            )
+
+    if not totals:
+        print("Немає файлів для жодного локального конвертера")
+        return
+
+    # Конвертер, що впав хоч на одному файлі, йде після тих, що прочитали всі
+    order = []
+    for fmt, times in sorted(totals.items()):
+        names = sorted(times, key=lambda name: (name in failed[fmt], times[name]))
+        order.append(f"{fmt}={','.join(names)}")
+        current = [c.name for c in get_converters(fmt) if c.name in times]
+        print(f"\n{fmt}: зараз {' -> '.join(current)}, найшвидше {' -> '.join(names)}")
+    print(f"\nCONVERTER_ORDER=\"{';'.join(order)}\"")
+
+
+if __name__ == "__main__":
+    main()
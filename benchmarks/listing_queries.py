@@ -0,0 +1,240 @@
+"""
+EXPLAIN-бенчмарк списків поточних товарів (/batteries/current_batteries, /solar_panels/current_solar_panels)
+на синтетичному каталозі.
+
+Запуск з кореня проєкту (потрібна мігрована база з DATABASE_URL):
+    python -m benchmarks.listing_queries
+    python -m benchmarks.listing_queries --rows 1000000 --max-ms 50 --max-count-ms 300 --keep
+
+Дані генеруються в окремій схемі (listing_bench) і видаляються після запуску (крім --keep).
+Запити будуються тими ж функціями, що й ендпоінти (current_*_filters/current_*_queries),
+для сценаріїв, які шле фронтенд. Кожен запит сторінки і підрахунку проганяється через
+EXPLAIN ANALYZE двічі: без індексів списку і з індексами з db/models.py.
+Код виходу 1, якщо з індексами запит сторінки довший за --max-ms або підрахунок
+(рахує всі відфільтровані рядки, тож повільніший за визначенням) - за --max-count-ms.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Any, Dict, List, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from db.models import (
+    Base,
+    BatteriesBrands,
+    BatteriesSuppliers,
+    CurrentBatteries,
+    SollarPanelsBrands,
+    SollarPanelsCurrent,
+    SollarPanelsSuppliers,
+)
+from services.backend.controllers import (
+    current_batteries_filters,
+    current_batteries_queries,
+    current_solar_panels_filters,
+    current_solar_panels_queries,
+)
+from services.backend.schemas import SortEnumModel, SortOrderEnumModel
+
+load_dotenv()
+
+BENCH_SCHEMA = "listing_bench"
+BRANDS = 120
+SUPPLIERS = 40
+
+TABLES = [
+    BatteriesBrands.__table__,
+    BatteriesSuppliers.__table__,
+    CurrentBatteries.__table__,
+    SollarPanelsBrands.__table__,
+    SollarPanelsSuppliers.__table__,
+    SollarPanelsCurrent.__table__,
+]
+# Індекси списків (без первинних ключів і унікальних ключів імпорту)
+LISTING_INDEXES = [
+    index
+    for table in (CurrentBatteries.__table__, SollarPanelsCurrent.__table__)
+    for index in sorted(table.indexes, key=lambda index: index.name)
+    if not index.unique and index.name != f"ix_{table.name}_id"
+]
+
+# Бренди й постачальники розподілені нерівномірно (power(random(), 2)) - як у реальному каталозі
+FILL_SQL = [
+    f"INSERT INTO batteries_brands (id, name) SELECT g, 'BRAND ' || g FROM generate_series(1, {BRANDS}) g",
+    f"""INSERT INTO batteries_suppliers (id, name, is_me, is_supplier, is_competitor)
+        SELECT g, 'SUPPLIER ' || g, g = 1, g % 2 = 0, g % 2 = 1 FROM generate_series(1, {SUPPLIERS}) g""",
+    f"""INSERT INTO current_batteries
+            (name, price, volume, full_name, c_amps, region, polarity, electrolyte, brand_id, supplier_id, updated_at)
+        SELECT 'model ' || (g % 5000),
+               round((500 + random() * 12000)::numeric, 0),
+               (ARRAY[45, 50, 55, 60, 62, 65, 70, 74, 77, 80, 95, 100, 110, 140, 190, 225])[1 + g % 16],
+               'AKB ' || g,
+               200 + (g % 60) * 15,
+               CASE WHEN g % 7 = 0 THEN 'ASIA' ELSE 'EUROPE' END,
+               CASE WHEN g % 3 = 0 THEN 'L+' ELSE 'R+' END,
+               (ARRAY['LAB', 'AGM', 'GEL', 'EFB'])[1 + g % 4],
+               1 + floor({BRANDS} * power(random(), 2))::int,
+               1 + floor({SUPPLIERS} * power(random(), 2))::int,
+               now()
+        FROM generate_series(1, :rows) g""",
+    f"INSERT INTO sollar_panels_brands (id, name) SELECT g, 'BRAND ' || g FROM generate_series(1, {BRANDS}) g",
+    f"""INSERT INTO sollar_panels_suppliers (id, name, is_me, is_supplier, is_competitor)
+        SELECT g, 'SUPPLIER ' || g, g = 1, g % 2 = 0, g % 2 = 1 FROM generate_series(1, {SUPPLIERS}) g""",
+    f"""INSERT INTO sollar_panels_current
+            (name, price, price_per_w, power, full_name, panel_type, cell_type, thickness, brand_id, supplier_id, updated_at)
+        SELECT name, price, round((price / power)::numeric, 2), power, full_name, panel_type, cell_type, thickness,
+               brand_id, supplier_id, now()
+        FROM (
+            SELECT 'panel ' || (g % 3000) AS name,
+                   round((1500 + random() * 9000)::numeric, 0) AS price,
+                   (ARRAY[400, 410, 450, 500, 550, 580, 600, 620, 650, 700, 720])[1 + g % 11] AS power,
+                   'PV ' || g AS full_name,
+                   CASE WHEN g % 4 = 0 THEN 'двостороння' ELSE 'одностороння' END AS panel_type,
+                   CASE WHEN g % 5 = 0 THEN 'p-type' ELSE 'n-type' END AS cell_type,
+                   (ARRAY[30, 35, 40])[1 + g % 3] AS thickness,
+                   1 + floor({BRANDS} * power(random(), 2))::int AS brand_id,
+                   1 + floor({SUPPLIERS} * power(random(), 2))::int AS supplier_id
+            FROM generate_series(1, :rows) g
+        ) panels""",
+]
+
+DEFAULT_PRICE = [0, 10000]
+SCENARIOS: List[Tuple[str, Any, Dict[str, Any]]] = [
+    ("batteries: за замовчуванням", current_batteries_queries,
+     {"filters": current_batteries_filters(price_diapason=DEFAULT_PRICE)}),
+    ("batteries: бренди", current_batteries_queries,
+     {"filters": current_batteries_filters(brand_ids=[1, 2], price_diapason=DEFAULT_PRICE)}),
+    ("batteries: постачальник, ціна ↑", current_batteries_queries,
+     {"filters": current_batteries_filters(supplier_ids=[3], price_diapason=DEFAULT_PRICE),
+      "sort_order": SortOrderEnumModel.asc}),
+    ("batteries: ємність + полярність, пуск. струм ↓", current_batteries_queries,
+     {"filters": current_batteries_filters(volumes=[60, 74], polarities=["R+"], price_diapason=DEFAULT_PRICE),
+      "sort_by": SortEnumModel.c_amps}),
+    ("batteries: електроліт + регіон", current_batteries_queries,
+     {"filters": current_batteries_filters(electrolytes=["AGM"], regions=["ASIA"], price_diapason=DEFAULT_PRICE)}),
+    ("batteries: сторінка 2000", current_batteries_queries,
+     {"filters": current_batteries_filters(price_diapason=DEFAULT_PRICE), "page": 2000}),
+    ("batteries: курсор глибоко в списку", current_batteries_queries,
+     {"filters": current_batteries_filters(price_diapason=DEFAULT_PRICE), "keyset": {"value": 2000, "id": 1}}),
+    ("solar: за замовчуванням", current_solar_panels_queries,
+     {"filters": current_solar_panels_filters(price_diapason=DEFAULT_PRICE, price_per_w_diapason=[0, 5])}),
+    ("solar: бренди", current_solar_panels_queries,
+     {"filters": current_solar_panels_filters(brand_ids=[1, 2], price_diapason=DEFAULT_PRICE)}),
+    ("solar: потужність ↓", current_solar_panels_queries,
+     {"filters": current_solar_panels_filters(price_diapason=DEFAULT_PRICE), "sort_by": SortEnumModel.power}),
+    ("solar: сторінка 2000", current_solar_panels_queries,
+     {"filters": current_solar_panels_filters(price_diapason=DEFAULT_PRICE), "page": 2000}),
+    ("solar: курсор глибоко в списку", current_solar_panels_queries,
+     {"filters": current_solar_panels_filters(price_diapason=DEFAULT_PRICE), "keyset": {"value": 2500, "id": 1}}),
+]
+
+
+def _sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def _seq_scans(plan: Dict[str, Any]) -> List[str]:
+    """Таблиці, які план читає повністю."""
+    found = [plan["Relation Name"]] if plan.get("Node Type") == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+async def explain(conn, query) -> Dict[str, Any]:
+    result = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {_sql(query)}"))
+    report = result.scalar()
+    report = (json.loads(report) if isinstance(report, str) else report)[0]
+    big_tables = {"current_batteries", "sollar_panels_current"}
+    return {
+        "ms": report["Execution Time"] + report["Planning Time"],
+        "node": report["Plan"]["Node Type"],
+        "seq_scan": sorted(set(_seq_scans(report["Plan"])) & big_tables),
+    }
+
+
+async def run_scenarios(conn) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    results = {}
+    for name, build, kwargs in SCENARIOS:
+        query, count_query = build(**kwargs)
+        results[(name, "сторінка")] = await explain(conn, query)
+        results[(name, "кількість")] = await explain(conn, count_query)
+    return results
+
+
+async def main_async(rows: int, max_ms: float, max_count_ms: float, keep: bool) -> int:
+    engine = create_async_engine(os.environ["DATABASE_URL"])
+    translated = {"schema_translate_map": {None: BENCH_SCHEMA}}
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {BENCH_SCHEMA}"))
+            await conn.run_sync(lambda sync_conn: Base.metadata.create_all(
+                sync_conn.execution_options(**translated), tables=TABLES
+            ))
+            # Незкваліфіковані таблиці в запитах ендпоінтів читаються з тестової схеми
+            await conn.execute(text(f"SET search_path TO {BENCH_SCHEMA}, public"))
+            for index in LISTING_INDEXES:
+                await conn.execute(text(f"DROP INDEX {BENCH_SCHEMA}.{index.name}"))
+
+            print(f"⏳ Генерація {rows} акумуляторів і {rows} панелей...")
+            for statement in FILL_SQL:
+                await conn.execute(text(statement), {"rows": rows})
+            await conn.execute(text("ANALYZE"))
+            await conn.commit()
+
+            print("⏳ Без індексів списку...")
+            baseline = await run_scenarios(conn)
+
+            print(f"⏳ Створення {len(LISTING_INDEXES)} індексів...")
+            await conn.run_sync(lambda sync_conn: [
+                index.create(sync_conn.execution_options(**translated)) for index in LISTING_INDEXES
+            ])
+            await conn.execute(text("ANALYZE"))
+            await conn.commit()
+            indexed = await run_scenarios(conn)
+
+            if not keep:
+                await conn.execute(text(f"DROP SCHEMA {BENCH_SCHEMA} CASCADE"))
+                await conn.commit()
+    finally:
+        await engine.dispose()
+
+    failed = 0
+    print(f"\n{'сценарій':48} {'запит':10} {'без, мс':>9} {'з інд., мс':>10}  план з індексами")
+    for key, before in baseline.items():
+        after = indexed[key]
+        name, kind = key
+        budget = max_count_ms if kind == "кількість" else max_ms
+        mark = ""
+        if after["ms"] > budget:
+            failed += 1
+            mark = f"  ❌ > {budget} мс"
+        seq = f", Seq Scan: {', '.join(after['seq_scan'])}" if after["seq_scan"] else ""
+        print(f"{name:48} {kind:10} {before['ms']:>9.1f} {after['ms']:>10.1f}  {after['node']}{seq}{mark}")
+
+    if failed:
+        print(f"\n❌ {failed} запитів з індексами перевищують бюджет")
+        return 1
+    print(f"\n✅ Усі запити з індексами в межах бюджету ({max_ms} / {max_count_ms} мс)")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Рядків у кожній поточній таблиці")
+    parser.add_argument("--max-ms", type=float, default=100.0, help="Бюджет на запит сторінки з індексами (мс)")
+    parser.add_argument("--max-count-ms", type=float, default=1000.0, help="Бюджет на підрахунок з індексами (мс)")
+    parser.add_argument("--keep", action="store_true", help="Не видаляти схему з даними")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args.rows, args.max_ms, args.max_count_ms, args.keep)))
+
+
+if __name__ == "__main__":
+    main()
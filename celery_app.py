@@ -1,9 +1,20 @@
 from celery import Celery
+from kombu import Queue
 import os
 
 # Встановлюємо налаштування для Celery
+# Для тестів без Redis: CELERY_BROKER_URL=memory:// CELERY_RESULT_BACKEND=cache+memory://
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+# Виконувати задачі одразу в процесі (без воркера) - для локальної перевірки
+CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', 'false').lower() == 'true'
+# Як часто парсити конкурентів (секунди); 0 - без періодичного парсингу, лише вручну
+COMPETITORS_SCHEDULE = float(os.getenv('COMPETITORS_SCHEDULE', str(24 * 3600)))
+# За скільки секунд Redis повторно видає непідтверджену задачу (з acks_late - після виконання).
+# Має бути довшим за найдовший парсинг, інакше задача запуститься вдруге
+CELERY_VISIBILITY_TIMEOUT = int(os.getenv('CELERY_VISIBILITY_TIMEOUT', str(12 * 3600)))
+# Як часто згортати повтори в історії цін (секунди)
+HISTORY_COMPACTION_SCHEDULE = float(os.getenv('HISTORY_COMPACTION_SCHEDULE', str(24 * 3600)))
 
 # Створюємо екземпляр Celery
 celery_app = Celery(
@@ -20,15 +31,49 @@ celery_app.conf.update(
     result_serializer='json',
     timezone='Europe/Kiev',
     enable_utc=True,
+    task_always_eager=CELERY_TASK_ALWAYS_EAGER,
+    task_store_eager_result=True,
+    # Статус STARTED + назва/аргументи задачі в результаті
+    task_track_started=True,
+    result_extended=True,
+    result_expires=7 * 24 * 3600,
+    # Задачі довгі: воркер бере по одній, підтвердження після виконання
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    broker_transport_options={'visibility_timeout': CELERY_VISIBILITY_TIMEOUT},
+    # Окремі черги, щоб обмежити паралельність для кожного типу задач:
+    # celery -A celery_app worker -Q imports -c 2
+    # celery -A celery_app worker -Q crawls -c 1
+    task_queues=(Queue('imports'), Queue('crawls')),
+    task_default_queue='imports',
+    task_routes={
+        'tasks.import_file': {'queue': 'imports'},
+        'tasks.import_text': {'queue': 'imports'},
+        'tasks.parse_competitors': {'queue': 'crawls'},
+        'tasks.parse_me': {'queue': 'crawls'},
+        'tasks.compact_history': {'queue': 'crawls'},
+        'tasks.match_products': {'queue': 'crawls'},
+    },
 )
 
 # Налаштування для Celery Beat (планувальник задач)
 celery_app.conf.beat_schedule = {
-    'process-files-every-hour': {
-        'task': 'tasks.process_files',
-        'schedule': 3600.0,  # Кожну годину
-    },
+    f'compact-{product}-history': {
+        'task': 'tasks.compact_history',
+        'schedule': HISTORY_COMPACTION_SCHEDULE,
+        'args': (product,),
+    }
+    for product in ('batteries', 'sollar_panels', 'inverters')
 }
+if COMPETITORS_SCHEDULE > 0:
+    celery_app.conf.beat_schedule.update({
+        f'parse-{product}-competitors': {
+            'task': 'tasks.parse_competitors',
+            'schedule': COMPETITORS_SCHEDULE,
+            'args': (product,),
+        }
+        for product in ('batteries', 'sollar_panels', 'inverters')
+    })
 
 if __name__ == '__main__':
-    celery_app.start()
\ No newline at end of file
+    celery_app.start()
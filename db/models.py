@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from sqlalchemy.orm import sessionmaker, declarative_base
@@ -9,6 +10,11 @@ Base = declarative_base()
 
 class Batteries(Base):
     __tablename__ = "batteries"
+    __table_args__ = (
+        # Ряди цін (/batteries/price_history): товар + час
+        Index("ix_batteries_product_id_created_at", "product_id", "created_at"),
+        Index("ix_batteries_spec_created_at", "brand_id", "volume", "c_amps", "polarity", "region", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -22,6 +28,8 @@ class Batteries(Base):
     
     brand_id = Column(Integer, ForeignKey('batteries_brands.id'), nullable=True)
     supplier_id = Column(Integer, ForeignKey('batteries_suppliers.id'), nullable=True)
+    # Один товар у різних постачальників (helpers/product_matching.py)
+    product_id = Column(Integer, ForeignKey('canonical_products.id'), nullable=True)
 
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -31,6 +39,9 @@ class Batteries(Base):
 
 class BatteriesBrands(Base):
     __tablename__ = "batteries_brands"
+    __table_args__ = (
+        Index("uq_batteries_brands_name", "name", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -55,6 +66,21 @@ class BatteriesSuppliers(Base):
 
 class CurrentBatteries(Base):
     __tablename__ = "current_batteries"
+    __table_args__ = (
+        # Ключ для INSERT ... ON CONFLICT у helpers/bulk_upsert.py
+        Index("uq_current_batteries_full_name_supplier_id", "full_name", "supplier_id", unique=True),
+        # Список /batteries/current_batteries: фільтр + сортування за ціною (див. benchmarks/listing_queries.py)
+        Index("ix_current_batteries_price", "price"),
+        Index("ix_current_batteries_brand_id_price", "brand_id", "price"),
+        Index("ix_current_batteries_supplier_id_price", "supplier_id", "price"),
+        Index("ix_current_batteries_volume_price", "volume", "price"),
+        Index("ix_current_batteries_c_amps", "c_amps"),
+        # Порівняння цін: лише валідні рядки наших і конкурентів
+        Index(
+            "ix_current_batteries_comparison", "supplier_id", "brand_id",
+            postgresql_where=text("price > 0 AND c_amps > 0 AND volume > 0"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -71,6 +97,8 @@ class CurrentBatteries(Base):
         
     brand_id = Column(Integer, ForeignKey('batteries_brands.id'), nullable=True)
     supplier_id = Column(Integer, ForeignKey('batteries_suppliers.id'), nullable=True)
+    # Один товар у різних постачальників (helpers/product_matching.py)
+    product_id = Column(Integer, ForeignKey('canonical_products.id'), nullable=True, index=True)
     
     updated_at = Column(DateTime, default=datetime.utcnow)
 
@@ -81,6 +109,11 @@ class CurrentBatteries(Base):
 
 class SollarPanels(Base):
     __tablename__ = "sollar_panels"
+    __table_args__ = (
+        # Ряди цін (/solar_panels/price_history): товар + час
+        Index("ix_sollar_panels_product_id_created_at", "product_id", "created_at"),
+        Index("ix_sollar_panels_spec_created_at", "brand_id", "power", "panel_type", "cell_type", "thickness", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -94,6 +127,8 @@ class SollarPanels(Base):
     
     brand_id = Column(Integer, ForeignKey('sollar_panels_brands.id'), nullable=True)
     supplier_id = Column(Integer, ForeignKey('sollar_panels_suppliers.id'), nullable=True)
+    # Один товар у різних постачальників (helpers/product_matching.py)
+    product_id = Column(Integer, ForeignKey('canonical_products.id'), nullable=True)
     
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -105,6 +140,19 @@ class SollarPanels(Base):
 
 class SollarPanelsCurrent(Base):
     __tablename__ = "sollar_panels_current"
+    __table_args__ = (
+        Index("uq_sollar_panels_current_full_name_supplier_id", "full_name", "supplier_id", unique=True),
+        # Список /solar_panels/current_solar_panels: тип панелі й комірок фронтенд шле завжди
+        Index("ix_sollar_panels_current_price", "price"),
+        Index("ix_sollar_panels_current_types_price", "panel_type", "cell_type", "price"),
+        Index("ix_sollar_panels_current_brand_id_price", "brand_id", "price"),
+        Index("ix_sollar_panels_current_supplier_id_price", "supplier_id", "price"),
+        Index("ix_sollar_panels_current_power_price", "power", "price"),
+        Index(
+            "ix_sollar_panels_current_comparison", "supplier_id", "brand_id",
+            postgresql_where=text("price > 0 AND power > 0"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -118,6 +166,8 @@ class SollarPanelsCurrent(Base):
     
     brand_id = Column(Integer, ForeignKey('sollar_panels_brands.id'), nullable=True)
     supplier_id = Column(Integer, ForeignKey('sollar_panels_suppliers.id'), nullable=True)
+    # Один товар у різних постачальників (helpers/product_matching.py)
+    product_id = Column(Integer, ForeignKey('canonical_products.id'), nullable=True, index=True)
     
     updated_at = Column(DateTime, default=datetime.utcnow)
 
@@ -128,6 +178,9 @@ class SollarPanelsCurrent(Base):
 
 class SollarPanelsBrands(Base):
     __tablename__ = "sollar_panels_brands"
+    __table_args__ = (
+        Index("uq_sollar_panels_brands_name", "name", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -154,6 +207,10 @@ class SollarPanelsSuppliers(Base):
 
 class Inverters(Base):
     __tablename__ = "inverters"
+    __table_args__ = (
+        # Ряди цін товару: товар + час
+        Index("ix_inverters_product_id_created_at", "product_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -167,6 +224,8 @@ class Inverters(Base):
     
     brand_id = Column(Integer, ForeignKey('inverters_brands.id'), nullable=True)
     supplier_id = Column(Integer, ForeignKey('inverters_suppliers.id'), nullable=True)
+    # Один товар у різних постачальників (helpers/product_matching.py)
+    product_id = Column(Integer, ForeignKey('canonical_products.id'), nullable=True)
     
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -177,6 +236,9 @@ class Inverters(Base):
 
 class CurrentInverters(Base):
     __tablename__ = "current_inverters"
+    __table_args__ = (
+        Index("uq_current_inverters_full_name_supplier_id", "full_name", "supplier_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -190,6 +252,8 @@ class CurrentInverters(Base):
     
     brand_id = Column(Integer, ForeignKey('inverters_brands.id'), nullable=True)
     supplier_id = Column(Integer, ForeignKey('inverters_suppliers.id'), nullable=True)
+    # Один товар у різних постачальників (helpers/product_matching.py)
+    product_id = Column(Integer, ForeignKey('canonical_products.id'), nullable=True, index=True)
     
     updated_at = Column(DateTime, default=datetime.utcnow)
     
@@ -200,6 +264,9 @@ class CurrentInverters(Base):
 
 class InvertersBrands(Base):
     __tablename__ = "inverters_brands"
+    __table_args__ = (
+        Index("uq_inverters_brands_name", "name", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -221,3 +288,79 @@ class InvertersSuppliers(Base):
     # ORM-зв'язки
     inverters = relationship("Inverters", back_populates="supplier")
     current_inverters = relationship("CurrentInverters", back_populates="supplier")
+
+
+class CanonicalProducts(Base):
+    """
+    Канонічний товар: рядки різних постачальників з однаковим брендом і характеристиками
+    та схожою назвою (див. helpers/product_matching.py).
+    """
+    __tablename__ = "canonical_products"
+    __table_args__ = (
+        # Кандидати для зіставлення: той самий продукт, бренд і ключ характеристик
+        Index("ix_canonical_products_block", "product", "brand_id", "spec_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    product = Column(String, nullable=False)
+    # Без FK: бренди кожного продукту в окремій таблиці
+    brand_id = Column(Integer, nullable=True)
+    spec_key = Column(String, nullable=False)
+    title = Column(String, nullable=False)
+    # Нормалізовані токени назви через пробіл
+    tokens = Column(String, nullable=False, default="")
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class CrawlPages(Base):
+    """Стан сторінок конкурентів між запусками парсингу (див. helpers/crawl_state.py)."""
+    __tablename__ = "crawl_pages"
+    __table_args__ = (
+        Index("uq_crawl_pages_url", "url", unique=True),
+        Index("ix_crawl_pages_host", "host"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    host = Column(String, nullable=False)
+    url = Column(String, nullable=False)
+    content_hash = Column(String, nullable=False)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+
+    last_seen = Column(DateTime, default=datetime.utcnow)
+    changed_at = Column(DateTime, default=datetime.utcnow)
+
+
+class CrawlItems(Base):
+    """Товари конкурентів, уже розпарсені AI (хеш нормалізованого тексту картки)."""
+    __tablename__ = "crawl_items"
+    __table_args__ = (
+        Index("uq_crawl_items_product_host_content_hash", "product", "host", "content_hash", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    product = Column(String, nullable=False)
+    host = Column(String, nullable=False)
+    content_hash = Column(String, nullable=False)
+    # full_name імпортованих з картки товарів - щоб оновлювати updated_at, коли картка не змінилась
+    full_names = Column(ARRAY(String), nullable=True)
+
+    last_seen = Column(DateTime, default=datetime.utcnow)
+    parsed_at = Column(DateTime, default=datetime.utcnow)
+
+
+class HistoryStats(Base):
+    """Лічильники запису історії цін по днях (див. helpers/history.py)."""
+    __tablename__ = "history_stats"
+    __table_args__ = (
+        Index("uq_history_stats_product_day", "product", "day", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    product = Column(String, nullable=False)
+    day = Column(Date, nullable=False)
+    # Рядків від парсерів, записано в історію, видалено компактуванням
+    observed = Column(Integer, nullable=False, default=0)
+    written = Column(Integer, nullable=False, default=0)
+    compacted = Column(Integer, nullable=False, default=0)
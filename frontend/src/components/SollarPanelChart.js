@@ -24,23 +24,20 @@ const SollarPanelChart = ({ panel }) => {
         };
         const response = await getSolarPanelsChart(chartData);
         
-        // Перевіряємо структуру відповіді
-        if (response && response.chart) {
-          // Розбираємо дані з відповіді
-          const chartData = JSON.parse(response.chart);
-          
-          // Перетворюємо дані для графіка, якщо вони у правильному форматі
-          if (chartData && chartData.datasets) {
-            const formattedData = chartData.datasets.map(item => ({
-              date: new Date(item.date).toLocaleDateString(),
-              ...item.suppliers
-            }));
-            
-            setChartData(formattedData);
-          } else {
-            console.error('Unexpected chart data format:', chartData);
-            setChartData([]);
-          }
+        // Ряди цін постачальників: [{supplier, points: [[дата, ціна], ...]}]
+        if (response && Array.isArray(response.series)) {
+          const rows = {};
+          response.series.forEach(({ supplier, points }) => {
+            points.forEach(([date, price]) => {
+              rows[date] = { ...rows[date], [supplier]: price };
+            });
+          });
+          const formattedData = Object.keys(rows).sort().map(date => ({
+            date: new Date(date).toLocaleDateString(),
+            ...rows[date]
+          }));
+
+          setChartData(formattedData);
         } else {
           console.error('No chart data in response:', response);
           setChartData([]);
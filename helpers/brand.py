@@ -1,23 +1,136 @@
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.models import BatteriesBrands, SollarPanelsBrands, InvertersBrands
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
-async def get_or_create_brand(session: AsyncSession, brand_name: str, product: str = "batteries") -> int:
-    if product == "batteries":
-        brand_model = BatteriesBrands
-    elif product == "sollar_panels":
-        brand_model = SollarPanelsBrands
-    elif product == "inverters":
-        brand_model = InvertersBrands
-    else:
+BRAND_MODELS = {
+    "batteries": BatteriesBrands,
+    "sollar_panels": SollarPanelsBrands,
+    "inverters": InvertersBrands,
+}
+
+# Кеш ID брендів у процесі: (продукт, назва у верхньому регістрі) -> id.
+# Бренди ніколи не видаляються, тому кеш лише доповнюється.
+_brand_cache: Dict[Tuple[str, str], int] = {}
+
+
+def _get_brand_model(product: str):
+    if product not in BRAND_MODELS:
         raise ValueError("Неверный тип продукта")
+    return BRAND_MODELS[product]
+
+
+def normalize_brand_name(brand_name: str) -> str:
+    return brand_name.strip().upper()
+
+
+def _staged_brands(session: AsyncSession) -> Dict[Tuple[str, str], int]:
+    # Бренди, створені в поточній транзакції сесії: у спільний кеш вони потрапляють лише після коміту,
+    # інакше паралельний імпорт візьме ID рядка, якого ще (або вже) немає в базі
+    return session.info.setdefault("staged_brands", {})
+
+
+def publish_staged_brands(session: AsyncSession) -> None:
+    """Переносить бренди, створені сесією, у спільний кеш. Викликається після session.commit()."""
+    staged = _staged_brands(session)
+    _brand_cache.update(staged)
+    staged.clear()
+
+
+def discard_staged_brands(session: AsyncSession) -> None:
+    """Забуває бренди, створені сесією. Викликається після rollback - спільний кеш не чіпається."""
+    _staged_brands(session).clear()
+
+
+def get_cached_brand_names(product: str) -> List[str]:
+    """Назви брендів продукту, які вже є в кеші (без запиту до бази)."""
+    return [name for cached_product, name in _brand_cache if cached_product == product]
+
+
+async def warm_brand_cache(session: AsyncSession) -> int:
+    """
+    Завантажує всі бренди всіх продуктів у кеш (викликається при старті застосунку).
+
+    Returns:
+        Кількість брендів у кеші
+    """
+    for product, brand_model in BRAND_MODELS.items():
+        result = await session.execute(select(brand_model.id, brand_model.name))
+        for brand_id, name in result.all():
+            _brand_cache[(product, normalize_brand_name(name))] = brand_id
+    return len(_brand_cache)
+
+
+async def resolve_brand_ids(session: AsyncSession, brand_names: Iterable[str], product: str = "batteries") -> Dict[str, int]:
+    """
+    Знаходить або створює ID для всіх брендів імпорту за раз:
+    один SELECT ... WHERE name IN (...) для брендів, яких немає в кеші,
+    та один INSERT ... ON CONFLICT DO NOTHING для нових.
+
+    Args:
+        session: Асинхронна сесія SQLAlchemy
+        brand_names: Назви брендів (можуть повторюватись)
+        product: Тип продукту
+
+    Returns:
+        Словник {назва у верхньому регістрі: id}
+    """
+    brand_model = _get_brand_model(product)
+
+    names = set()
+    for brand_name in brand_names:
+        if not brand_name:
+            raise ValueError("Название бренда не может быть пустым")
+        names.add(normalize_brand_name(brand_name))
+
+    staged = _staged_brands(session)
+
+    def known(name: str) -> Optional[int]:
+        return _brand_cache.get((product, name), staged.get((product, name)))
+
+    misses = [name for name in names if known(name) is None]
+    if misses:
+        # Знайдені рядки закомічені (власні незакомічені вже є в staged) - їх можна в спільний кеш
+        result = await session.execute(select(brand_model.id, brand_model.name).where(brand_model.name.in_(misses)))
+        for brand_id, name in result.all():
+            _brand_cache[(product, name)] = brand_id
+
+        new_names = [name for name in misses if known(name) is None]
+        if new_names:
+            stmt = (
+                pg_insert(brand_model)
+                .values([{"name": name} for name in new_names])
+                .on_conflict_do_nothing(index_elements=["name"])
+                .returning(brand_model.id, brand_model.name)
+            )
+            result = await session.execute(stmt)
+            for brand_id, name in result.all():
+                staged[(product, name)] = brand_id
+
+            # Бренди, які паралельно створив і закомітив інший імпорт (ON CONFLICT нічого не повернув)
+            raced = [name for name in new_names if known(name) is None]
+            if raced:
+                result = await session.execute(select(brand_model.id, brand_model.name).where(brand_model.name.in_(raced)))
+                for brand_id, name in result.all():
+                    _brand_cache[(product, name)] = brand_id
+
+    return {name: known(name) for name in names}
+
+
+async def get_or_create_brand(session: AsyncSession, brand_name: str, product: str = "batteries") -> int:
+    brand_model = _get_brand_model(product)
     
     if not brand_name:
         raise ValueError("Название бренда не может быть пустым")
     
     # Преобразуем название бренда в верхний регистр
-    brand_name_upper = brand_name.strip().upper()
+    brand_name_upper = normalize_brand_name(brand_name)
+
+    # Спочатку шукаємо в кеші
+    cached_id = _brand_cache.get((product, brand_name_upper))
+    if cached_id is not None:
+        return cached_id
     
     # Ищем бренд в базе данных
     query = select(brand_model).where(brand_model.name == brand_name_upper)
@@ -26,6 +139,7 @@ async def get_or_create_brand(session: AsyncSession, brand_name: str, product: s
     
     # Если бренд найден, возвращаем его ID
     if brand:
+        _brand_cache[(product, brand_name_upper)] = brand.id
         return brand.id
     
     # Если бренд не найден, создаем новый
@@ -45,14 +159,7 @@ async def get_brand_by_name(session: AsyncSession, brand_name: str, product: str
     Returns:
         Объект бренда или None, если бренд не найден
     """
-    if product == "batteries":
-        brand_model = BatteriesBrands
-    elif product == "sollar_panels":
-        brand_model = SollarPanelsBrands
-    elif product == "inverters":
-        brand_model = InvertersBrands
-    else:
-        raise ValueError("Неверный тип продукта")
+    brand_model = _get_brand_model(product)
     
     if not brand_name:
         return None
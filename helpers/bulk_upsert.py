@@ -0,0 +1,77 @@
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from helpers.history import HISTORY_CHANGES_ONLY, select_changed_rows
+
+# Скільки рядків іде в один INSERT. asyncpg обмежує кількість параметрів (32767),
+# тому 500 рядків по ~12 колонок лишають достатній запас.
+DEFAULT_BATCH_SIZE = 500
+
+# Унікальний ключ поточних таблиць (див. uq_*_full_name_supplier_id у db/models.py)
+CURRENT_KEY_COLUMNS = ("full_name", "supplier_id")
+
+
+async def upsert_batch(
+    session: AsyncSession,
+    history_model,
+    current_model,
+    rows: List[Dict[str, Any]],
+    key_columns: Sequence[str] = CURRENT_KEY_COLUMNS,
+) -> Dict[str, Any]:
+    """
+    Записує один батч: один мульти-рядковий INSERT в таблицю історії та один
+    INSERT ... ON CONFLICT (full_name, supplier_id) DO UPDATE в поточну таблицю.
+    З HISTORY_CHANGES_ONLY в історію йдуть лише рядки, що відрізняються від поточних
+    (ще до upsert - один SELECT поточного стану батчу).
+
+    Args:
+        session: Асинхронна сесія SQLAlchemy
+        history_model: Модель історії (наприклад, Batteries)
+        current_model: Модель поточних цін (наприклад, CurrentBatteries)
+        rows: Підготовлені рядки (ключі = назви колонок)
+        key_columns: Колонки унікального ключа поточної таблиці
+
+    Returns:
+        Статистика батчу: кількість рядків та час виконання
+    """
+    started = time.perf_counter()
+    now = datetime.utcnow()
+
+    # В межах одного INSERT ... ON CONFLICT ключ не може повторюватись,
+    # тому залишаємо останнє входження (як і раніше - останній рядок перемагає)
+    staged: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        staged[tuple(row.get(column) for column in key_columns)] = row
+
+    if HISTORY_CHANGES_ONLY:
+        rows_to_history = await select_changed_rows(session, history_model, current_model, rows, key_columns)
+    else:
+        rows_to_history = rows
+    history_rows = [{**row, "created_at": now} for row in rows_to_history]
+    current_rows = [{**row, "updated_at": now} for row in staged.values()]
+
+    if history_rows:
+        await session.execute(insert(history_model).values(history_rows))
+
+    if current_rows:
+        stmt = pg_insert(current_model).values(current_rows)
+        update_columns = {
+            column: stmt.excluded[column]
+            for column in current_rows[0].keys()
+            if column not in key_columns
+        }
+        stmt = stmt.on_conflict_do_update(index_elements=list(key_columns), set_=update_columns)
+        await session.execute(stmt)
+
+    return {
+        "rows": len(rows),
+        "history_rows": len(history_rows),
+        "upserted": len(current_rows),
+        "elapsed": round(time.perf_counter() - started, 4),
+    }
+
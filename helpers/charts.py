@@ -1,13 +1,34 @@
-import matplotlib
-# Встановлюємо бекенд Agg, який не потребує графічного інтерфейсу
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-from datetime import datetime
-import io
+import asyncio
 import base64
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+from dotenv import load_dotenv
+# Figure без pyplot: жодного глобального стану, кожен виклик малює на своєму полотні Agg
+from matplotlib.figure import Figure
 
+from helpers.query_cache import cached_json
 
-def plot_combined_price_chart(datasets: list[dict], normalize: bool = False):
+load_dotenv()
+
+# Формати графіка: png (base64), svg (текст), json - лише ряди, без малювання
+CHART_FORMATS = ("png", "svg", "json")
+# Скільки процесів малюють графіки; 0 або 1 - потоки (asyncio.to_thread)
+CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", "2"))
+# Готові графіки адресуються хешем рядів, тож TTL лише прибирає непотрібні
+CHART_CACHE_TTL = float(os.getenv("CHART_CACHE_TTL", "86400"))
+# Покоління цього scope не скидається: нова історія змінює ряди, а отже й ключ
+CHART_CACHE_SCOPE = "charts"
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def plot_combined_price_chart(datasets: list[dict], normalize: bool = False, fmt: str = "png") -> str:
     """
     datasets — список словників з даними від постачальників
         [
@@ -15,19 +36,26 @@ def plot_combined_price_chart(datasets: list[dict], normalize: bool = False):
             {"name": "Supplier B", "data": [{"name": "Battery X", "date": "2024-01-01", "price": 110}, ...]},
         ]
     normalize — чи показувати темп росту (True) замість абсолютної ціни (False)
+    fmt — "png" (повертає base64) або "svg" (повертає текст SVG)
     """
-    plt.figure(figsize=(12, 6))
-    
+    if fmt not in ("png", "svg"):
+        raise ValueError(f"Невідомий формат графіка: {fmt}")
+    fig = Figure(figsize=(12, 6))
+    ax1 = fig.add_subplot()
+
     # Зберігаємо оригінальні ціни для відображення на осі Y
     all_prices = []
     all_normalized = []
-    
+
     # Спочатку збираємо всі дані для правильного налаштування осей
     supplier_data = []
-    
+    battery_name = ""
+
     for supplier in datasets:
         supplier_name = supplier["name"]
         entries = supplier["data"]
+        if not entries:
+            continue
 
         # Фільтруємо лише одну модель (наприклад, першу в списку)
         # Можна адаптувати, якщо треба більше
@@ -38,69 +66,117 @@ def plot_combined_price_chart(datasets: list[dict], normalize: bool = False):
             if entry["name"] == battery_name
         ]
         records.sort(key=lambda x: x[0])
-        
+
         if records:  # Перевіряємо, що є дані
             dates, prices = zip(*records)
-            
+
             # Зберігаємо оригінальні ціни
             all_prices.extend(prices)
-            
+
             if normalize:
                 base_price = prices[0] if prices[0] > 0 else 1  # Уникаємо ділення на нуль
                 normalized = [(p / base_price) for p in prices]
                 all_normalized.extend(normalized)
-            
+
             supplier_data.append((supplier_name, dates, prices))
-    
+
     # Налаштовуємо основну вісь Y для відображення абсолютних цін
-    ax1 = plt.gca()
     ax1.set_ylabel("Price (UAH)", fontweight='bold', fontsize=12)
-    
+
     # Встановлюємо діапазон для основної осі Y
     if all_prices:
         min_price = min(all_prices)
         max_price = max(all_prices)
         price_range = max_price - min_price
         ax1.set_ylim(min_price - price_range * 0.1, max_price + price_range * 0.1)
-    
+
     # Тепер малюємо графіки
     for supplier_name, dates, prices in supplier_data:
         ax1.plot(dates, prices, marker='o', label=supplier_name)
-    
+
     # Якщо потрібно показувати нормалізовані дані, додаємо другу вісь
+    handles2, labels2 = [], []
     if normalize and all_normalized:
         ax2 = ax1.twinx()
         ax2.set_ylabel("Growth (x)", color='gray')
         ax2.tick_params(axis='y', labelcolor='gray')
-        
+
         # Встановлюємо діапазон для другої осі
         min_norm = min(all_normalized)
         max_norm = max(all_normalized)
         norm_range = max_norm - min_norm
         ax2.set_ylim(min_norm - norm_range * 0.1, max_norm + norm_range * 0.1)
+        handles2, labels2 = ax2.get_legend_handles_labels()
+
+    ax1.set_title(f"{'Price Growth Rate' if normalize else 'Battery Price'} Comparison: {battery_name}")
+    ax1.set_xlabel("Date")
 
-    plt.title(f"{'Price Growth Rate' if normalize else 'Battery Price'} Comparison: {battery_name}")
-    plt.xlabel("Date")
-    
     handles1, labels1 = ax1.get_legend_handles_labels()
-    handles2, labels2 = (ax2.get_legend_handles_labels() if normalize else ([], []))
     all_handles = handles1 + handles2
     all_labels = labels1 + labels2
 
-    plt.subplots_adjust(bottom=0.2)  # Збільшуємо простір внизу для легенди
-    plt.legend(all_handles, all_labels, loc='upper center', bbox_to_anchor=(0.5, -0.15),
-               ncol=min(len(supplier_data), 3),
-               frameon=True, fancybox=True, shadow=True)
-    
-    plt.grid(True)
+    fig.subplots_adjust(bottom=0.2)  # Збільшуємо простір внизу для легенди
+    if all_handles:
+        ax1.legend(all_handles, all_labels, loc='upper center', bbox_to_anchor=(0.5, -0.15),
+                   ncol=min(len(supplier_data), 3),
+                   frameon=True, fancybox=True, shadow=True)
+
+    ax1.grid(True)
     # Не використовуємо tight_layout, оскільки він може конфліктувати з subplots_adjust
-    
+
     # Зберігаємо в памʼять
     buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    buf.seek(0)
-    image_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    buf.close()
-    plt.close()
+    fig.savefig(buf, format=fmt)
+    if fmt == "svg":
+        return buf.getvalue().decode('utf-8')
+    return base64.b64encode(buf.getvalue()).decode('utf-8')
+
+
+def get_chart_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Пул процесів для малювання графіків.
+    None, якщо дочірні процеси недоступні (воркери Celery prefork - демони) або CHART_RENDER_WORKERS <= 1.
+    """
+    global _pool
+    if CHART_RENDER_WORKERS <= 1 or multiprocessing.current_process().daemon:
+        return None
+    if _pool is None:
+        # spawn: процес API має потоки, fork з ними небезпечний
+        _pool = ProcessPoolExecutor(max_workers=CHART_RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_chart_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+
+
+async def render_price_chart(datasets: list[dict], normalize: bool = False, fmt: str = "png") -> str:
+    """
+    Графік цін поза event loop (пул процесів або потік) з кешем за хешем рядів і normalize.
+    Ті самі ряди малюються один раз; нова історія дає інші ряди й новий ключ.
+
+    Args:
+        datasets: Ряди у форматі plot_combined_price_chart
+        normalize: Друга вісь з темпом росту
+        fmt: "png" або "svg"
+
+    Returns:
+        PNG у base64 або текст SVG
+    """
+    if fmt not in ("png", "svg"):
+        raise ValueError(f"Невідомий формат графіка: {fmt}")
+
+    async def produce():
+        pool = get_chart_pool()
+        if pool is None:
+            return await asyncio.to_thread(plot_combined_price_chart, datasets, normalize, fmt)
+        return await asyncio.get_running_loop().run_in_executor(pool, plot_combined_price_chart, datasets, normalize, fmt)
 
-    return image_base64
+    body, _ = await cached_json(
+        CHART_CACHE_SCOPE, "price_chart", {"datasets": datasets, "normalize": normalize, "format": fmt},
+        produce, CHART_CACHE_TTL,
+    )
+    return json.loads(body)
@@ -0,0 +1,109 @@
+import os
+import re
+from statistics import median
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+from helpers.llm_scheduler import estimate_tokens
+
+load_dotenv()
+
+# Бюджет одного запиту до LLM: вхід (промпт + дані) і очікувана відповідь.
+# Вихід gemini-1.5-flash обмежений 8192 токенами - беремо із запасом, щоб JSON не обрізався
+LLM_INPUT_TOKENS = int(os.getenv("LLM_INPUT_TOKENS", "12000"))
+LLM_OUTPUT_TOKENS = int(os.getenv("LLM_OUTPUT_TOKENS", "6000"))
+
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+class ChunkReport:
+    """Розподіл розмірів блоків (рядків і оцінених токенів на блок) для логів."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows: List[int] = []
+        self.tokens: List[int] = []
+
+    def add(self, rows: int, tokens: int) -> None:
+        self.rows.append(rows)
+        self.tokens.append(tokens)
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.rows:
+            return {"chunks": 0}
+        return {
+            "chunks": len(self.rows),
+            "rows": sum(self.rows),
+            "rows_per_chunk": {"min": min(self.rows), "median": median(self.rows), "max": max(self.rows)},
+            "input_tokens": {"min": min(self.tokens), "median": median(self.tokens), "max": max(self.tokens)},
+        }
+
+    def print(self) -> None:
+        summary = self.summary()
+        if not summary["chunks"]:
+            print(f"📦 {self.name}: немає даних для LLM")
+            return
+        rows, tokens = summary["rows_per_chunk"], summary["input_tokens"]
+        print(
+            f"📦 {self.name}: {summary['rows']} рядків у {summary['chunks']} запитах; "
+            f"рядків на запит {rows['min']}/{rows['median']}/{rows['max']}, "
+            f"токенів {tokens['min']}/{tokens['median']}/{tokens['max']} (мін/медіана/макс)"
+        )
+
+
+def pack_rows(
+    rows: Iterable[Any],
+    to_text: Callable[[Any], str] = str,
+    output_tokens_per_row: int = 100,
+    base_tokens: int = 0,
+    input_budget: int = LLM_INPUT_TOKENS,
+    output_budget: int = LLM_OUTPUT_TOKENS,
+    report: Optional[ChunkReport] = None,
+) -> Iterator[List[Any]]:
+    """
+    Пакує рядки в блоки для LLM якомога більшими, але в межах бюджету токенів.
+    Рядок ніколи не ділиться: рядок, більший за бюджет, іде окремим блоком.
+    Потік читається ліниво - блок віддається, щойно наступний рядок у нього не влазить.
+
+    Args:
+        rows: Логічні рядки (рядок CSV, рядок тексту, картка товару)
+        to_text: Як рядок виглядатиме в промпті (для оцінки токенів)
+        output_tokens_per_row: Очікуваний розмір відповіді на один рядок (JSON-об'єкт)
+        base_tokens: Промпт без даних (інструкції, заголовки CSV)
+        input_budget: Максимум токенів на вході
+        output_budget: Максимум очікуваних токенів відповіді
+        report: Куди записати розміри блоків
+
+    Yields:
+        Списки вихідних рядків
+    """
+    chunk: List[Any] = []
+    chunk_tokens = base_tokens
+    for row in rows:
+        row_tokens = estimate_tokens(to_text(row)) + 1  # + перенос рядка
+        fits_input = chunk_tokens + row_tokens <= input_budget
+        fits_output = (len(chunk) + 1) * output_tokens_per_row <= output_budget
+        if chunk and not (fits_input and fits_output):
+            if report is not None:
+                report.add(len(chunk), chunk_tokens)
+            yield chunk
+            chunk, chunk_tokens = [], base_tokens
+        chunk.append(row)
+        chunk_tokens += row_tokens
+    if chunk:
+        if report is not None:
+            report.add(len(chunk), chunk_tokens)
+        yield chunk
+
+
+def text_rows(text: str) -> List[str]:
+    """
+    Логічні рядки вільного тексту (прайс, скопійований з месенджера чи листа).
+    Якщо товари відділені порожніми рядками і займають по кілька рядків - рядок = абзац,
+    інакше - кожен непорожній рядок.
+    """
+    blocks = [block.strip() for block in _BLANK_LINES.split(text) if block.strip()]
+    if len(blocks) > 1 and sum(block.count("\n") for block in blocks) >= len(blocks):
+        return [" / ".join(line.strip() for line in block.splitlines() if line.strip()) for block in blocks]
+    return [line.strip() for line in text.splitlines() if line.strip()]
@@ -2,6 +2,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.models import BatteriesSuppliers, SollarPanelsSuppliers, InvertersSuppliers
 from typing import Optional
+from helpers.suplier import get_cached_supplier_id, cache_supplier_id
 
 async def get_or_create_competitor(session: AsyncSession, suplier_name: str, product: str = "batteries") -> int:
 
@@ -19,11 +20,16 @@ async def get_or_create_competitor(session: AsyncSession, suplier_name: str, pro
     else:
         raise ValueError("Неверный тип продукта")
     
+    cached_id = get_cached_supplier_id(product, suplier_name_upper)
+    if cached_id is not None:
+        return cached_id
+    
     query = select(suplier_model).where(suplier_model.name == suplier_name_upper)
     result = await session.execute(query)
     suplier = result.scalar_one_or_none()
     
     if suplier:
+        cache_supplier_id(product, suplier_name_upper, suplier.id)
         return suplier.id
     
     new_suplier = suplier_model(name=suplier_name_upper, is_me=False, is_supplier=False, is_competitor=True)
@@ -71,4 +77,21 @@ async def get_competitors_name(func):
         return "Deye Ukraine"
 
 
-    
\ No newline at end of file
+# Хост сайту конкурента (для обмеження одночасних запитів до одного сайту)
+COMPETITOR_HOSTS = {
+    "parse_batteries_avto_zvuk": "avtozvuk.ua",
+    "parse_batteries_aku_lviv": "aku.lviv.ua",
+    "parse_batteries_makb": "makb.com.ua",
+    "parse_batteries_shyp_shuna": "shyp-shyna.com.ua",
+    "parse_batteries_aet_ua": "aet.ua",
+    "parse_batteries_akb_mag": "akbmag.com.ua",
+    "parse_batteries_akb_plus": "akb-plus.com",
+    "parse_batteries_dvi_klemy": "dviklemy.com.ua",
+    "parse_sollar_panels_friends_solar": "friendssolar.com.ua",
+    "parse_sollar_panels_solarflow": "solarflow.shop",
+    "parse_inverters_deye_ukraine": "www.deye-ukraine.com.ua",
+}
+
+
+def get_competitor_host(func) -> str:
+    return COMPETITOR_HOSTS.get(func.__name__, func.__name__)
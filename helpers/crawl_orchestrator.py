@@ -0,0 +1,285 @@
+import asyncio
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from helpers.competitors import get_competitors_name, get_competitor_host
+from helpers.crawl_state import INCREMENTAL_CRAWL, load_pages, load_site, save_pages, save_site
+from helpers.ingestion import PRODUCT_SCHEMAS, ingest_products
+from helpers.html_compact import track_site_stats
+from helpers.http_client import get_http_client
+
+load_dotenv()
+
+# Скільки сайтів конкурентів парсимо одночасно і скільки одночасних парсерів на один хост
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "4"))
+CRAWL_HOST_CONCURRENCY = int(os.getenv("CRAWL_HOST_CONCURRENCY", "1"))
+# Скільки завершених запусків тримати в пам'яті для перегляду прогресу
+MAX_FINISHED_RUNS = 20
+
+
+@dataclass
+class CompetitorProgress:
+    """
+    Прогрес одного конкурента: scraping -> parsing -> saving -> done/failed.
+    durations - тривалість кожного етапу в секундах.
+    html - байти HTML сторінок і компактного тексту, що пішов у LLM.
+    delta - скільки сторінок і карток товарів змінилось з минулого запуску (INCREMENTAL_CRAWL).
+    """
+    name: str
+    host: str
+    status: str = "pending"
+    pages: int = 0
+    rows: int = 0
+    durations: Dict[str, float] = field(default_factory=dict)
+    stats: Optional[Dict[str, Any]] = None
+    http: Optional[Dict[str, Any]] = None
+    html: Optional[Dict[str, Any]] = None
+    delta: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "host": self.host,
+            "status": self.status,
+            "pages": self.pages,
+            "rows": self.rows,
+            "durations": self.durations,
+            "stats": self.stats,
+            "http": self.http,
+            "html": self.html,
+            "delta": self.delta,
+            "error": self.error,
+        }
+
+
+@dataclass
+class CrawlRun:
+    run_id: str
+    product: str
+    started_at: datetime
+    competitors: Dict[str, CompetitorProgress]
+    finished_at: Optional[datetime] = None
+    elapsed: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "product": self.product,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "elapsed": self.elapsed,
+            "competitors": [progress.to_dict() for progress in self.competitors.values()],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика імпорту по конкурентах (у форматі, який повертали ендпоінти раніше)."""
+        return {
+            name: progress.stats if progress.error is None else {"error": progress.error}
+            for name, progress in self.competitors.items()
+        }
+
+
+_runs: Dict[str, CrawlRun] = {}
+_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+_crawl_semaphore: Optional[asyncio.Semaphore] = None
+_background_tasks = set()
+_loop = None
+
+
+def _check_loop() -> None:
+    # Семафори прив'язані до event loop (Celery/скрипти запускають свій loop)
+    global _loop, _crawl_semaphore
+    loop = asyncio.get_running_loop()
+    if _loop is not loop:
+        _host_semaphores.clear()
+        _crawl_semaphore = None
+        _loop = loop
+
+
+def _get_host_semaphore(host: str) -> asyncio.Semaphore:
+    _check_loop()
+    if host not in _host_semaphores:
+        _host_semaphores[host] = asyncio.Semaphore(CRAWL_HOST_CONCURRENCY)
+    return _host_semaphores[host]
+
+
+def _get_crawl_semaphore() -> asyncio.Semaphore:
+    global _crawl_semaphore
+    _check_loop()
+    if _crawl_semaphore is None:
+        _crawl_semaphore = asyncio.Semaphore(CRAWL_CONCURRENCY)
+    return _crawl_semaphore
+
+
+def get_run(run_id: str) -> Optional[CrawlRun]:
+    return _runs.get(run_id)
+
+
+def _forget_old_runs() -> None:
+    finished = sorted((run for run in _runs.values() if run.done), key=lambda run: run.finished_at)
+    for run in finished[:-MAX_FINISHED_RUNS]:
+        del _runs[run.run_id]
+
+
+def _metrics_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """HTTP-метрики хоста за цей запуск (клієнт рахує їх за весь час роботи процесу)."""
+    delta = {key: value - before.get(key, 0) for key, value in after.items() if key != "avg_ms"}
+    delta["avg_ms"] = after.get("avg_ms")
+    return delta
+
+
+async def _load_crawl_state(product: str, host: str):
+    """Стан попереднього запуску сайту; без нього (немає таблиць, збій бази) парсимо все."""
+    if not INCREMENTAL_CRAWL:
+        return None, None
+    try:
+        return await load_pages(host), await load_site(product, host)
+    except Exception as e:
+        print(f"⚠️ {host}: стан попереднього парсингу недоступний, парсимо все: {e}")
+        return None, None
+
+
+async def _run_competitor(
+    progress: CompetitorProgress,
+    scrape_func: Callable[[], Awaitable[List[Any]]],
+    product: str,
+    ai_parser: Callable[[List[Any]], Awaitable[List[Dict]]],
+    ai_filter: Callable[[List[Dict]], List[Dict]],
+) -> None:
+    stage_started = time.perf_counter()
+    try:
+        # Сайти обмежуються семафорами лише на етапі завантаження,
+        # тож поки один конкурент іде через LLM і базу, інші вже завантажуються
+        async with _get_crawl_semaphore(), _get_host_semaphore(progress.host):
+            progress.status = "scraping"
+            stage_started = time.perf_counter()
+            previous_pages, site_delta = await _load_crawl_state(product, progress.host)
+            client = get_http_client()
+            if previous_pages is not None:
+                # Умовні запити з валідаторами минулого запуску: незмінені сторінки - 304 без тіла
+                client.preload(previous_pages)
+                client.track_pages(progress.host)
+            http_before = client.metrics().get(progress.host, {})
+            try:
+                pages = await scrape_func()
+            finally:
+                crawled_pages = client.pop_pages(progress.host)
+            progress.durations["scraping"] = round(time.perf_counter() - stage_started, 2)
+            progress.http = _metrics_delta(http_before, client.metrics().get(progress.host, {}))
+        progress.pages = len(pages or [])
+
+        progress.status = "parsing"
+        stage_started = time.perf_counter()
+        # Кожен конкурент виконується у своїй задачі, тож облік не змішується між сайтами.
+        # Інкрементальний режим: в AI (і далі в історію цін) йдуть лише нові та змінені картки
+        html_stats = track_site_stats(site_delta.filter_rows if site_delta is not None else None)
+        data = await ai_parser(pages) if pages else []
+        if html_stats["html_bytes"]:
+            html_stats["reduction"] = round(1 - html_stats["text_bytes"] / html_stats["html_bytes"], 3)
+            progress.html = html_stats
+        # Фільтр синхронний - в потоці; запити всіх фільтрів проходять через спільний ліміт LLMScheduler
+        data = await asyncio.to_thread(ai_filter, data) if data else []
+        progress.durations["parsing"] = round(time.perf_counter() - stage_started, 2)
+        progress.rows = len(data)
+
+        progress.status = "saving"
+        stage_started = time.perf_counter()
+        progress.stats = await ingest_products(data, product, progress.name, "competitor")
+        if site_delta is not None:
+            # Стан пишеться лише після успішного імпорту і лише для карток, чиї товари імпортовані -
+            # інакше картки загубились би до наступної зміни
+            await asyncio.to_thread(site_delta.match_parsed, data)
+            await save_site(site_delta, progress.name, PRODUCT_SCHEMAS[product].current_model)
+            progress.delta = {
+                "pages": await save_pages(progress.host, crawled_pages, previous_pages),
+                "items": site_delta.summary(),
+            }
+        progress.durations["saving"] = round(time.perf_counter() - stage_started, 2)
+
+        progress.status = "done"
+        html_note = f", HTML -{progress.html['reduction']:.0%}" if progress.html else ""
+        if progress.delta:
+            items = progress.delta["items"]
+            html_note += f", змінено карток {items['changed']}/{items['items']}"
+        print(f"✅ {progress.name}: {progress.rows} товарів, етапи {progress.durations}{html_note}")
+    except Exception as e:
+        stage = progress.status
+        progress.durations[stage] = round(time.perf_counter() - stage_started, 2)
+        progress.status = "failed"
+        progress.error = f"{stage}: {e}"
+        print(f"❌ {progress.name}: помилка на етапі {stage}: {e}")
+
+
+async def create_run(product: str, scrape_funcs: List[Callable]) -> CrawlRun:
+    """Реєструє запуск (щоб прогрес був доступний ще до старту парсерів)."""
+    competitors = {}
+    for func in scrape_funcs:
+        name = await get_competitors_name(func) or func.__name__
+        competitors[name] = CompetitorProgress(name=name, host=get_competitor_host(func))
+
+    run = CrawlRun(run_id=uuid.uuid4().hex, product=product, started_at=datetime.now(), competitors=competitors)
+    _runs[run.run_id] = run
+    _forget_old_runs()
+    return run
+
+
+async def execute_run(
+    run: CrawlRun,
+    scrape_funcs: List[Callable],
+    ai_parser: Callable[[List[Any]], Awaitable[List[Dict]]],
+    ai_filter: Callable[[List[Dict]], List[Dict]],
+) -> CrawlRun:
+    """
+    Паралельно проганяє всіх конкурентів через завантаження -> AI парсер -> фільтр -> базу.
+    Помилка одного конкурента не зупиняє інших.
+    """
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        _run_competitor(progress, func, run.product, ai_parser, ai_filter)
+        for progress, func in zip(run.competitors.values(), scrape_funcs)
+    ])
+    run.elapsed = round(time.perf_counter() - started, 2)
+    run.finished_at = datetime.now()
+    print(f"🏁 Парсинг конкурентів ({run.product}) завершено за {run.elapsed} сек.")
+    return run
+
+
+async def run_competitors(
+    product: str,
+    scrape_funcs: List[Callable],
+    ai_parser: Callable[[List[Any]], Awaitable[List[Dict]]],
+    ai_filter: Callable[[List[Dict]], List[Dict]],
+    background: bool = False,
+) -> CrawlRun:
+    """
+    Запускає парсинг конкурентів продукту.
+
+    Args:
+        product: "batteries", "sollar_panels" або "inverters"
+        scrape_funcs: Асинхронні парсери сайтів конкурентів
+        ai_parser: AI парсер сторінок продукту
+        ai_filter: Фільтр/нормалізація результатів AI парсера
+        background: Не чекати завершення (прогрес - через get_run)
+
+    Returns:
+        Запуск з прогресом по кожному конкуренту
+    """
+    run = await create_run(product, scrape_funcs)
+    if background:
+        task = asyncio.create_task(execute_run(run, scrape_funcs, ai_parser, ai_filter))
+        # Тримаємо посилання, інакше задачу може прибрати збирач сміття
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+        return run
+    return await execute_run(run, scrape_funcs, ai_parser, ai_filter)
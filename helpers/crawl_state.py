@@ -0,0 +1,214 @@
+import hashlib
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import case, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from db.database import SessionLocal
+from db.models import CrawlItems, CrawlPages
+from helpers.competitors import get_or_create_competitor
+
+load_dotenv()
+
+# Інкрементальний парсинг конкурентів: 0 - кожен запуск парсить і записує все
+INCREMENTAL_CRAWL = os.getenv("INCREMENTAL_CRAWL", "1") == "1"
+# Незмінений товар однаково йде в AI раз на стільки днів (оновлює поточну таблицю й історію)
+CRAWL_FULL_REFRESH_DAYS = int(os.getenv("CRAWL_FULL_REFRESH_DAYS", "7"))
+# Рядків в одному INSERT/UPDATE (ліміт параметрів asyncpg - 32767)
+STATE_BATCH_SIZE = 1000
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def item_hash(product: str, row: str) -> str:
+    """Хеш нормалізованого тексту картки товару (регістр і пробіли не впливають)."""
+    return hashlib.sha1(f"{product}\0{_normalize(row)}".encode("utf-8")).hexdigest()
+
+
+class SiteDelta:
+    """
+    Зміни товарів одного сайту за запуск: які картки вже розпарсені раніше (known),
+    які зустрілись у цьому запуску (seen), які з них нові або змінені (changed)
+    і які з змінених дійшли до імпорту (names - full_name товарів картки).
+    """
+
+    def __init__(self, product: str, host: str, known: Set[str]):
+        self.product = product
+        self.host = host
+        self.known = known
+        self.seen: Set[str] = set()
+        self.changed: Set[str] = set()
+        self.rows: Dict[str, str] = {}
+        self.names: Dict[str, List[str]] = {}
+
+    def filter_rows(self, rows: List[str]) -> List[str]:
+        """Лишає для AI лише нові/змінені картки (дублікати в межах запуску - один раз)."""
+        result = []
+        for row in rows:
+            key = item_hash(self.product, row)
+            if key in self.seen:
+                continue
+            self.seen.add(key)
+            if key not in self.known:
+                self.changed.add(key)
+                self.rows[key] = _normalize(row)
+                result.append(row)
+        return result
+
+    def match_parsed(self, data: List[Dict[str, Any]]) -> None:
+        """
+        Прив'язує імпортовані записи до змінених карток: full_name товару є в тексті картки.
+        Картки без записів (невдалий блок LLM, відкинуті фільтром) розпарсеними не вважаються
+        і наступного запуску йдуть в AI знову.
+        """
+        names = {_normalize(str(entry.get("full_name") or "")): entry.get("full_name") for entry in data}
+        names.pop("", None)
+        for key, text in self.rows.items():
+            matched = [full_name for normalized, full_name in names.items() if normalized in text]
+            if matched:
+                self.names[key] = matched
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "items": len(self.seen),
+            "changed": len(self.changed),
+            "unchanged": len(self.seen) - len(self.changed),
+            "parsed": len(self.names),
+        }
+
+
+async def load_site(product: str, host: str) -> SiteDelta:
+    """Картки сайту, розпарсені за останні CRAWL_FULL_REFRESH_DAYS днів (з відомими товарами)."""
+    since = datetime.utcnow() - timedelta(days=CRAWL_FULL_REFRESH_DAYS)
+    async with SessionLocal() as session:
+        result = await session.execute(
+            select(CrawlItems.content_hash).where(
+                CrawlItems.product == product,
+                CrawlItems.host == host,
+                CrawlItems.parsed_at >= since,
+                CrawlItems.full_names.isnot(None),
+            )
+        )
+        return SiteDelta(product, host, set(result.scalars().all()))
+
+
+async def save_site(delta: SiteDelta, supplier_name: str, current_model) -> None:
+    """
+    Записує стан карток після успішного імпорту (після SiteDelta.match_parsed):
+    імпортовані змінені - parsed_at = зараз, незмінені - last_seen, а їхнім товарам
+    у поточній таблиці - updated_at (імпорт їх пропустив, але товар досі в продажу).
+    """
+    now = datetime.utcnow()
+    parsed = sorted(delta.names)
+    unchanged = sorted(delta.seen - delta.changed)
+    async with SessionLocal() as session:
+        for i in range(0, len(parsed), STATE_BATCH_SIZE):
+            stmt = pg_insert(CrawlItems).values([
+                {
+                    "product": delta.product,
+                    "host": delta.host,
+                    "content_hash": key,
+                    "full_names": delta.names[key],
+                    "last_seen": now,
+                    "parsed_at": now,
+                }
+                for key in parsed[i:i + STATE_BATCH_SIZE]
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["product", "host", "content_hash"],
+                set_={
+                    "full_names": stmt.excluded.full_names,
+                    "last_seen": stmt.excluded.last_seen,
+                    "parsed_at": stmt.excluded.parsed_at,
+                },
+            )
+            await session.execute(stmt)
+
+        full_names: Set[str] = set()
+        for i in range(0, len(unchanged), STATE_BATCH_SIZE):
+            result = await session.execute(
+                update(CrawlItems)
+                .where(
+                    CrawlItems.product == delta.product,
+                    CrawlItems.host == delta.host,
+                    CrawlItems.content_hash.in_(unchanged[i:i + STATE_BATCH_SIZE]),
+                )
+                .values(last_seen=now)
+                .returning(CrawlItems.full_names)
+            )
+            full_names.update(name for names in result.scalars() for name in names or ())
+
+        if full_names:
+            supplier_id = await get_or_create_competitor(session, supplier_name, delta.product)
+            names = sorted(full_names)
+            for i in range(0, len(names), STATE_BATCH_SIZE):
+                await session.execute(
+                    update(current_model)
+                    .where(current_model.supplier_id == supplier_id, current_model.full_name.in_(names[i:i + STATE_BATCH_SIZE]))
+                    .values(updated_at=now)
+                )
+        await session.commit()
+
+
+async def load_pages(host: str) -> Dict[str, Tuple[Optional[str], Optional[str], str]]:
+    """Валідатори сторінок хоста для HttpClient.preload: url -> (etag, last_modified, хеш вмісту)."""
+    async with SessionLocal() as session:
+        result = await session.execute(
+            select(CrawlPages.url, CrawlPages.etag, CrawlPages.last_modified, CrawlPages.content_hash)
+            .where(CrawlPages.host == host)
+        )
+        return {url: (etag, last_modified, content_hash) for url, etag, last_modified, content_hash in result.all()}
+
+
+async def save_pages(
+    host: str,
+    pages: Dict[str, Tuple[str, Optional[str], Optional[str]]],
+    previous: Dict[str, Tuple[Optional[str], Optional[str], str]],
+) -> Dict[str, int]:
+    """
+    Записує сторінки, завантажені за запуск (HttpClient.pop_pages).
+    changed_at оновлюється лише для сторінок, чий вміст змінився.
+
+    Returns:
+        Кількість сторінок: усього, змінених (або нових), незмінених
+    """
+    now = datetime.utcnow()
+    urls = sorted(pages)
+    async with SessionLocal() as session:
+        for i in range(0, len(urls), STATE_BATCH_SIZE):
+            stmt = pg_insert(CrawlPages).values([
+                {
+                    "host": host,
+                    "url": url,
+                    "content_hash": pages[url][0],
+                    "etag": pages[url][1],
+                    "last_modified": pages[url][2],
+                    "last_seen": now,
+                    "changed_at": now,
+                }
+                for url in urls[i:i + STATE_BATCH_SIZE]
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["url"],
+                set_={
+                    "host": stmt.excluded.host,
+                    "content_hash": stmt.excluded.content_hash,
+                    "etag": stmt.excluded.etag,
+                    "last_modified": stmt.excluded.last_modified,
+                    "last_seen": stmt.excluded.last_seen,
+                    "changed_at": case(
+                        (CrawlPages.content_hash == stmt.excluded.content_hash, CrawlPages.changed_at),
+                        else_=stmt.excluded.changed_at,
+                    ),
+                },
+            )
+            await session.execute(stmt)
+        await session.commit()
+
+    unchanged = sum(1 for url, page in pages.items() if url in previous and previous[url][2] == page[0])
+    return {"pages": len(pages), "changed": len(pages) - unchanged, "unchanged": unchanged}
@@ -1,25 +1,40 @@
 import pandas as pd
+import hashlib
 import os
 import re
-# import textract
-import PyPDF2
-from docx import Document
 import logging
-import tempfile
+import csv
+import io
 import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 from zipfile import ZipFile, BadZipFile
-import csv
+import xml.etree.ElementTree as ET
+from docx import Document
 import openpyxl
 import xlrd
-import subprocess
 import pdfplumber
+from pdfminer.pdftypes import resolve1
 import google.generativeai as genai
 from PIL import Image
-import base64
-import io
 from dotenv import load_dotenv
 import requests
 
+from helpers.extract_pool import (
+    crop_image_tile,
+    extract_pdf_pages,
+    image_tile_boxes,
+    map_ordered,
+    pdf_page_tasks,
+)
+from helpers.disk_cache import DiskCache
+from helpers.llm_cache import generate_cached
+
 load_dotenv()
 # import win32com.client
 
@@ -30,14 +45,100 @@ logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def convert_to_csv(input_path, output_path=None):
+Row = Tuple[str, ...]
+# Шлях до файлу, посилання на Google Docs, вміст файлу або відкритий бінарний файл (наприклад, UploadFile.file)
+Source = Union[str, bytes, BinaryIO]
+# Кеш тексту сторінок PDF (за хешем вмісту сторінки); версію змінювати при зміні розбору сторінки
+PDF_PAGE_CACHE_DIR = os.getenv('PDF_PAGE_CACHE_DIR', '.pdf_cache')
+PDF_PAGE_CACHE_TTL = int(os.getenv('PDF_PAGE_CACHE_TTL', str(30 * 24 * 3600)))
+PDF_PAGE_CACHE_MAX_BYTES = int(os.getenv('PDF_PAGE_CACHE_MAX_MB', '200')) * 1024 * 1024
+PDF_EXTRACT_VERSION = 'pdfplumber-text-v1'
+# Скільки смуг зображення одночасно відправляти в Gemini
+IMAGE_TILE_CONCURRENCY = int(os.getenv('IMAGE_TILE_CONCURRENCY', '4'))
+IMAGE_PROMPT_VERSION = 'image-csv-v1'
+IMAGE_PROMPT = """
+Проаналізуй це зображення і витягни інформацію про акумулятори або інші товари.
+Для кожного товару визнач наступні характеристики (якщо вони є на зображенні):
+- Назва товару
+- Бренд
+- Ціна
+- Ємність (Ah)
+- Пусковий струм (A)
+- Полярність (наприклад, R+, L+)
+- Регіон виробництва (EUROPE, ASIA)
+- Тип електроліту (AGM, EFB, GEL, LAB)
+
+Поверни результат у форматі CSV без заголовків, де кожен рядок - це окремий товар.
+Кожен рядок повинен містити всі вищезазначені характеристики, розділені комами.
+Якщо якась характеристика відсутня, залиш порожнє місце між комами.
+
+Приклад формату:
+Varta Blue Dynamic, VARTA, 3200, 60, 540, R+, EUROPE, LAB
+"""
+# Вкладений antiword (таблиці кодувань; antiword.exe - для Windows)
+ANTIWORD_HOME = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'antiword')
+
+
+def iter_rows(source: Source, file_name: Optional[str] = None) -> Iterator[Row]:
+    """
+    Потоково читає прайс (.xlsx, .xls, .docx, .doc, .pdf, .csv, зображення, Google Docs) і повертає рядки таблиці.
+    Файл не копіюється на диск і не конвертується в проміжний CSV: рядки віддаються
+    по одному, тож великий прайс читається в майже сталій пам'яті.
+    Формат визначається за вмістом файлу (sniff_format), конвертер - за реєстром CONVERTERS.
+
+    Args:
+        source: Шлях до файлу, посилання на Google Docs, bytes або бінарний файловий об'єкт
+        file_name: Ім'я файлу (підказка для форматів, які не розрізнити за вмістом)
+
+    Yields:
+        Кортежі рядків без порожніх рядків і порожніх комірок у кінці
+
+    Raises:
+        ValueError: Якщо формат файлу не підтримується
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    fmt = sniff_format(source, file_name)
+    converters = get_converters(fmt)
+    if not converters:
+        raise ValueError(f"Формат {fmt} не підтримується: немає доступного конвертера")
+
+    for row in _iter_with_fallback(source, converters):
+        row = _normalize_row(row)
+        if row:
+            yield row
+
+
+def iter_chunks(rows: Iterable[Sequence[str]], size: int) -> Iterator[List[Sequence[str]]]:
+    """Ділить потік рядків на блоки по size, не читаючи весь потік у пам'ять."""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+_pdf_page_cache: Optional[DiskCache] = None
+
+
+def _get_pdf_page_cache() -> DiskCache:
+    global _pdf_page_cache
+    if _pdf_page_cache is None:
+        _pdf_page_cache = DiskCache(PDF_PAGE_CACHE_DIR, PDF_PAGE_CACHE_TTL, PDF_PAGE_CACHE_MAX_BYTES)
+    return _pdf_page_cache
+
+
+def convert_to_csv(input_path, output_path=None, file_name=None):
     """
     Конвертує файли різних форматів (.docx, .doc, .xls, .xlsx, pdf) у CSV формат.
     
     Args:
-        input_path: Шлях до вхідного файлу
+        input_path: Шлях до вхідного файлу, посилання на Google Docs або бінарний файловий об'єкт
         output_path: Шлях до вихідного CSV файлу. Якщо не вказано, 
                      буде створено файл з тим самим ім'ям, але з розширенням .csv
+                     (для файлового об'єкта - тимчасовий файл .csv)
+        file_name: Ім'я файлу, якщо input_path - файловий об'єкт
     
     Returns:
         Шлях до створеного CSV файлу
@@ -45,232 +146,269 @@ def convert_to_csv(input_path, output_path=None):
     Raises:
         ValueError: Якщо формат файлу не підтримується
     """
-    ext = os.path.splitext(input_path)[-1].lower()
-
-    if input_path.startswith('https://docs.google'):
+    if isinstance(input_path, str) and input_path.startswith('https://docs.google'):
         output_path = 'google.csv'
 
-    if output_path is None:
+    if output_path is None and isinstance(input_path, str):
         output_path = os.path.splitext(input_path)[0] + '.csv'
+    elif output_path is None:
+        # Ім'я завантаження задає клієнт - у шлях воно не потрапляє, CSV пишеться в /tmp
+        with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as tmp:
+            output_path = tmp.name
     
-    logger.info(f"Конвертація файлу {input_path} у формат CSV: {output_path}")
+    logger.info(f"Конвертація файлу {file_name or input_path} у формат CSV: {output_path}")
 
     try:
-        if ext in ['.xlsx', '.xls']:
-            _convert_excel_to_csv(input_path, output_path, ext)
-        elif ext == '.docx':
-            _convert_docx_to_csv(input_path, output_path)
-        elif ext == '.doc':
-            # convert_doc_to_csv(input_path, output_path)
-            raise ValueError(f"Формат {ext} не підтримується!")
-        elif ext == '.pdf':
-            _convert_pdf_to_csv(input_path, output_path)
-        elif ext == '.png' or ext == '.jpg' or ext == '.jpeg':
-            _convert_image_to_csv(input_path, output_path)
-        elif input_path.startswith('https://docs.google'):
-            _convert_google_to_csv(input_path, output_path)
-        else:
-            raise ValueError(f"Формат {ext} не підтримується!")
+        count = 0
+        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            for row in iter_rows(input_path, file_name):
+                writer.writerow(row)
+                count += 1
         
-        logger.info(f"Конвертація завершена успішно. Створено файл: {output_path}")
+        logger.info(f"Конвертація завершена успішно. Створено файл: {output_path} ({count} рядків)")
         return output_path
     except Exception as e:
-        logger.error(f"Помилка при конвертації файлу {input_path}: {str(e)}")
+        logger.error(f"Помилка при конвертації файлу {file_name or input_path}: {str(e)}")
         raise
 
-def _convert_excel_to_csv(input_path, output_path, ext):
+
+def _normalize_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return ""
+        # 1200.0 -> "1200", як у прайсі
+        return str(int(value)) if value.is_integer() else str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value).strip()
+
+
+def _normalize_row(values: Iterable) -> Row:
+    row = [_normalize_cell(value) for value in values]
+    # openpyxl у read_only часто повертає десятки порожніх колонок у кінці рядка
+    while row and not row[-1]:
+        row.pop()
+    return tuple(row)
+
+
+def _open_binary(source):
+    """Відкриває шлях для читання; файлові об'єкти повертаються з початку."""
+    if isinstance(source, str):
+        return open(source, 'rb')
+    source.seek(0)
+    return _NoClose(source)
+
+
+class _NoClose:
+    """Обгортка, щоб `with` не закривав чужий файловий об'єкт (наприклад, UploadFile.file)."""
+
+    def __init__(self, file):
+        self.file = file
+
+    def __enter__(self):
+        return self.file
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _iter_with_fallback(source, converters: List["Converter"]) -> Iterator[Sequence]:
     """
-    Конвертує Excel файли (.xlsx, .xls) у CSV формат з використанням різних методів.
-    Спробує кілька підходів, якщо один з них не спрацює.
-    
-    Args:
-        input_path: Шлях до вхідного Excel файлу
-        output_path: Шлях до вихідного CSV файлу
-        ext: Розширення файлу (.xlsx або .xls)
+    Читає файл першим конвертером, що спрацював.
+    Перехід на наступний конвертер можливий лише до першого рядка - інакше рядки б задублювались.
     """
-    methods = [
-        _convert_excel_pandas,
-        _convert_excel_openpyxl if ext == '.xlsx' else _convert_excel_xlrd,
-        _convert_excel_manual
-    ]
-    
     last_error = None
-    for method in methods:
+    for converter in converters:
+        logger.info(f"Спроба читання файлу конвертером {converter.name}")
+        started = False
         try:
-            logger.info(f"Спроба конвертації Excel файлу методом {method.__name__}")
-            method(input_path, output_path)
-            logger.info(f"Конвертація успішна методом {method.__name__}")
+            for row in converter.read(source):
+                started = True
+                yield row
+            logger.info(f"Читання успішне конвертером {converter.name}")
             return
         except Exception as e:
-            logger.warning(f"Метод {method.__name__} не спрацював: {str(e)}")
+            if started:
+                raise
+            logger.warning(f"Конвертер {converter.name} не спрацював: {str(e)}")
             last_error = e
-    
-    # Якщо жоден метод не спрацював
-    raise Exception(f"Не вдалося конвертувати Excel файл. Остання помилка: {str(last_error)}")
-
-def _convert_excel_pandas(input_path, output_path):
-    """Конвертація Excel файлу за допомогою pandas"""
-    df = pd.read_excel(input_path, engine='openpyxl' if input_path.endswith('.xlsx') else 'xlrd')
-    df.to_csv(output_path, index=False, encoding='utf-8')
-
-def _convert_excel_openpyxl(input_path, output_path):
-    """Конвертація XLSX файлу за допомогою openpyxl"""
-    wb = openpyxl.load_workbook(input_path, read_only=True, data_only=True)
-    sheet = wb.active
-    
-    with open(output_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        for row in sheet.rows:
-            writer.writerow([cell.value for cell in row])
-
-def _convert_excel_xlrd(input_path, output_path):
-    """Конвертація XLS файлу за допомогою xlrd"""
-    book = xlrd.open_workbook(input_path)
-    sheet = book.sheet_by_index(0)
-    
-    with open(output_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
+
+    # Якщо жоден конвертер не спрацював
+    raise Exception(f"Не вдалося конвертувати файл. Остання помилка: {str(last_error)}")
+
+
+def _iter_excel_pandas(source) -> Iterator[Sequence]:
+    """Читання Excel через pandas (лист завантажується в пам'ять цілком)"""
+    with _open_binary(source) as f:
+        df = pd.read_excel(f, header=None, dtype=object)
+    for row in df.itertuples(index=False, name=None):
+        yield row
+
+
+def _iter_csv_rows(source) -> Iterator[List[str]]:
+    """Читання CSV (наприклад, збереженого експорту Google Sheets)"""
+    with _open_binary(source) as f:
+        text = io.TextIOWrapper(f, encoding='utf-8-sig', errors='replace', newline='')
+        try:
+            yield from csv.reader(text)
+        finally:
+            # Не закриваємо чужий файловий об'єкт разом з обгорткою
+            text.detach()
+
+
+def _iter_xlsx_openpyxl(source) -> Iterator[Sequence]:
+    """Читання XLSX через openpyxl у режимі read_only (лист не завантажується цілком)"""
+    with _open_binary(source) as f:
+        wb = openpyxl.load_workbook(f, read_only=True, data_only=True)
+        try:
+            yield from wb.active.iter_rows(values_only=True)
+        finally:
+            wb.close()
+
+
+def _iter_xls_xlrd(source) -> Iterator[Sequence]:
+    """Читання XLS через xlrd (старий бінарний формат читається лише цілком)"""
+    with _open_binary(source) as f:
+        book = xlrd.open_workbook(file_contents=f.read(), on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
         for row_idx in range(sheet.nrows):
-            writer.writerow([sheet.cell_value(row_idx, col_idx) for col_idx in range(sheet.ncols)])
+            yield sheet.row_values(row_idx)
+    finally:
+        book.release_resources()
+
+
+_CELL_COLUMN = re.compile(r'([A-Z]+)')
 
-def _convert_excel_manual(input_path, output_path):
+
+def _column_index(ref: Optional[str]) -> Optional[int]:
+    match = _CELL_COLUMN.match(ref or '')
+    if not match:
+        return None
+    index = 0
+    for char in match.group(1):
+        index = index * 26 + ord(char) - ord('A') + 1
+    return index - 1
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def _active_worksheet(zf: ZipFile, file_list: List[str]) -> str:
+    """Шлях до XML активного листа (той самий лист, що й wb.active в openpyxl)"""
+    try:
+        workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+        rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+        active = 0
+        sheet_ids = []
+        for elem in workbook.iter():
+            name = _local_name(elem.tag)
+            if name == 'workbookView':
+                active = int(elem.get('activeTab', 0))
+            elif name == 'sheet':
+                sheet_ids.append(next(v for k, v in elem.attrib.items() if _local_name(k) == 'id'))
+        targets = {rel.get('Id'): rel.get('Target') for rel in rels}
+        target = targets[sheet_ids[active]]
+        # Target буває відносним до xl/ або абсолютним (/xl/worksheets/...)
+        path = target.lstrip('/') if target.startswith('/') else 'xl/' + target
+        if path in file_list:
+            return path
+    except Exception as e:
+        logger.warning(f"Не вдалося визначити активний лист: {str(e)}")
+
+    # Шукаємо файли worksheet, беремо перший лист (sheet2 раніше за sheet10)
+    worksheet_files = [name for name in file_list if re.match(r'xl/worksheets/sheet\d+\.xml$', name)]
+    if not worksheet_files:
+        raise ValueError("Не знайдено файлів worksheet в архіві")
+    return min(worksheet_files, key=lambda name: int(re.search(r'(\d+)\.xml$', name).group(1)))
+
+
+def _iter_xlsx_manual(source) -> Iterator[List[str]]:
     """
-    Ручна конвертація Excel файлу шляхом розпакування XLSX як ZIP архіву.
-    Цей метод використовується як запасний варіант, якщо інші методи не спрацювали.
+    Ручне читання XLSX як ZIP архіву: XML листа розбирається потоково (iterparse),
+    оброблені рядки одразу звільняються. Без стилів, тож дати лишаються числами Excel,
+    зате зазвичай швидше за openpyxl і читає файли з пошкодженими стилями.
     """
-    # Створюємо тимчасову копію файлу
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(input_path)[1]) as tmp:
-        shutil.copy2(input_path, tmp.name)
-        tmp_path = tmp.name
-    
-    try:
-        # Спроба розпакувати XLSX як ZIP архів
-        with ZipFile(tmp_path) as zf:
-            # Виводимо вміст архіву для діагностики
-            file_list = zf.namelist()
-            logger.info(f"Вміст архіву: {', '.join(file_list[:10])}...")
-            
-            # Шукаємо файли worksheet
-            worksheet_files = [f for f in file_list if f.startswith('xl/worksheets/sheet')]
-            if not worksheet_files:
-                raise ValueError("Не знайдено файлів worksheet в архіві")
-            
-            # Беремо перший лист
-            worksheet_file = worksheet_files[0]
-            
-            # Витягуємо дані з листа
-            import xml.etree.ElementTree as ET
-            
-            # Читаємо XML файл worksheet
-            ws_xml = zf.read(worksheet_file)
-            ws_root = ET.fromstring(ws_xml)
-            
-            # Знаходимо всі рядки
-            rows = ws_root.findall('.//{*}row')
-            logger.info(f"Знайдено {len(rows)} рядків у worksheet")
-            
-            # Словник для зберігання shared strings, якщо вони є
-            shared_strings = []
-            
-            # Спробуємо знайти shared strings (з урахуванням регістру)
-            shared_strings_path = None
-            for path in file_list:
-                if path.lower() == 'xl/sharedstrings.xml' or path.lower() == 'xl/sharedstrings.xml':
-                    shared_strings_path = path
-                    break
-            
-            if shared_strings_path:
-                try:
-                    logger.info(f"Читання shared strings з {shared_strings_path}")
-                    ss_xml = zf.read(shared_strings_path)
-                    ss_root = ET.fromstring(ss_xml)
-                    
-                    # Знаходимо всі елементи si/t
-                    for si in ss_root.findall('.//{*}si'):
-                        texts = []
-                        for t in si.findall('.//{*}t'):
-                            if t.text:
-                                texts.append(t.text)
-                        shared_strings.append(''.join(texts))
-                    
-                    logger.info(f"Прочитано {len(shared_strings)} shared strings")
-                except Exception as e:
-                    logger.warning(f"Помилка при читанні shared strings: {str(e)}")
-            
-            # Відкриваємо CSV файл для запису
-            with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                
-                # Обробляємо кожен рядок
-                for row in rows:
-                    csv_row = []
-                    
-                    # Знаходимо всі комірки в рядку
-                    cells = row.findall('.//{*}c')
-                    
-                    for cell in cells:
-                        # Отримуємо значення комірки
-                        value = None
-                        v_element = cell.find('.//{*}v')
-                        
-                        if v_element is not None and v_element.text:
-                            # Перевіряємо тип комірки
-                            cell_type = cell.get('t')
-                            
-                            if cell_type == 's' and shared_strings:
+    with _open_binary(source) as f, ZipFile(f) as zf:
+        file_list = zf.namelist()
+        logger.info(f"Вміст архіву: {', '.join(file_list[:10])}...")
+
+        worksheet_file = _active_worksheet(zf, file_list)
+
+        # Shared strings потрібні для всіх рядків, тож їх тримаємо в пам'яті
+        shared_strings = []
+        shared_strings_path = next((name for name in file_list if name.lower() == 'xl/sharedstrings.xml'), None)
+        if shared_strings_path:
+            try:
+                with zf.open(shared_strings_path) as ss:
+                    for _, elem in ET.iterparse(ss):
+                        if _local_name(elem.tag) == 'si':
+                            shared_strings.append(''.join(
+                                t.text or '' for t in elem.iter() if _local_name(t.tag) == 't'
+                            ))
+                            elem.clear()
+                logger.info(f"Прочитано {len(shared_strings)} shared strings")
+            except Exception as e:
+                logger.warning(f"Помилка при читанні shared strings: {str(e)}")
+
+        count = 0
+        with zf.open(worksheet_file) as ws:
+            for _, elem in ET.iterparse(ws):
+                if _local_name(elem.tag) != 'row':
+                    continue
+
+                row = []
+                for cell in elem:
+                    if _local_name(cell.tag) != 'c':
+                        continue
+                    # Порожні комірки в XML пропускаються - відновлюємо позицію за адресою (C5 -> 2)
+                    column = _column_index(cell.get('r'))
+                    if column is not None and column > len(row):
+                        row.extend([""] * (column - len(row)))
+
+                    value = ""
+                    cell_type = cell.get('t')
+                    for child in cell:
+                        name = _local_name(child.tag)
+                        if name == 'v' and child.text:
+                            value = child.text
+                            if cell_type == 's':
                                 # Це індекс у shared strings
                                 try:
-                                    idx = int(v_element.text)
-                                    if idx < len(shared_strings):
-                                        value = shared_strings[idx]
-                                    else:
-                                        value = v_element.text
+                                    value = shared_strings[int(child.text)]
                                 except (ValueError, IndexError):
-                                    value = v_element.text
-                            else:
-                                # Звичайне значення
-                                value = v_element.text
-                        
-                        csv_row.append(value if value is not None else "")
-                    
-                    # Записуємо рядок у CSV
-                    writer.writerow(csv_row)
-                
-                logger.info(f"Записано {len(rows)} рядків у CSV файл")
-    except Exception as e:
-        logger.error(f"Помилка при ручній конвертації Excel файлу: {str(e)}")
-        # Створюємо базовий CSV, щоб не повернути порожній файл
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(["Помилка при конвертації"])
-            writer.writerow([str(e)])
-    finally:
-        # Видаляємо тимчасовий файл
-        try:
-            os.unlink(tmp_path)
-        except Exception as e:
-            logger.warning(f"Не вдалося видалити тимчасовий файл: {str(e)}")
+                                    pass
+                        elif name == 'is':
+                            value = ''.join(t.text or '' for t in child.iter() if _local_name(t.tag) == 't')
+                    row.append(value)
+
+                elem.clear()
+                count += 1
+                yield row
+
+        logger.info(f"Прочитано {count} рядків з worksheet")
+
+
+def _iter_docx_rows(source) -> Iterator[List[str]]:
+    """Рядки таблиць DOCX, а якщо таблиць немає - непорожні параграфи"""
+    with _open_binary(source) as f:
+        doc = Document(f)
 
-def _convert_docx_to_csv(input_path, output_path):
-    """Конвертує DOCX файл у CSV формат"""
-    doc = Document(input_path)
-    
     # Спочатку перевіряємо наявність таблиць
     if doc.tables:
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            for table in doc.tables:
-                for row in table.rows:
-                    writer.writerow([cell.text.strip() for cell in row.cells])
+        for table in doc.tables:
+            for row in table.rows:
+                yield [cell.text.strip() for cell in row.cells]
     else:
-        # Якщо таблиць немає, записуємо текст параграфів
-        text = '\n'.join([para.text for para in doc.paragraphs if para.text.strip()])
-        with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(["Text"])
-            for line in text.split('\n'):
-                if line.strip():
-                    writer.writerow([line.strip()])
+        # Якщо таблиць немає, повертаємо текст параграфів
+        yield ["Text"]
+        for para in doc.paragraphs:
+            if para.text.strip():
+                yield [para.text.strip()]
 
 # def convert_doc_to_csv(input_path, output_path):
 #     """Зчитує таблиці з .doc (або .docx) і експортує у CSV"""
@@ -308,154 +446,358 @@ def _convert_docx_to_csv(input_path, output_path):
 #         doc.Close(False)
 #         word.Quit()
 
-def _convert_pdf_to_csv(input_path, output_path):
-    all_rows = []
+def _antiword_path() -> Optional[str]:
+    """antiword з ANTIWORD_PATH, з PATH або вкладений у репозиторій antiword.exe (Windows)"""
+    path = os.getenv('ANTIWORD_PATH') or shutil.which('antiword')
+    if path:
+        return path
+    if os.name == 'nt' and os.path.exists(os.path.join(ANTIWORD_HOME, 'antiword.exe')):
+        return os.path.join(ANTIWORD_HOME, 'antiword.exe')
+    return None
+
+
+def _iter_doc_antiword(source) -> Iterator[List[str]]:
+    """
+    Читання старого формату .doc через antiword.
+    Таблиці antiword виводить з роздільником "|", інший текст - окремими рядками.
+    """
+    tmp_path = None
+    if isinstance(source, str):
+        path = source
+    else:
+        # antiword читає лише файл з диска
+        with _open_binary(source) as f, tempfile.NamedTemporaryFile(delete=False, suffix='.doc') as tmp:
+            shutil.copyfileobj(f, tmp)
+            tmp_path = path = tmp.name
+
+    try:
+        result = subprocess.run(
+            [_antiword_path(), '-m', 'UTF-8.txt', '-w', '0', path],
+            capture_output=True,
+            env={**os.environ, 'ANTIWORDHOME': ANTIWORD_HOME},
+            timeout=120,
+        )
+        if result.returncode != 0:
+            raise ValueError(f"antiword: {result.stderr.decode('utf-8', errors='replace').strip()}")
+        for line in result.stdout.decode('utf-8', errors='replace').splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('|'):
+                yield [cell.strip() for cell in line.strip('|').split('|')]
+            else:
+                yield [line]
+    finally:
+        if tmp_path:
+            os.unlink(tmp_path)
+
+
+def _pdf_page_key(page) -> Optional[str]:
+    """
+    Ключ кешу сторінки за вмістом: потоки контенту, форми (XObject) і шрифти сторінки.
+    Незмінені сторінки оновленого каталогу постачальника не розбираються повторно.
+    """
+    try:
+        page_obj = page.page_obj
+        digest = hashlib.sha256(PDF_EXTRACT_VERSION.encode('utf-8'))
+        for stream in page_obj.contents:
+            digest.update(resolve1(stream).get_data())
+        resources = resolve1(page_obj.resources) or {}
+        fonts = resolve1(resources.get('Font')) or {}
+        for name in sorted(fonts):
+            digest.update(f"{name}={resolve1(fonts[name]).get('BaseFont')}".encode('utf-8'))
+        xobjects = resolve1(resources.get('XObject')) or {}
+        for name in sorted(xobjects):
+            xobject = resolve1(xobjects[name])
+            if getattr(xobject.get('Subtype'), 'name', None) == 'Form':
+                digest.update(xobject.get_data())
+        return digest.hexdigest()
+    except Exception as e:
+        logger.warning(f"Не вдалося порахувати ключ сторінки PDF: {str(e)}")
+        return None
+
+
+def _iter_pdf_pages(source) -> Iterator[List[str]]:
+    """
+    Рядки тексту кожної сторінки PDF у порядку сторінок.
+    Сторінки з кешу (за хешем вмісту) повертаються одразу, решта розбирається в пулі процесів.
+    """
+    if isinstance(source, str):
+        pdf_source = source
+    else:
+        # Воркерам потрібен довільний доступ до файлу - передаємо їм вміст
+        with _open_binary(source) as f:
+            pdf_source = f.read()
+
+    cache = _get_pdf_page_cache()
+    with pdfplumber.open(io.BytesIO(pdf_source) if isinstance(pdf_source, bytes) else pdf_source) as pdf:
+        keys = [_pdf_page_key(page) for page in pdf.pages]
+    cached = [cache.get(key) if key else None for key in keys]
+    missing = [number for number, lines in enumerate(cached) if lines is None]
+    logger.info(f"PDF: {len(keys)} сторінок, з кешу {len(keys) - len(missing)}")
+
+    extracted = (lines for batch in map_ordered(extract_pdf_pages, pdf_page_tasks(pdf_source, missing)) for lines in batch)
+    for number, lines in enumerate(cached):
+        if lines is None:
+            lines = next(extracted)
+            if keys[number]:
+                cache.set(keys[number], lines)
+        yield lines
+
+
+def _iter_pdf_rows(source) -> Iterator[List[str]]:
+    """Рядки з даними PDF прайсу; сторінки розбираються паралельно, бренди - послідовно в порядку сторінок"""
     current_brand = None
     pattern_brand = re.compile(r'.*(виробник|гарантія|[A-ZА-Я]{3,}.*\))')
 
-    with pdfplumber.open(input_path) as pdf:
-        for page in pdf.pages:
-            lines = page.extract_text().split('\n')
-            for line in lines:
-                line = line.strip()
+    for lines in _iter_pdf_pages(source):
+        for line in lines:
+            line = line.strip()
 
-                # Якщо це бренд
-                if pattern_brand.match(line):
-                    current_brand = line
-                    continue
+            # Якщо це бренд
+            if pattern_brand.match(line):
+                current_brand = line
+                continue
 
-                # Якщо це потенційно рядок з даними акумулятора
-                if re.search(r'\d', line) and len(line.split()) > 4:
-                    row = re.split(r'\s{2,}|\t', line)
-                    all_rows.append([current_brand] + row)
+            # Якщо це потенційно рядок з даними акумулятора
+            if re.search(r'\d', line) and len(line.split()) > 4:
+                row = re.split(r'\s{2,}|\t', line)
+                yield [current_brand] + row
 
-    # Створення DataFrame
-    df = pd.DataFrame(all_rows)
 
-    # Додай свій список колонок або збережи без заголовків
-    df.to_csv(output_path, index=False, header=False)
+def _parse_image_response(index: int, response_text: Optional[str]) -> List[List[str]]:
+    if not response_text:
+        return []
+    # Очищення відповіді від markdown та інших форматувань
+    csv_text = response_text.strip()
 
+    # Видалення можливих блоків коду
+    if "```" in csv_text:
+        csv_text = csv_text.split("```")[1].strip()
+        if csv_text.startswith("csv"):
+            csv_text = csv_text[3:]
 
-def _convert_image_to_csv(input_path, output_path):
+    lines = [line for line in csv_text.split('\n') if line.strip()]
+    logger.info(f"Фрагмент зображення {index}: {len(lines)} рядків")
+    return [row for row in csv.reader(lines)]
+
+
+def _iter_image_rows(source) -> Iterator[List[str]]:
     """
-    Конвертує зображення (.png, .jpg, .jpeg) у CSV формат за допомогою Gemini 1.5 Flash.
+    Витягує рядки з зображення (.png, .jpg, .jpeg) за допомогою Gemini 1.5 Flash.
     Модель аналізує зображення і витягує структуровані дані про товари.
+    Високі зображення ріжуться на смуги в пулі процесів, смуги йдуть у Gemini паралельно,
+    відповіді кешуються за вмістом смуги.
     
     Args:
-        input_path: Шлях до вхідного файлу зображення
-        output_path: Шлях до вихідного CSV файлу
+        source: Шлях до файлу зображення або бінарний файловий об'єкт
     """
-    try:
-        
-        
-        # Налаштування Gemini API
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY не знайдено в змінних середовища")
-            
-        genai.configure(api_key=api_key)
-
-        # Створення моделі
-        model = genai.GenerativeModel(
-            model_name="gemini-1.5-flash",
-            generation_config={
-                "temperature": 0.3,
-                "top_p": 1,
-                "top_k": 40,
-                "max_output_tokens": 999999
-            }
-        )
-        
-        # Завантаження та підготовка зображення
-        logger.info(f"Завантаження зображення: {input_path}")
-        img = Image.open(input_path)
-        
-        # Відправлення запиту до Gemini
-        logger.info(f"Відправлення зображення в Gemini для аналізу")
-        
-        prompt = """
-        Проаналізуй це зображення і витягни інформацію про акумулятори або інші товари.
-        Для кожного товару визнач наступні характеристики (якщо вони є на зображенні):
-        - Назва товару
-        - Бренд
-        - Ціна
-        - Ємність (Ah)
-        - Пусковий струм (A)
-        - Полярність (наприклад, R+, L+)
-        - Регіон виробництва (EUROPE, ASIA)
-        - Тип електроліту (AGM, EFB, GEL, LAB)
-        
-        Поверни результат у форматі CSV без заголовків, де кожен рядок - це окремий товар.
-        Кожен рядок повинен містити всі вищезазначені характеристики, розділені комами.
-        Якщо якась характеристика відсутня, залиш порожнє місце між комами.
+    # Налаштування Gemini API
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY не знайдено в змінних середовища")
         
-        Приклад формату:
-        Varta Blue Dynamic, VARTA, 3200, 60, 540, R+, EUROPE, LAB
-        """
-        
-        response = model.generate_content([prompt, img])
-        
-        # Обробка відповіді
-        if not response.text:
-            raise ValueError("Отримано порожню відповідь від Gemini API")
-            
-        logger.info(f"Отримано відповідь від Gemini API")
-        
-        # Очищення відповіді від markdown та інших форматувань
-        csv_text = response.text.strip()
-        
-        # Видалення можливих блоків коду
-        if "```" in csv_text:
-            csv_text = csv_text.split("```")[1] if "```csv" in csv_text else csv_text.split("```")[1]
-            csv_text = csv_text.strip()
-        
-        # Запис у CSV файл
-        with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
-            # Перевірка, чи є дані у форматі CSV
-            lines = csv_text.split('\n')
-            writer = csv.writer(csvfile)
-            
-            for line in lines:
-                if line.strip():  # Пропускаємо порожні рядки
-                    writer.writerow(line.split(','))
-        
-        logger.info(f"Дані успішно записано у CSV файл: {output_path}")
-        
-    except ImportError as e:
-        logger.error(f"Помилка імпорту модуля: {str(e)}. Переконайтеся, що встановлено необхідні пакети.")
-        raise
+    genai.configure(api_key=api_key)
+
+    # Створення моделі
+    model = genai.GenerativeModel(
+        model_name="gemini-1.5-flash",
+        generation_config={
+            "temperature": 0.3,
+            "top_p": 1,
+            "top_k": 40,
+            "max_output_tokens": 999999
+        }
+    )
+    
+    # Завантаження та підготовка зображення
+    with _open_binary(source) as f:
+        data = f.read()
+    with Image.open(io.BytesIO(data)) as img:
+        width, height = img.size
+        mime_type = Image.MIME.get(img.format, 'image/png')
+    boxes = image_tile_boxes(width, height)
+    if len(boxes) == 1:
+        tiles = [(mime_type, data)]
+    else:
+        tiles = [('image/png', tile) for tile in map_ordered(crop_image_tile, [(data, box) for box in boxes])]
+    logger.info(f"Зображення {width}x{height}: {len(tiles)} фрагментів, відправлення в Gemini")
+
+    def parse_tile(args):
+        index, (tile_mime, tile) = args
+        prompt = [IMAGE_PROMPT, {"mime_type": tile_mime, "data": tile}]
+        rows, _ = generate_cached(model, IMAGE_PROMPT_VERSION, prompt, _parse_image_response, index)
+        return rows
+
+    with ThreadPoolExecutor(max_workers=IMAGE_TILE_CONCURRENCY) as executor:
+        results = list(executor.map(parse_tile, enumerate(tiles)))
+
+    previous = None
+    for rows in results:
+        for i, row in enumerate(rows):
+            # Смуги перекриваються - рядок на межі може прийти двічі
+            if i == 0 and row == previous:
+                continue
+            yield row
+        if rows:
+            previous = rows[-1]
+
+
+def _iter_google_rows(input_path) -> Iterator[List[str]]:
+    """Рядки Google Spreadsheet: експорт у CSV читається потоком з відповіді"""
+    # Витягуємо ID документа та gid з посилання
+    doc_id_match = re.search(r'/d/([a-zA-Z0-9-_]+)', input_path)
+    if not doc_id_match:
+        raise ValueError("Не вдалося витягти ID документа з посилання")
+    
+    doc_id = doc_id_match.group(1)
+    
+    # Витягуємо gid (якщо є)
+    gid_match = re.search(r'gid=(\d+)', input_path)
+    gid = gid_match.group(1) if gid_match else '0'
+    
+    # Формуємо посилання для експорту CSV
+    export_url = f"https://docs.google.com/spreadsheets/d/{doc_id}/export?format=csv&gid={gid}"
+    
+    try:
+        with requests.get(export_url, stream=True, timeout=60) as response:
+            if response.status_code != 200:
+                raise ValueError(f"Помилка при завантаженні CSV: {response.status_code}")
+            # Розпаковуємо gzip на льоту і читаємо CSV рядок за рядком
+            response.raw.decode_content = True
+            text = io.TextIOWrapper(response.raw, encoding='utf-8-sig', newline='')
+            yield from csv.reader(text)
+        logger.info(f"Google Spreadsheet успішно прочитано: {doc_id}")
     except Exception as e:
-        logger.error(f"Помилка при конвертації зображення у CSV: {str(e)}")
+        logger.error(f"Помилка при конвертації Google Spreadsheet у CSV: {str(e)}")
         raise
 
-def _convert_google_to_csv(input_path, output_path):
-    try:   
-        # Витягуємо ID документа та gid з посилання
-        doc_id_match = re.search(r'/d/([a-zA-Z0-9-_]+)', input_path)
-        if not doc_id_match:
-            raise ValueError("Не вдалося витягти ID документа з посилання")
-        
-        doc_id = doc_id_match.group(1)
-        
-        # Витягуємо gid (якщо є)
-        gid_match = re.search(r'gid=(\d+)', input_path)
-        gid = gid_match.group(1) if gid_match else '0'
-        
-        # Формуємо посилання для експорту CSV
-        export_url = f"https://docs.google.com/spreadsheets/d/{doc_id}/export?format=csv&gid={gid}"
-        
-        # Завантажуємо CSV
-        response = requests.get(export_url)
-        if response.status_code != 200:
-            raise ValueError(f"Помилка при завантаженні CSV: {response.status_code}")
-        
-        # Зберігаємо CSV у вихідний файл
-        with open(output_path, 'wb') as f:
-            f.write(response.content)
-        
-        logger.info(f"Google Spreadsheet успішно конвертовано у CSV: {output_path}")
-        return output_path
-        
-    except Exception as e:
-        logger.error(f"Помилка при конвертації Google Spreadsheet у CSV: {str(e)}")
-        raise
\ No newline at end of file
+
+@dataclass(frozen=True)
+class Converter:
+    """
+    Конвертер одного або кількох форматів у рядки таблиці.
+
+    streaming - читає рядки потоком (пам'ять не залежить від розміру файлу);
+    network - ходить у мережу (Gemini, Google Docs), у бенчмарку не міряється;
+    available - чи є все потрібне для роботи (наприклад, зовнішня програма);
+    opt_in - використовується лише якщо названий у CONVERTER_ORDER (у бенчмарку міряється завжди).
+    """
+    name: str
+    formats: Tuple[str, ...]
+    read: Callable[[Any], Iterator[Sequence]]
+    streaming: bool = True
+    network: bool = False
+    available: Callable[[], bool] = lambda: True
+    opt_in: bool = False
+
+
+# Формат -> конвертери в порядку спроб. Порівняти їх на своїх файлах - python -m benchmarks.converters;
+# змінити порядок без правок коду можна через CONVERTER_ORDER
+CONVERTERS: Dict[str, List[Converter]] = {}
+
+
+def register_converter(converter: Converter, first: bool = False) -> None:
+    """Додає конвертер у реєстр (в кінець списку спроб або першим)."""
+    for fmt in converter.formats:
+        converters = [c for c in CONVERTERS.get(fmt, []) if c.name != converter.name]
+        converters.insert(0 if first else len(converters), converter)
+        CONVERTERS[fmt] = converters
+
+
+def _order_overrides() -> Dict[str, List[str]]:
+    # CONVERTER_ORDER="xlsx=xlsx_manual,openpyxl;xls=pandas,xlrd"
+    overrides = {}
+    for part in os.getenv('CONVERTER_ORDER', '').split(';'):
+        fmt, _, names = part.partition('=')
+        if fmt.strip() and names.strip():
+            overrides[fmt.strip()] = [name.strip() for name in names.split(',')]
+    return overrides
+
+
+def get_converters(fmt: str) -> List[Converter]:
+    """Доступні конвертери формату в порядку спроб."""
+    order = _order_overrides().get(fmt)
+    converters = [
+        c for c in CONVERTERS.get(fmt, [])
+        if c.available() and (not c.opt_in or (order and c.name in order))
+    ]
+    if order:
+        # Незгадані в CONVERTER_ORDER конвертери лишаються запасними в кінці
+        rank = {name: i for i, name in enumerate(order)}
+        converters.sort(key=lambda c: rank.get(c.name, len(rank)))
+    return converters
+
+
+_OLE_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+# Скільки байт OLE-файлу переглядати в пошуку потоку WordDocument
+_OLE_SCAN_BYTES = 4 * 1024 * 1024
+_EXTENSION_FORMATS = {
+    '.xlsx': 'xlsx', '.xls': 'xls', '.docx': 'docx', '.doc': 'doc', '.pdf': 'pdf',
+    '.png': 'image', '.jpg': 'image', '.jpeg': 'image', '.csv': 'csv',
+}
+
+
+def sniff_format(source: Source, file_name: Optional[str] = None) -> str:
+    """
+    Визначає формат за сигнатурою файлу, а не за розширенням
+    (постачальники часто надсилають .xls, який насправді xlsx, або файли без розширення).
+    Розширення використовується лише як підказка, коли вмісту недостатньо (.xls/.doc, текст).
+
+    Returns:
+        "xlsx", "xls", "docx", "doc", "pdf", "image", "csv" або "gsheet"
+
+    Raises:
+        ValueError: Якщо формат не вдалося визначити
+    """
+    if isinstance(source, str) and source.startswith('https://docs.google'):
+        return 'gsheet'
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    name = file_name or (source if isinstance(source, str) else getattr(source, 'name', None)) or ''
+    ext = os.path.splitext(str(name))[-1].lower()
+
+    with _open_binary(source) as f:
+        head = f.read(2048)
+        if head.startswith(b'PK\x03\x04'):
+            f.seek(0)
+            try:
+                names = ZipFile(f).namelist()
+            except BadZipFile:
+                names = []
+            if any(n.startswith('xl/') for n in names):
+                return 'xlsx'
+            if any(n.startswith('word/') for n in names):
+                return 'docx'
+        elif head.startswith(_OLE_MAGIC):
+            if ext in ('.xls', '.doc'):
+                return ext[1:]
+            f.seek(0)
+            return 'doc' if 'WordDocument'.encode('utf-16-le') in f.read(_OLE_SCAN_BYTES) else 'xls'
+        elif b'%PDF-' in head[:1024]:
+            return 'pdf'
+        elif head.startswith(b'\x89PNG\r\n\x1a\n') or head.startswith(b'\xff\xd8\xff'):
+            return 'image'
+        elif ext in _EXTENSION_FORMATS:
+            return _EXTENSION_FORMATS[ext]
+        elif head and b'\x00' not in head:
+            return 'csv'
+
+    raise ValueError(f"Формат {ext or 'файлу'} не підтримується!")
+
+
+for _converter in (
+    Converter('openpyxl', ('xlsx',), _iter_xlsx_openpyxl),
+    # Без стилів (дати - числа Excel): лише через CONVERTER_ORDER="xlsx=xlsx_manual,openpyxl"
+    Converter('xlsx_manual', ('xlsx',), _iter_xlsx_manual, opt_in=True),
+    Converter('xlrd', ('xls',), _iter_xls_xlrd, streaming=False),
+    Converter('pandas', ('xlsx', 'xls'), _iter_excel_pandas, streaming=False),
+    Converter('python_docx', ('docx',), _iter_docx_rows, streaming=False),
+    Converter('antiword', ('doc',), _iter_doc_antiword, streaming=False, available=lambda: _antiword_path() is not None),
+    Converter('pdfplumber', ('pdf',), _iter_pdf_rows),
+    Converter('csv', ('csv',), _iter_csv_rows),
+    Converter('gemini_vision', ('image',), _iter_image_rows, streaming=False, network=True),
+    Converter('google_sheets', ('gsheet',), _iter_google_rows, network=True),
+):
+    register_converter(_converter)
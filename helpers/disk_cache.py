@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+import time
+from typing import Any, Optional
+
+# Як часто (в записах) перевіряти розмір кешу
+EVICT_EVERY = 50
+
+
+def _unlink(path: str) -> bool:
+    """Видаляє файл; False, якщо його вже видалив інший процес чи потік."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+class DiskCache:
+    """
+    JSON-записи на диску за ключем (зазвичай хешем вмісту), по підкаталогах за першими символами ключа.
+    Записи старші за TTL видаляються, при перевищенні розміру - найстаріші.
+    """
+
+    def __init__(self, directory: str, ttl: int, max_bytes: int):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evicted": 0}
+        self._writes_since_evict = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.unlink(path)
+                raise FileNotFoundError(path)
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Унікальний тимчасовий файл: пишуть і кілька процесів, і потоки одного процесу
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)  # атомарно, паралельні імпорти не побачать половину файлу
+        except BaseException:
+            _unlink(tmp_path)
+            raise
+
+        self.stats["writes"] += 1
+        self._writes_since_evict += 1
+        if self._writes_since_evict >= EVICT_EVERY:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Видаляє прострочені записи, а потім найстаріші, поки кеш не вкладеться в max_bytes.
+
+        Returns:
+            Кількість видалених записів
+        """
+        self._writes_since_evict = 0
+        if not os.path.isdir(self.directory):
+            return 0
+
+        now = time.time()
+        entries = []
+        removed = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if now - stat.st_mtime > self.ttl:
+                    if _unlink(path):
+                        removed += 1
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if _unlink(path):
+                removed += 1
+            total -= size
+
+        self.stats["evicted"] += removed
+        return removed
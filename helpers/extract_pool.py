@@ -0,0 +1,98 @@
+import io
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pdfplumber
+from dotenv import load_dotenv
+from PIL import Image
+
+load_dotenv()
+
+# Скільки процесів розбирають сторінки PDF і нарізають зображення
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Скільки сторінок PDF в одній задачі воркеру
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+# Зображення вище за IMAGE_TILE_HEIGHT пікселів ріжуться на смуги з перекриттям
+IMAGE_TILE_HEIGHT = int(os.getenv("IMAGE_TILE_HEIGHT", "1600"))
+IMAGE_TILE_OVERLAP = int(os.getenv("IMAGE_TILE_OVERLAP", "60"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_extract_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Спільний пул процесів для розбору PDF і зображень.
+    None, якщо дочірні процеси недоступні (воркери Celery prefork - демони) або EXTRACT_WORKERS <= 1.
+    """
+    global _pool
+    if EXTRACT_WORKERS <= 1 or multiprocessing.current_process().daemon:
+        return None
+    if _pool is None:
+        # spawn: процес API має потоки, fork з ними небезпечний
+        _pool = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def map_ordered(func: Callable, tasks: Iterable) -> Iterator:
+    """Виконує задачі в пулі (або послідовно без нього), результати - в порядку задач."""
+    pool = get_extract_pool()
+    if pool is None:
+        return map(func, tasks)
+    return pool.map(func, tasks)
+
+
+def shutdown_extract_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+
+
+def pdf_page_tasks(
+    source: Union[str, bytes],
+    page_numbers: Sequence[int],
+) -> List[Tuple[Union[str, bytes], List[int]]]:
+    """
+    Ділить сторінки на задачі для extract_pdf_pages.
+    Файл з диска воркер відкриває сам, а вміст у пам'яті копіюється в кожну задачу,
+    тож для bytes задач не більше, ніж воркерів.
+    """
+    per_task = PDF_PAGES_PER_TASK
+    if isinstance(source, (bytes, bytearray)):
+        per_task = max(per_task, math.ceil(len(page_numbers) / max(EXTRACT_WORKERS, 1)))
+    return [(source, list(page_numbers[i:i + per_task])) for i in range(0, len(page_numbers), per_task)]
+
+
+def extract_pdf_pages(task: Tuple[Union[str, bytes], List[int]]) -> List[List[str]]:
+    """Рядки тексту кожної сторінки з task (виконується у воркері)."""
+    source, page_numbers = task
+    with pdfplumber.open(io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source) as pdf:
+        pages = []
+        for number in page_numbers:
+            page = pdf.pages[number]
+            pages.append((page.extract_text() or "").split("\n"))
+            page.flush_cache()
+        return pages
+
+
+def image_tile_boxes(width: int, height: int) -> List[Tuple[int, int, int, int]]:
+    """Горизонтальні смуги висотою IMAGE_TILE_HEIGHT з перекриттям (рядок прайсу не розрізається навпіл)."""
+    if height <= IMAGE_TILE_HEIGHT:
+        return [(0, 0, width, height)]
+    step = IMAGE_TILE_HEIGHT - IMAGE_TILE_OVERLAP
+    return [(0, top, width, min(top + IMAGE_TILE_HEIGHT, height)) for top in range(0, height - IMAGE_TILE_OVERLAP, step)]
+
+
+def crop_image_tile(task: Tuple[bytes, Tuple[int, int, int, int]]) -> bytes:
+    """Вирізає смугу зображення і повертає її як PNG (виконується у воркері)."""
+    data, box = task
+    with Image.open(io.BytesIO(data)) as img:
+        tile = img.crop(box)
+        if tile.mode not in ("RGB", "L"):
+            tile = tile.convert("RGB")
+        out = io.BytesIO()
+        tile.save(out, format="PNG")
+        return out.getvalue()
@@ -1,5 +1,12 @@
-def get_prompt(product_type: str = "batteries", data=None, comment=None):
+def get_prompt(product_type: str = "batteries", data=None, comment=None, market=None):
     prompt = ""
+    # Ринок тих самих характеристик з агрегатів (helpers/market_aggregates.py)
+    market_section = ""
+    if market:
+        market_section = f"""
+### Ринок тих самих характеристик (всі постачальники, наша ціна і місце серед конкурентів):
+{market}
+"""
     if product_type == "batteries":
         prompt = f"""
 Ти дієш як досвідчений аналітик ринку та експерт з продажу автомобільних акумуляторів.
@@ -8,7 +15,7 @@ def get_prompt(product_type: str = "batteries", data=None, comment=None):
 
 ### Дані:
 {data}
-
+{market_section}
 ### Проаналізуй кожен товар, враховуючи такі параметри:
 - Потенційна цінова конкурентність (чи вигідна ціна щодо показників об'єму та пускового струму)
 - Позиціонування на ринку (преміум/масовий сегмент)
@@ -34,7 +41,7 @@ def get_prompt(product_type: str = "batteries", data=None, comment=None):
 
 ### Дані:
 {data}
-
+{market_section}
 ### Проаналізуй кожен товар, враховуючи такі параметри:
 - Потенційна цінова конкурентність (співвідношення ціни до потужності, ціна за ват)
 - Ефективність панелей (потужність відносно розміру, технологія елементів)
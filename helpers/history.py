@@ -0,0 +1,182 @@
+import os
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import SessionLocal
+from db.models import HistoryStats
+
+load_dotenv()
+
+# Історія цін як події змін: рядок пишеться, лише якщо ціна чи атрибути відрізняються від поточних
+HISTORY_CHANGES_ONLY = os.getenv("HISTORY_CHANGES_ONLY", "1") == "1"
+
+# Колонки, які не є атрибутами спостереження (product_id - результат зіставлення, а не ціна чи характеристика)
+SERVICE_COLUMNS = ("id", "created_at", "updated_at", "product_id")
+
+
+def tracked_columns(history_model, key_columns: Sequence[str]) -> List[str]:
+    """Колонки історії, зміна яких - нова подія (все, крім службових і ключа товару)."""
+    return [
+        column.name for column in history_model.__table__.columns
+        if column.name not in SERVICE_COLUMNS and column.name not in key_columns
+    ]
+
+
+async def select_changed_rows(
+    session: AsyncSession,
+    history_model,
+    current_model,
+    rows: List[Dict[str, Any]],
+    key_columns: Sequence[str],
+) -> List[Dict[str, Any]]:
+    """
+    Рядки батчу, які відрізняються від поточного стану товару (або нові).
+    Поточний стан - поточна таблиця (один SELECT на батч), а в межах батчу - попередній рядок того ж ключа.
+    """
+    columns = tracked_columns(history_model, key_columns)
+    keys = list({tuple(row.get(column) for column in key_columns) for row in rows})
+    key_expr = tuple_(*[getattr(current_model, column) for column in key_columns])
+    result = await session.execute(
+        select(*[getattr(current_model, column) for column in (*key_columns, *columns)]).where(key_expr.in_(keys))
+    )
+    last: Dict[Tuple, Tuple] = {
+        tuple(record[:len(key_columns)]): tuple(record[len(key_columns):]) for record in result.all()
+    }
+
+    changed = []
+    for row in rows:
+        key = tuple(row.get(column) for column in key_columns)
+        values = tuple(row.get(column) for column in columns)
+        if last.get(key) != values:
+            changed.append(row)
+            last[key] = values
+    return changed
+
+
+async def record_history_stats(
+    session: AsyncSession,
+    product: str,
+    observed: int = 0,
+    written: int = 0,
+    compacted: int = 0,
+) -> None:
+    """Додає лічильники дня: спостережено рядків, записано в історію, видалено компактуванням."""
+    if not (observed or written or compacted):
+        return
+    stmt = pg_insert(HistoryStats).values(
+        product=product, day=date.today(), observed=observed, written=written, compacted=compacted,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["product", "day"],
+        set_={
+            "observed": HistoryStats.observed + stmt.excluded.observed,
+            "written": HistoryStats.written + stmt.excluded.written,
+            "compacted": HistoryStats.compacted + stmt.excluded.compacted,
+        },
+    )
+    await session.execute(stmt)
+
+
+async def compact_history(
+    product: str,
+    history_model,
+    key_columns: Sequence[str],
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Згортає повтори в історії: з кожної серії однакових спостережень товару (full_name + постачальник)
+    лишається перше. Виконується окремою транзакцією на кожного постачальника, щоб не тримати
+    блокування всієї таблиці.
+
+    Args:
+        product: "batteries", "sollar_panels" або "inverters"
+        history_model: Модель історії (наприклад, Batteries)
+        key_columns: Ключ товару
+        dry_run: Лише порахувати рядки, які буде видалено
+
+    Returns:
+        Кількість видалених (або знайдених при dry_run) рядків по постачальниках і час
+    """
+    started = time.perf_counter()
+    table = history_model.__table__.name
+    columns = tracked_columns(history_model, key_columns)
+    partition = ", ".join(column for column in key_columns if column != "supplier_id")
+    same_as_previous = " AND ".join(
+        f"{column} IS NOT DISTINCT FROM LAG({column}) OVER w" for column in columns
+    )
+    # Перший рядок серії має LAG = NULL по ключу, тож порівнюємо і наявність попереднього рядка
+    duplicates = f"""
+        SELECT id FROM (
+            SELECT id, LAG(id) OVER w IS NOT NULL AND {same_as_previous} AS redundant
+            FROM {table}
+            WHERE supplier_id IS NOT DISTINCT FROM :supplier_id
+            WINDOW w AS (PARTITION BY {partition} ORDER BY created_at, id)
+        ) runs
+        WHERE redundant
+    """
+
+    stats = {"product": product, "table": table, "dry_run": dry_run, "removed": 0, "suppliers": {}}
+    async with SessionLocal() as session:
+        supplier_ids = (await session.execute(select(history_model.supplier_id).distinct())).scalars().all()
+        for supplier_id in supplier_ids:
+            if dry_run:
+                result = await session.execute(text(f"SELECT COUNT(*) FROM ({duplicates}) d"), {"supplier_id": supplier_id})
+                removed = result.scalar()
+            else:
+                result = await session.execute(
+                    text(f"DELETE FROM {table} WHERE id IN ({duplicates})"), {"supplier_id": supplier_id}
+                )
+                removed = result.rowcount
+                await record_history_stats(session, product, compacted=removed)
+                await session.commit()
+            stats["suppliers"][str(supplier_id)] = removed
+            stats["removed"] += removed
+            print(f"🗜 {table}: постачальник {supplier_id} - {'знайдено' if dry_run else 'видалено'} {removed} повторів")
+
+    stats["elapsed"] = round(time.perf_counter() - started, 2)
+    return stats
+
+
+async def get_history_stats(history_models: Dict[str, Any], days: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Скільки рядків історії не записано (повтори) і видалено компактуванням, по продуктах.
+
+    Args:
+        history_models: product -> модель історії (для оцінки поточного розміру таблиці)
+        days: Лише за останні N днів (None - за весь час)
+    """
+    async with SessionLocal() as session:
+        query = select(
+            HistoryStats.product,
+            func.sum(HistoryStats.observed),
+            func.sum(HistoryStats.written),
+            func.sum(HistoryStats.compacted),
+        ).group_by(HistoryStats.product)
+        if days is not None:
+            query = query.where(HistoryStats.day >= func.current_date() - days)
+        totals = {product: (observed, written, compacted) for product, observed, written, compacted in (await session.execute(query)).all()}
+
+        products = {}
+        for product, model in history_models.items():
+            observed, written, compacted = (int(value or 0) for value in totals.get(product, (0, 0, 0)))
+            # Оцінка з pg_class замість COUNT(*) - не сканує велику таблицю
+            estimate = await session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+                {"table": model.__table__.name},
+            )
+            products[product] = {
+                "observed": observed,
+                "written": written,
+                "skipped": observed - written,
+                "compacted": compacted,
+                "rows_saved": observed - written + compacted,
+                "skipped_ratio": round((observed - written) / observed, 3) if observed else 0.0,
+                "history_rows_estimate": max(estimate.scalar() or 0, 0),
+            }
+    return {"changes_only": HISTORY_CHANGES_ONLY, "days": days, "products": products}
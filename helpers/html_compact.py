@@ -0,0 +1,213 @@
+import asyncio
+import os
+import re
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from lxml import etree
+from lxml import html as lxml_html
+
+from helpers.llm_scheduler import estimate_tokens
+
+load_dotenv()
+
+# Скільки карток товарів в одній задачі воркеру (передача в процес коштує більше за розбір однієї картки)
+HTML_COMPACT_BATCH = int(os.getenv("HTML_COMPACT_BATCH", "200"))
+# Каталог, більший за цей розмір у токенах, ділиться на дочірні блоки
+HTML_MAX_ROW_TOKENS = int(os.getenv("HTML_MAX_ROW_TOKENS", str(int(os.getenv("LLM_INPUT_TOKENS", "12000")) // 2)))
+
+# Теги, які не несуть даних про товар. Лише самі елементи керування: <form> часто
+# обгортає всю картку чи блок ціни з кнопкою "купити", тож його вміст лишається
+BOILERPLATE_TAGS = (
+    "script", "style", "noscript", "svg", "iframe", "header", "footer", "nav",
+    "button", "link", "meta", "img", "picture", "input", "select", "textarea", "template",
+)
+# Після цих тегів текст переноситься на новий рядок
+BLOCK_TAGS = (
+    "div", "p", "li", "ul", "ol", "table", "tbody", "thead", "section", "article",
+    "h1", "h2", "h3", "h4", "h5", "h6", "br", "dl", "form",
+)
+
+_SPACES = re.compile(r"\s+")
+
+# Байти HTML -> тексту поточного сайту (встановлює оркестратор в задачі конкурента)
+_site_stats: ContextVar[Optional[Dict[str, int]]] = ContextVar("html_compact_stats", default=None)
+# Відбір рядків для LLM (інкрементальний парсинг відкидає незмінені картки, див. helpers/crawl_state.py)
+_row_filter: ContextVar[Optional[Callable[[List[str]], List[str]]]] = ContextVar("html_compact_row_filter", default=None)
+
+
+def track_site_stats(row_filter: Optional[Callable[[List[str]], List[str]]] = None) -> Dict[str, int]:
+    """
+    Починає облік байтів HTML і компактного тексту для поточної задачі (сайту).
+    compact_pages, викликаний з цієї ж задачі, додає свої байти в повернений словник
+    і пропускає рядки через row_filter, якщо він заданий.
+    """
+    stats = {"html_bytes": 0, "text_bytes": 0}
+    _site_stats.set(stats)
+    _row_filter.set(row_filter)
+    return stats
+
+
+def filter_rows(rows: List[str]) -> List[str]:
+    """Рядки, що проходять відбір поточної задачі (track_site_stats); без відбору - усі."""
+    row_filter = _row_filter.get()
+    return row_filter(rows) if row_filter is not None else rows
+
+
+def _text(element) -> str:
+    return _SPACES.sub(" ", element.text_content()).strip()
+
+
+def _replace_with_line(element, line: str) -> None:
+    # Елемент лишається в дереві (зберігається tail), але вміст замінюється одним рядком
+    for child in list(element):
+        element.remove(child)
+    element.text = f"\n{line}\n" if line else ""
+
+
+def compact_html(markup: str) -> str:
+    """
+    Компактний текст фрагмента HTML для LLM: без службових тегів і зайвих пробілів.
+    Рядок таблиці з двох комірок і пара <dt>/<dd> стають "характеристика: значення",
+    інші рядки таблиць - комірки через " | ". Блоки (картки, абзаци, пункти списків) - окремі рядки.
+    """
+    if not markup or not markup.strip():
+        return ""
+    try:
+        root = lxml_html.fragment_fromstring(markup, create_parent="div")
+    except (etree.ParserError, ValueError):
+        return ""
+
+    for element in root.xpath("|".join(f"//{tag}" for tag in BOILERPLATE_TAGS) + "|//comment()"):
+        element.drop_tree()
+
+    for row in list(root.iter("tr")):
+        cells = [_text(cell) for cell in row if cell.tag in ("td", "th")]
+        cells = [cell for cell in cells if cell]
+        line = f"{cells[0].rstrip(':')}: {cells[1]}" if len(cells) == 2 else " | ".join(cells)
+        _replace_with_line(row, line)
+
+    for term in list(root.iter("dt")):
+        value = term.getnext()
+        if value is not None and value.tag == "dd":
+            line = f"{_text(term).rstrip(':')}: {_text(value)}"
+            value.drop_tree()
+        else:
+            line = _text(term)
+        _replace_with_line(term, line)
+
+    for block in root.iter(*BLOCK_TAGS):
+        block.text = "\n" + (block.text or "")
+        block.tail = "\n" + (block.tail or "")
+
+    lines = []
+    for line in root.text_content().split("\n"):
+        line = _SPACES.sub(" ", line).strip(" |")
+        # Повтори (назва в заголовку і в alt/підписі) лише додають токенів
+        if line and (not lines or lines[-1] != line):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def _split_catalog(markup: str, max_tokens: int) -> List[str]:
+    text = compact_html(markup)
+    if estimate_tokens(text) <= max_tokens:
+        return [text] if text else []
+    try:
+        root = lxml_html.fragment_fromstring(markup, create_parent="div")
+    except (etree.ParserError, ValueError):
+        return [text]
+    # fragment_fromstring загортає в <div>; ділимо по дочірніх елементах найближчого
+    # вузла, що має більше одного нащадка
+    node = root
+    while len(node) == 1:
+        node = node[0]
+    children = [etree.tostring(child, encoding="unicode", with_tail=False) for child in node]
+    if len(children) <= 1:
+        return [text]
+    return [row for child in children for row in _split_catalog(child, max_tokens)]
+
+
+def compact_items(items: List[Tuple[str, Any]]) -> List[List[str]]:
+    """
+    Перетворює пачку елементів сторінок у логічні рядки для LLM (виконується у воркері).
+
+    Args:
+        items: ("product", [HTML частин товару]) - товар одним рядком,
+            ("catalog", HTML) - каталог, багаторядковий, завеликий ділиться по дочірніх блоках
+
+    Returns:
+        Рядки кожного елемента в порядку items
+    """
+    results = []
+    for kind, payload in items:
+        if kind == "product":
+            parts = (compact_html(part) for part in payload)
+            # Товар з кількох частин - один рядок блоку, інакше в LLM товари зливаються
+            line = " | ".join(
+                piece for part in parts for piece in (p.strip(" |") for p in part.split("\n")) if piece
+            )
+            results.append([line] if line else [])
+        else:
+            results.append(_split_catalog(payload, HTML_MAX_ROW_TOKENS))
+    return results
+
+
+def _page_items(data: Any) -> List[Tuple[str, Any]]:
+    # Теги BeautifulSoup з парсерів сайтів серіалізуються в рядки: у процес передається лише HTML
+    if data is None:
+        return []
+    if isinstance(data, (list, tuple)):
+        if any(isinstance(item, (list, tuple)) for item in data):
+            return [item for product in data for item in _page_items(product)]
+        return [("product", [str(part) for part in data if part is not None])]
+    return [("catalog", str(data))]
+
+
+def _compact_sync(items: List[Tuple[str, Any]]) -> List[str]:
+    from helpers.extract_pool import map_ordered
+
+    batches = [items[i:i + HTML_COMPACT_BATCH] for i in range(0, len(items), HTML_COMPACT_BATCH)]
+    if len(batches) <= 1:
+        # Одна пачка - пул не пришвидшить, лише додасть передачу між процесами
+        results = [compact_items(batch) for batch in batches]
+    else:
+        results = map_ordered(compact_items, batches)
+    return [row for batch in results for rows in batch for row in rows]
+
+
+async def compact_pages(all_data: List[Dict[str, Any]], key: str) -> List[str]:
+    """
+    Логічні рядки (картки товарів) для LLM з усіх сторінок сайту.
+    HTML розбирається lxml у пулі процесів (helpers.extract_pool), не блокуючи event loop.
+    Скорочення HTML -> текст друкується і додається в облік сайту (track_site_stats),
+    там же задається відбір рядків (лише змінені картки).
+
+    Args:
+        all_data: Результат парсера сайту: [{"page_num": ..., key: товари або каталог}, ...]
+        key: Ключ продукту в словниках сторінок
+
+    Returns:
+        Компактні рядки товарів у порядку сторінок
+    """
+    items = [item for data in all_data for item in _page_items(data.get(key))]
+    html_bytes = sum(
+        len(part.encode("utf-8")) for kind, payload in items
+        for part in (payload if kind == "product" else [payload])
+    )
+    rows = await asyncio.to_thread(_compact_sync, items)
+    text_bytes = sum(len(row.encode("utf-8")) for row in rows)
+
+    stats = _site_stats.get()
+    if stats is not None:
+        stats["html_bytes"] += html_bytes
+        stats["text_bytes"] += text_bytes
+    reduction = 100 * (1 - text_bytes / html_bytes) if html_bytes else 0.0
+    print(f"🧹 HTML {html_bytes / 1024:.1f} КБ -> текст {text_bytes / 1024:.1f} КБ (-{reduction:.0f}%), {len(rows)} рядків")
+
+    if _row_filter.get() is not None:
+        total = len(rows)
+        rows = filter_rows(rows)
+        print(f"🔁 Змінених карток: {len(rows)} з {total}")
+    return rows
@@ -0,0 +1,355 @@
+import asyncio
+import base64
+import codecs
+import hashlib
+import os
+import random
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+from charset_normalizer import from_bytes
+from dotenv import load_dotenv
+
+from helpers.get_user_agent import get_headers
+from helpers.disk_cache import DiskCache
+
+load_dotenv()
+
+# Пул з'єднань: загальний ліміт і ліміт одночасних з'єднань на хост
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_HOST_CONNECTIONS = int(os.getenv("HTTP_HOST_CONNECTIONS", "6"))
+# Запитів на секунду до одного хоста (за замовчуванням)
+HTTP_HOST_RPS = float(os.getenv("HTTP_HOST_RPS", "5"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+# Скільки сторінок тримати для умовних запитів (ETag/Last-Modified)
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "5000"))
+# Тіла сторінок з ETag/Last-Modified на диску (за хешем вмісту) - щоб 304 працював і між запусками
+CRAWL_PAGE_CACHE_DIR = os.getenv("CRAWL_PAGE_CACHE_DIR", ".crawl_cache")
+CRAWL_PAGE_CACHE_TTL = int(os.getenv("CRAWL_PAGE_CACHE_TTL", str(14 * 24 * 3600)))
+CRAWL_PAGE_CACHE_MAX_BYTES = int(os.getenv("CRAWL_PAGE_CACHE_MAX_MB", "500")) * 1024 * 1024
+
+# Сайти, які блокують частий парсинг (раніше - антиспам-паузи в самих парсерах)
+HOST_RPS = {
+    "www.deye-ukraine.com.ua": 0.2,
+    "solarflow.shop": 0.5,
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+# Скільки байт початку сторінки переглядати в пошуках <meta charset>
+META_CHARSET_SCAN_BYTES = 4096
+
+
+def detect_encoding(body: bytes) -> str:
+    """
+    Кодування тіла без charset у заголовку: <meta charset>, потім UTF-8,
+    інакше - визначення за вмістом (cp1251 сайти без заголовка).
+    """
+    match = _META_CHARSET.search(body[:META_CHARSET_SCAN_BYTES])
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode("ascii")).name
+        except LookupError:
+            pass
+    try:
+        body.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    best = from_bytes(body).best()
+    return best.encoding if best else "utf-8"
+
+
+class HttpResponse:
+    """Відповідь, уже прочитана повністю (з'єднання одразу повертається в пул)."""
+
+    def __init__(self, url: str, status: int, body: bytes, encoding: Optional[str], from_cache: bool = False):
+        self.url = url
+        self.status = status
+        self.body = body
+        self.encoding = encoding
+        self.from_cache = from_cache
+
+    async def text(self, encoding: Optional[str] = None) -> str:
+        if not encoding and not self.encoding:
+            # Як aiohttp: без charset у заголовку кодування визначається за вмістом
+            self.encoding = detect_encoding(self.body)
+        return self.body.decode(encoding or self.encoding, errors="replace")
+
+    async def read(self) -> bytes:
+        return self.body
+
+
+class _RequestContext:
+    """Дозволяє писати `async with client.get(url) as response`, як з aiohttp.ClientSession."""
+
+    def __init__(self, client: "HttpClient", url: str):
+        self._client = client
+        self._url = url
+
+    async def __aenter__(self) -> HttpResponse:
+        return await self._client.fetch(self._url)
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+
+class _HostRateLimiter:
+    """Мінімальний інтервал між початками запитів до хоста."""
+
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps
+        self.next_at = 0.0
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        wait = self.next_at - now
+        self.next_at = max(now, self.next_at) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class HttpClient:
+    """
+    Спільний HTTP-клієнт для всіх парсерів сайтів:
+    - один пул з'єднань (keep-alive, кеш DNS) на процес;
+    - ліміт одночасних з'єднань і запитів на секунду для кожного хоста;
+    - повтори з експоненційною затримкою для мережевих помилок і 429/5xx;
+    - умовні запити (If-None-Match/If-Modified-Since): 304 повертає збережену сторінку;
+      валідатори попередніх запусків підвантажуються з бази (preload, див. helpers/crawl_state.py);
+    - хеш вмісту сторінок хостів, для яких увімкнено облік (track_pages/pop_pages);
+    - метрики по хостах: запити, повтори, помилки, байти, час відповіді.
+    """
+
+    def __init__(
+        self,
+        pool_limit: int = HTTP_POOL_LIMIT,
+        host_connections: int = HTTP_HOST_CONNECTIONS,
+        host_rps: float = HTTP_HOST_RPS,
+        timeout: float = HTTP_TIMEOUT,
+        max_retries: int = HTTP_MAX_RETRIES,
+        cache_max_entries: int = HTTP_CACHE_MAX_ENTRIES,
+    ):
+        self.pool_limit = pool_limit
+        self.host_connections = host_connections
+        self.host_rps = host_rps
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.cache_max_entries = cache_max_entries
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._rate_limiters: Dict[str, _HostRateLimiter] = {}
+        # url -> (etag, last_modified, стиснуте тіло або None (тіло на диску), кодування, хеш вмісту)
+        self._validators: "OrderedDict[str, Tuple[Optional[str], Optional[str], Optional[bytes], Optional[str], Optional[str]]]" = OrderedDict()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+        # host -> url -> (хеш вмісту, etag, last_modified) сторінок з track_pages до pop_pages
+        self._pages: Dict[str, Dict[str, Tuple[str, Optional[str], Optional[str]]]] = {}
+        self._page_store: Optional[DiskCache] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_limit,
+                limit_per_host=self.host_connections,
+                ttl_dns_cache=300,
+                keepalive_timeout=30,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=10),
+            )
+        return self._session
+
+    async def __aenter__(self) -> "HttpClient":
+        # Контекст нічого не закриває - пул спільний для всіх парсерів
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    def get(self, url: str) -> _RequestContext:
+        return _RequestContext(self, url)
+
+    @property
+    def page_store(self) -> DiskCache:
+        if self._page_store is None:
+            self._page_store = DiskCache(CRAWL_PAGE_CACHE_DIR, CRAWL_PAGE_CACHE_TTL, CRAWL_PAGE_CACHE_MAX_BYTES)
+        return self._page_store
+
+    def preload(self, validators: Dict[str, Tuple[Optional[str], Optional[str], Optional[str]]]) -> None:
+        """
+        Валідатори сторінок з попередніх запусків: url -> (etag, last_modified, хеш вмісту).
+        Тіло при 304 читається з диска за хешем; сторінки, вже відомі в пам'яті, не перезаписуються.
+        """
+        for url, (etag, last_modified, content_hash) in validators.items():
+            if url not in self._validators and (etag or last_modified):
+                self._validators[url] = (etag, last_modified, None, None, content_hash)
+        while len(self._validators) > self.cache_max_entries:
+            self._validators.popitem(last=False)
+
+    def track_pages(self, host: str) -> None:
+        """Починає облік сторінок хоста (для crawl_state), до виклику pop_pages."""
+        self._pages[host] = {}
+
+    def pop_pages(self, host: str) -> Dict[str, Tuple[str, Optional[str], Optional[str]]]:
+        """Сторінки хоста з моменту track_pages: url -> (хеш вмісту, etag, last_modified). Облік зупиняється."""
+        return self._pages.pop(host, {})
+
+    def _track(self, url: str, content_hash: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        pages = self._pages.get(urlsplit(url).netloc)
+        if pages is not None:
+            pages[url] = (content_hash, etag, last_modified)
+
+    def _host_metrics(self, host: str) -> Dict[str, float]:
+        if host not in self._metrics:
+            self._metrics[host] = {
+                "requests": 0, "retries": 0, "errors": 0, "not_modified": 0, "bytes": 0, "time": 0.0,
+            }
+        return self._metrics[host]
+
+    def _rate_limiter(self, host: str) -> _HostRateLimiter:
+        if host not in self._rate_limiters:
+            self._rate_limiters[host] = _HostRateLimiter(HOST_RPS.get(host, self.host_rps))
+        return self._rate_limiters[host]
+
+    def _remember(self, url: str, response: aiohttp.ClientResponse, body: bytes, content_hash: str, persist: bool) -> None:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        self._track(url, content_hash, etag, last_modified)
+        if not etag and not last_modified:
+            return
+        compressed = zlib.compress(body)
+        if persist:
+            # Ключ - хеш вмісту: та сама сторінка з іншим ETag не пишеться вдруге
+            self.page_store.set(content_hash, {
+                "body": base64.b64encode(compressed).decode("ascii"),
+                "encoding": response.charset,
+            })
+        self._validators[url] = (etag, last_modified, compressed, response.charset, content_hash)
+        self._validators.move_to_end(url)
+        while len(self._validators) > self.cache_max_entries:
+            self._validators.popitem(last=False)
+
+    def _cached_body(self, cached: Tuple) -> Optional[Tuple[bytes, Optional[str]]]:
+        _, _, compressed, encoding, content_hash = cached
+        if compressed is not None:
+            return zlib.decompress(compressed), encoding
+        stored = self.page_store.get(content_hash) if content_hash else None
+        if stored is None:
+            return None
+        return zlib.decompress(base64.b64decode(stored["body"])), stored["encoding"]
+
+    async def fetch(self, url: str) -> HttpResponse:
+        """
+        GET з лімітами, повторами та умовними запитами.
+
+        Raises:
+            aiohttp.ClientError / asyncio.TimeoutError, якщо всі спроби невдалі
+        """
+        host = urlsplit(url).netloc
+        metrics = self._host_metrics(host)
+
+        for attempt in range(self.max_retries + 1):
+            await self._rate_limiter(host).acquire()
+
+            headers = get_headers()
+            cached = self._validators.get(url)
+            if cached:
+                etag, last_modified = cached[0], cached[1]
+                if etag:
+                    headers["If-None-Match"] = etag
+                if last_modified:
+                    headers["If-Modified-Since"] = last_modified
+
+            started = time.perf_counter()
+            retry_after = None
+            refetch = False
+            try:
+                metrics["requests"] += 1
+                async with self.session.get(url, headers=headers) as response:
+                    body = await response.read()
+                    status = response.status
+                    metrics["bytes"] += len(body)
+                    stored = self._cached_body(cached) if status == 304 and cached else None
+                    if status == 200:
+                        content_hash = hashlib.sha1(body).hexdigest()
+                        # На диск - нова сторінка або та, чиє тіло є лише на диску (могло бути видалене)
+                        persist = not cached or cached[4] != content_hash or cached[2] is None
+                        self._remember(url, response, body, content_hash, persist)
+                        result = HttpResponse(url, status, body, response.charset)
+                    elif stored is not None:
+                        metrics["not_modified"] += 1
+                        self._validators.move_to_end(url)
+                        self._track(url, cached[4], cached[0], cached[1])
+                        result = HttpResponse(url, 200, stored[0], stored[1], from_cache=True)
+                    elif status == 304 and cached:
+                        # Тіло сторінки вже видалене з диска - наступна спроба без валідаторів
+                        self._validators[url] = (None, None, None, None, cached[4])
+                        result = HttpResponse(url, status, body, response.charset) if attempt == self.max_retries else None
+                        refetch = True
+                    else:
+                        result = HttpResponse(url, status, body, response.charset)
+                        retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                metrics["errors"] += 1
+                if attempt == self.max_retries:
+                    raise
+                result = None
+                print(f"⚠️ {host}: {type(e).__name__} {e}, спроба {attempt + 1}/{self.max_retries}")
+            finally:
+                metrics["time"] += time.perf_counter() - started
+
+            if result is not None and (result.status not in RETRY_STATUSES or attempt == self.max_retries):
+                return result
+
+            metrics["retries"] += 1
+            if refetch:
+                continue
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else 2 ** attempt + random.uniform(0, 1)
+            await asyncio.sleep(delay)
+
+        raise RuntimeError("unreachable")
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Метрики по хостах (середній час відповіді в мс)."""
+        return {
+            host: {
+                **{key: value for key, value in metrics.items() if key != "time"},
+                "avg_ms": round(metrics["time"] / metrics["requests"] * 1000, 1) if metrics["requests"] else None,
+            }
+            for host, metrics in self._metrics.items()
+        }
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+_client: Optional[HttpClient] = None
+_client_loop = None
+
+
+def get_http_client() -> HttpClient:
+    """Спільний клієнт поточного event loop (Celery/скрипти запускають свій loop)."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = HttpClient()
+        _client_loop = loop
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client, _client_loop
+    if _client is not None:
+        await _client.close()
+    _client = None
+    _client_loop = None
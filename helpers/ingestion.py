@@ -0,0 +1,218 @@
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List, Optional, Union
+
+from db.database import SessionLocal
+from db.models import (
+    Batteries,
+    CurrentBatteries,
+    SollarPanels,
+    SollarPanelsCurrent,
+    Inverters,
+    CurrentInverters,
+)
+from helpers.brand import resolve_brand_ids, normalize_brand_name, publish_staged_brands, discard_staged_brands
+from helpers.suplier import get_or_create_supplier
+from helpers.competitors import get_or_create_competitor
+from helpers.me import get_or_create_me
+from helpers.bulk_upsert import upsert_batch, DEFAULT_BATCH_SIZE
+from helpers.history import record_history_stats
+from helpers.product_matching import PRODUCT_MATCHING, assign_product_ids
+from helpers.market_aggregates import refresh_market_aggregates
+from helpers.query_cache import bump_generation
+from helpers.normalization import coerce_number
+
+
+@dataclass(frozen=True)
+class ProductSchema:
+    """
+    Опис продукту для пайплайна імпорту.
+
+    product: ключ продукту для helpers (brand/suplier/competitors/me)
+    history_model: таблиця історії цін
+    current_model: таблиця поточних цін
+    map_entry: перетворює запис від парсера у значення колонок (без brand_id/supplier_id),
+        приводячи поля до типів колонок; None - запис без ціни, пропускається
+    """
+    product: str
+    history_model: Any
+    current_model: Any
+    map_entry: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+
+def _to_str(value, default=None):
+    # "4" і 4 від LLM мають бути одним значенням, інакше порівняння з історією бачить зміну
+    return str(value).strip() if value is not None and value != "" else default
+
+
+def map_battery(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    price = coerce_number(entry.get("price"))
+    if price is None:
+        return None
+    return {
+        "name": entry.get("name"),
+        "price": price,
+        "volume": coerce_number(entry.get("volume")),
+        "full_name": entry.get("full_name"),
+        "c_amps": coerce_number(entry.get("c_amps"), int),
+        "region": entry.get("region"),
+        "polarity": entry.get("polarity"),
+        "electrolyte": entry.get("electrolyte"),
+    }
+
+
+def map_sollar_panel(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    price = coerce_number(entry.get("price"))
+    if price is None:
+        return None
+    power = coerce_number(entry.get("power"))
+    return {
+        "name": entry.get("name"),
+        "price": price,
+        "price_per_w": round(price / power, 2) if power else None,
+        "power": power,
+        "full_name": entry.get("full_name"),
+        "panel_type": entry.get("panel_type"),
+        "cell_type": entry.get("cell_type"),
+        "thickness": coerce_number(entry.get("thickness")),
+    }
+
+
+def map_inverter(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    price = coerce_number(entry.get("price"))
+    if price is None:
+        return None
+    return {
+        "name": entry.get("name"),
+        "price": price,
+        "full_name": entry.get("full_name"),
+        "inverter_type": _to_str(entry.get("inverter_type")),
+        "generation": _to_str(entry.get("generation")),
+        "string_count": coerce_number(entry.get("string_count"), int),
+        "firmware": _to_str(entry.get("firmware")),
+        "power": coerce_number(entry.get("power")),
+    }
+
+
+PRODUCT_SCHEMAS = {
+    "batteries": ProductSchema("batteries", Batteries, CurrentBatteries, map_battery),
+    "sollar_panels": ProductSchema("sollar_panels", SollarPanels, SollarPanelsCurrent, map_sollar_panel),
+    "inverters": ProductSchema("inverters", Inverters, CurrentInverters, map_inverter),
+}
+
+# Як шукати/створювати постачальника залежно від джерела даних
+SUPPLIER_RESOLVERS = {
+    "supplier": get_or_create_supplier,
+    "competitor": get_or_create_competitor,
+    "me": get_or_create_me,
+}
+
+
+async def _iter_batches(data: Union[Iterable, AsyncIterable], batch_size: int):
+    """Розбиває (синхронний або асинхронний) потік записів на батчі, не матеріалізуючи його цілком."""
+    batch = []
+    if hasattr(data, "__aiter__"):
+        async for entry in data:
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    else:
+        for entry in data or []:
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+async def ingest_products(
+    data: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+    product: str,
+    supplier_name: str,
+    supplier_kind: str = "supplier",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Спільний пайплайн імпорту для всіх продуктів:
+    запис парсера -> бренд -> рядок колонок -> батч (історія + upsert поточної таблиці) -> commit.
+
+    Args:
+        data: Записи від парсера (список, генератор або асинхронний генератор)
+        product: "batteries", "sollar_panels" або "inverters"
+        supplier_name: Назва постачальника/конкурента
+        supplier_kind: "supplier", "competitor" або "me"
+        batch_size: Кількість рядків в одному батчі
+
+    Returns:
+        Статистика імпорту з розбивкою по батчах
+    """
+    if product not in PRODUCT_SCHEMAS:
+        raise ValueError("Неверный тип продукта")
+    if supplier_kind not in SUPPLIER_RESOLVERS:
+        raise ValueError(f"Невідомий тип постачальника: {supplier_kind}")
+    schema = PRODUCT_SCHEMAS[product]
+
+    started = time.perf_counter()
+    stats = {"rows": 0, "skipped": 0, "history_rows": 0, "upserted": 0, "new_products": 0, "batches": []}
+
+    # Создаем новую сессию для каждой операции
+    session = SessionLocal()
+    try:
+        supplier_id = await SUPPLIER_RESOLVERS[supplier_kind](session, supplier_name, product)
+
+        async for batch in _iter_batches(data, batch_size):
+            # Запис без ціни пропускається, а не валить весь батч
+            mapped = [(entry, schema.map_entry(entry)) for entry in batch]
+            mapped = [(entry, values) for entry, values in mapped if values is not None]
+            stats["skipped"] += len(batch) - len(mapped)
+            if not mapped:
+                continue
+            brands = [entry.get("brand") for entry, _ in mapped]
+            # Усі бренди батчу одним запитом (+ один INSERT для нових)
+            brand_ids = await resolve_brand_ids(session, brands, product)
+            rows: List[Dict[str, Any]] = [
+                {
+                    **values,
+                    "brand_id": brand_ids[normalize_brand_name(entry.get("brand"))],
+                    "supplier_id": supplier_id,
+                }
+                for entry, values in mapped
+            ]
+            if PRODUCT_MATCHING:
+                matching = await assign_product_ids(session, product, rows, brands)
+                stats["new_products"] += matching["created"]
+
+            batch_stats = await upsert_batch(session, schema.history_model, schema.current_model, rows)
+            await session.commit()
+            publish_staged_brands(session)
+
+            stats["rows"] += batch_stats["rows"]
+            stats["history_rows"] += batch_stats["history_rows"]
+            stats["upserted"] += batch_stats["upserted"]
+            stats["batches"].append(batch_stats)
+            print(
+                f"💾 {product}: батч {len(stats['batches'])} - {batch_stats['rows']} рядків "
+                f"({batch_stats['history_rows']} в історію) за {batch_stats['elapsed']} сек."
+            )
+
+        # Коміт для постачальника/брендів і лічильників історії, навіть якщо записів не було
+        await record_history_stats(session, product, observed=stats["rows"], written=stats["history_rows"])
+        await session.commit()
+        publish_staged_brands(session)
+    except Exception as e:
+        # Откатываем изменения в случае ошибки
+        await session.rollback()
+        # Нові бренди з цього батчу не потрапили в базу
+        discard_staged_brands(session)
+        raise e
+    finally:
+        # Всегда закрываем сессию
+        await session.close()
+        # Батчі комітяться по одному, тож агрегати оновлюємо і кеш відповідей скидаємо і після помилки
+        await refresh_market_aggregates(product)
+        await bump_generation(product)
+
+    stats["elapsed"] = round(time.perf_counter() - started, 4)
+    return stats
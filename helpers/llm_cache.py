@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from helpers.disk_cache import DiskCache
+from helpers.llm_scheduler import get_scheduler
+
+load_dotenv()
+
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600)))  # 30 днів
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_MB", "200")) * 1024 * 1024
+
+
+def _model_fingerprint(model) -> Tuple[str, str]:
+    """Назва моделі та generation config (для genai.GenerativeModel і фейкових моделей)."""
+    model_name = getattr(model, "model_name", type(model).__name__)
+    generation_config = getattr(model, "_generation_config", None) or {}
+    return str(model_name), json.dumps(generation_config, sort_keys=True, default=str)
+
+
+class LLMCache(DiskCache):
+    """
+    Кеш розпарсених відповідей LLM на диску, адресований вмістом:
+    ключ = sha256(версія промпту + модель + generation config + текст промпту з чанком).
+
+    Незмінений чанк файлу чи сторінки конкурента повертається з кешу без запиту до API.
+    Записи старші за TTL видаляються, при перевищенні розміру - найстаріші.
+    """
+
+    def __init__(self, directory: str = LLM_CACHE_DIR, ttl: int = LLM_CACHE_TTL, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        super().__init__(directory, ttl, max_bytes)
+
+    def make_key(self, prompt_version: str, model, prompt: Any) -> str:
+        model_name, generation_config = _model_fingerprint(model)
+        digest = hashlib.sha256()
+        for part in (prompt_version, model_name, generation_config, str(prompt)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+
+_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> LLMCache:
+    global _cache
+    if _cache is None:
+        _cache = LLMCache()
+    return _cache
+
+
+async def run_cached(
+    model,
+    prompt_version: str,
+    prompts: Sequence[Any],
+    parse_response: Callable[[int, Optional[str]], List[Dict]],
+) -> List[List[Dict]]:
+    """
+    Виконує промпти через планувальник, пропускаючи ті, що вже є в кеші.
+
+    Returns:
+        Розпарсені результати в порядку промптів
+    """
+    cache = get_llm_cache()
+    keys = [cache.make_key(prompt_version, model, prompt) for prompt in prompts]
+    results: List[Optional[List[Dict]]] = [cache.get(key) for key in keys]
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        responses = await get_scheduler().run(model, [prompts[i] for i in missing])
+        for i, response_text in zip(missing, responses):
+            parsed = parse_response(i, response_text)
+            # Порожній результат може бути помилкою парсингу - такі не кешуємо
+            if response_text is not None and parsed:
+                cache.set(keys[i], parsed)
+            results[i] = parsed
+
+    print(f"🗄 LLM кеш: {len(prompts) - len(missing)} з {len(prompts)} блоків з кешу ({cache.stats})")
+    return results
+
+
+def generate_cached(
+    model,
+    prompt_version: str,
+    prompt: Any,
+    parse_response: Callable[[int, Optional[str]], List[Dict]],
+    index: int = 0,
+) -> Tuple[List[Dict], bool]:
+    """
+    Синхронний варіант для одного промпту (блокує потік; з async-коду - через asyncio.to_thread).
+
+    Returns:
+        (розпарсений результат, чи взято з кешу)
+    """
+    cache = get_llm_cache()
+    key = cache.make_key(prompt_version, model, prompt)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, True
+
+    # Через спільний планувальник: ті самі RPM/TPM і повтори при 429, що й у run_cached
+    response_text = get_scheduler().generate_sync(model, prompt, index)
+    if response_text is None:
+        return [], False
+
+    parsed = parse_response(index, response_text)
+    if parsed:
+        cache.set(key, parsed)
+    return parsed, False
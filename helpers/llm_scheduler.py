@@ -0,0 +1,202 @@
+import asyncio
+import os
+import re
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Sequence
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Ліміти Gemini API (за замовчуванням - безкоштовний тариф gemini-1.5-flash)
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "15"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "4"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+
+_RETRY_DELAY_PATTERN = re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Груба оцінка кількості токенів без виклику API.
+    Для кирилиці та HTML ~3 символи на токен (з запасом, щоб не перевищити TPM).
+    """
+    return max(1, len(text) // 3)
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    return "429" in str(error) or type(error).__name__ == "ResourceExhausted"
+
+
+def _get_retry_delay(error: Exception) -> Optional[int]:
+    """Витягує retry_delay { seconds: N } з помилки 429, якщо API його повернув."""
+    match = _RETRY_DELAY_PATTERN.search(str(error))
+    return int(match.group(1)) if match else None
+
+
+class TokenBucket:
+    """
+    Token bucket з поповненням «на хвилину» (RPM/TPM).
+    Ємність = ліміт за хвилину, поповнення рівномірне: ліміт / 60 за секунду.
+    Спільний для кількох event loop (async-код і синхронні виклики), тому стан під threading.Lock.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        # Запит, більший за ємність, чекає на повний bucket, а не вічно
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait_time = (amount - self.tokens) / self.rate
+            await asyncio.sleep(wait_time)
+
+    def drain(self) -> None:
+        """Обнуляє bucket (після 429 - даємо квоті відновитись для всіх задач)."""
+        with self._lock:
+            self._refill()
+            self.tokens = 0.0
+
+
+class LLMScheduler:
+    """
+    Планувальник запитів до LLM для async-коду:
+    - token bucket по запитах (RPM) і токенах (TPM);
+    - обмежена кількість одночасних запитів;
+    - повтор при 429 з урахуванням retry_delay від API;
+    - результати повертаються в порядку вхідних промптів.
+
+    Блокуючий model.generate_content виконується в пулі потоків, тому event loop FastAPI
+    не зупиняється. Синхронний код (фільтри, парсери CSV) ходить через generate_sync -
+    ті самі ліміти й повтори, запит виконується на окремому фоновому loop. Модель - будь-який об'єкт з generate_content(prompt) -> obj.text,
+    тож у тестах можна передати локальну фейкову модель.
+    """
+
+    def __init__(
+        self,
+        rpm: int = GEMINI_RPM,
+        tpm: int = GEMINI_TPM,
+        concurrency: int = GEMINI_CONCURRENCY,
+        max_retries: int = GEMINI_MAX_RETRIES,
+        base_retry_delay: float = 10.0,
+    ):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_retry_delay = base_retry_delay
+        self.stats = {"requests": 0, "retries": 0, "failed": 0}
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._sync_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sync_lock = threading.Lock()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Семафор прив'язаний до event loop (Celery/скрипти запускають свій loop, синхронні виклики - фоновий)
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+    def _get_sync_loop(self) -> asyncio.AbstractEventLoop:
+        """Фоновий event loop (потік-демон) для запитів із синхронного коду."""
+        with self._sync_lock:
+            if self._sync_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-scheduler", daemon=True).start()
+                self._sync_loop = loop
+            return self._sync_loop
+
+    async def generate(self, model, prompt: Any, index: int = 0) -> Optional[str]:
+        """
+        Виконує один запит з лімітами та повторами.
+
+        Returns:
+            Текст відповіді або None, якщо всі спроби невдалі
+        """
+        prompt_tokens = estimate_tokens(prompt if isinstance(prompt, str) else str(prompt))
+
+        async with self._get_semaphore():
+            for attempt in range(self.max_retries + 1):
+                await self.requests.acquire(1)
+                await self.tokens.acquire(prompt_tokens)
+                try:
+                    self.stats["requests"] += 1
+                    response = await asyncio.to_thread(model.generate_content, prompt)
+                    return response.text
+                except Exception as e:
+                    if not _is_rate_limit_error(e) or attempt == self.max_retries:
+                        self.stats["failed"] += 1
+                        print(f"❌ Помилка на блоці {index}: {e}")
+                        return None
+
+                    self.stats["retries"] += 1
+                    retry_delay = _get_retry_delay(e)
+                    wait_time = retry_delay + 1 if retry_delay is not None else self.base_retry_delay * (2 ** attempt)
+                    self.requests.drain()
+                    print(f"⚠️ 429 на блоці {index}, спроба {attempt + 1}/{self.max_retries}. Очікування {wait_time} секунд...")
+                    await asyncio.sleep(wait_time)
+        return None
+
+    def generate_sync(self, model, prompt: Any, index: int = 0) -> Optional[str]:
+        """
+        generate для синхронного коду: блокує потік, доки запит не пройде ліміти й повтори.
+        З event loop не викликати - використовуйте generate/run або asyncio.to_thread.
+
+        Returns:
+            Текст відповіді або None, якщо всі спроби невдалі
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("generate_sync викликано з event loop - використовуйте await generate()")
+        future = asyncio.run_coroutine_threadsafe(self.generate(model, prompt, index), self._get_sync_loop())
+        return future.result()
+
+    async def run(self, model, prompts: Sequence[Any]) -> List[Optional[str]]:
+        """
+        Виконує всі промпти паралельно в межах квоти.
+
+        Returns:
+            Відповіді в тому ж порядку, що й промпти (None для невдалих)
+        """
+        started = time.perf_counter()
+        results = await asyncio.gather(*[
+            self.generate(model, prompt, index) for index, prompt in enumerate(prompts)
+        ])
+        print(f"⏱ {len(prompts)} запитів до LLM виконано за {time.perf_counter() - started:.1f} сек.")
+        return list(results)
+
+
+# Один планувальник на процес - квота Gemini спільна для всіх парсерів
+_schedulers: Dict[str, LLMScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(name: str = "gemini") -> LLMScheduler:
+    # Синхронні фільтри звертаються з кількох потоків одночасно
+    with _schedulers_lock:
+        if name not in _schedulers:
+            _schedulers[name] = LLMScheduler()
+        return _schedulers[name]
@@ -0,0 +1,125 @@
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from dotenv import load_dotenv
+from sqlalchemy import column, select, table, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import SessionLocal
+from helpers.brand import normalize_brand_name
+from helpers.product_matching import PRODUCT_SPECS
+
+load_dotenv()
+
+# Оновлювати агрегати ринку після імпорту (матеріалізовані представлення з міграції d6f3b8a2c419)
+MARKET_AGGREGATES = os.getenv("MARKET_AGGREGATES", "1") == "1"
+# Скільки наборів характеристик додавати в промпт аналітики
+MARKET_PROMPT_LIMIT = 50
+
+MARKET_VIEWS = {
+    product: {
+        "specs": f"market_spec_stats_{product}",
+        "suppliers": f"market_supplier_coverage_{product}",
+        "brands": f"market_brand_index_{product}",
+    }
+    for product in ("batteries", "sollar_panels")
+}
+# Сортування читальних ендпоінтів (колонка, спадання)
+MARKET_SORTS = {
+    "specs": ("offers", True),
+    "suppliers": ("specs", True),
+    "brands": ("price_index", True),
+}
+
+
+def _view(product: str, kind: str) -> str:
+    if product not in MARKET_VIEWS:
+        raise ValueError("Неверный тип продукта")
+    return MARKET_VIEWS[product][kind]
+
+
+async def refresh_market_aggregates(product: str) -> Optional[float]:
+    """
+    Перераховує агрегати продукту з поточної таблиці. CONCURRENTLY - читачі бачать попередні дані
+    до кінця перерахунку, а не чекають на нього. Помилки не ламають імпорт (агрегати оновить наступний).
+
+    Returns:
+        Час оновлення в секундах або None, якщо агрегатів для продукту немає чи оновлення не вдалося
+    """
+    if not MARKET_AGGREGATES or product not in MARKET_VIEWS:
+        return None
+    started = time.perf_counter()
+    try:
+        async with SessionLocal() as session:
+            for view in MARKET_VIEWS[product].values():
+                await session.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+                await session.commit()
+    except Exception as e:
+        print(f"⚠️ Агрегати ринку {product} не оновлено: {e}")
+        return None
+    elapsed = round(time.perf_counter() - started, 2)
+    print(f"📊 Агрегати ринку {product} оновлено за {elapsed} сек.")
+    return elapsed
+
+
+async def get_market_aggregate(
+    session: AsyncSession,
+    product: str,
+    kind: str,
+    brand_ids: Optional[List[int]] = None,
+    only_ours: bool = False,
+    limit: int = 100,
+    offset: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Рядки агрегату ринку.
+
+    Args:
+        product: "batteries" або "sollar_panels"
+        kind: "specs" (ціни по характеристиках), "suppliers" (покриття постачальників), "brands" (цінові індекси брендів)
+        brand_ids: Лише ці бренди (specs, brands)
+        only_ours: Лише набори характеристик, які продаємо ми (specs)
+    """
+    sort_column, descending = MARKET_SORTS[kind]
+    query = select(text("*")).select_from(table(_view(product, kind)))
+    if brand_ids and kind != "suppliers":
+        query = query.where(column("brand_id").in_(brand_ids))
+    if only_ours and kind == "specs":
+        query = query.where(column("our_price").is_not(None))
+    order = column(sort_column).desc().nulls_last() if descending else column(sort_column)
+    query = query.order_by(order).limit(limit).offset(offset)
+    result = await session.execute(query)
+    return [dict(row) for row in result.mappings().all()]
+
+
+async def market_context(session: AsyncSession, product: str, items: Sequence[Any]) -> List[Dict[str, Any]]:
+    """
+    Ринок для товарів з запиту аналітики: рядки агрегату з тим самим брендом і характеристиками.
+    Без агрегатів (база без міграції) - порожньо, аналітика працює як раніше.
+    """
+    spec = PRODUCT_SPECS.get(product)
+    if not spec or product not in MARKET_VIEWS or not items:
+        return []
+    keys = set()
+    for item in items:
+        values = item if isinstance(item, dict) else getattr(item, "__dict__", {})
+        if not values.get("brand") or any(values.get(name) is None for name in spec):
+            continue
+        keys.add((normalize_brand_name(values["brand"]), *[values[name] for name in spec]))
+    if not keys:
+        return []
+
+    columns = [column("brand"), *[column(name) for name in spec]]
+    query = (
+        select(text("*"))
+        .select_from(table(_view(product, "specs")))
+        .where(tuple_(*columns).in_(list(keys)[:MARKET_PROMPT_LIMIT]))
+    )
+    try:
+        result = await session.execute(query)
+    except Exception as e:
+        await session.rollback()
+        print(f"⚠️ Агрегати ринку {product} недоступні: {e}")
+        return []
+    return [dict(row) for row in result.mappings().all()]
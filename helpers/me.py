@@ -2,6 +2,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.models import BatteriesSuppliers, SollarPanelsSuppliers, InvertersSuppliers
 from typing import Optional
+from helpers.suplier import get_cached_supplier_id, cache_supplier_id
 
 async def get_or_create_me(session: AsyncSession, suplier_name: str, product: str = "batteries") -> int:
 
@@ -18,11 +19,16 @@ async def get_or_create_me(session: AsyncSession, suplier_name: str, product: st
     
     suplier_name_upper = suplier_name.strip().upper()
     
+    cached_id = get_cached_supplier_id(product, suplier_name_upper)
+    if cached_id is not None:
+        return cached_id
+    
     query = select(suplier_model).where(suplier_model.name == suplier_name_upper)
     result = await session.execute(query)
     suplier = result.scalar_one_or_none()
     
     if suplier:
+        cache_supplier_id(product, suplier_name_upper, suplier.id)
         return suplier.id
     
     new_suplier = suplier_model(name=suplier_name_upper, is_me=True, is_supplier=False, is_competitor=False)
@@ -0,0 +1,157 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Числові поля продуктів і їх типи
+NUMERIC_FIELDS = {
+    "batteries": {"volume": float, "price": float, "c_amps": int},
+    "sollar_panels": {"power": float, "price": float, "thickness": float},
+    "inverters": {"price": float, "string_count": int, "power": int},
+}
+
+# Продукти, які без ціни не імпортуються (так само робив LLM-фільтр)
+DROP_ZERO_PRICE = {"sollar_panels", "inverters"}
+
+MIN_NAME_LENGTH = 3
+MAX_NAME_TOKENS = 5
+
+# Слова, які не несуть інформації про модель
+GENERIC_WORDS = {
+    "АКУМУЛЯТОР", "АККУМУЛЯТОР", "АКБ", "БАТАРЕЯ", "BATTERY", "АВТОМОБІЛЬНИЙ", "АВТОМОБИЛЬНЫЙ",
+    "СОНЯЧНА", "СОЛНЕЧНАЯ", "ПАНЕЛЬ", "ПАНЕЛІ", "SOLAR", "PANEL", "МОДУЛЬ", "MODULE",
+    "ІНВЕРТОР", "ИНВЕРТОР", "INVERTER", "ГІБРИДНИЙ", "ГИБРИДНЫЙ", "HYBRID",
+}
+
+# Пробіл між тисячами - лише перед рівно трьома цифрами; звичайний пробіл - ще й лише перед дробовою
+# частиною чи валютою, бо "60 540" - це ємність і струм поруч, а не 60540
+_NUMBER_RE = re.compile(
+    r"-?(?:\d{1,3}(?:\u00a0\d{3}(?!\d))+"
+    r"|\d{1,3}(?: \d{3}(?!\d))+(?=[.,]\d|\s*(?:грн|uah|₴|\$|€))"
+    r"|\d+)(?:[.,]\d+)?",
+    re.IGNORECASE,
+)
+# Пусковий струм: "540A EN", "540 EN", "EN 540" (спільні з services/batteries/parsers/rule_parser.py)
+EN_CURRENT_RE = re.compile(r"(?<!\d)(\d{3,4})\s*(?:A|А)?\s*\(?\s*EN\b|\bEN\s*:?\s*(\d{3,4})(?!\d)", re.IGNORECASE)
+# "540A" без EN: лише якщо після A немає h/г/ч (інакше це ємність)
+A_CURRENT_RE = re.compile(r"(?<![\d.,])(\d{3,4})\s*(?:A|А)(?![a-zа-яіїє/*])", re.IGNORECASE)
+_TOKEN_STRIP = " ,.;:()[]\"'"
+
+
+def coerce_number(value: Any, cast=float) -> Optional[float]:
+    """
+    Приводить значення до числа: 60, "60", "60Ah", "1 234,50 грн".
+
+    Returns:
+        Число або None, якщо значення порожнє або в ньому немає числа
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return cast(value)
+    match = _NUMBER_RE.search(str(value))
+    if not match:
+        return None
+    number = float(match.group(0).replace(" ", "").replace("\u00a0", "").replace(",", "."))
+    return cast(round(number)) if cast is int else number
+
+
+def extract_en_current(full_name: str) -> int:
+    """Пусковий струм з повної назви (число перед EN або A), 0 якщо не знайдено."""
+    match = EN_CURRENT_RE.search(full_name or "")
+    if match:
+        return int(match.group(1) or match.group(2))
+    match = A_CURRENT_RE.search(full_name or "")
+    return int(match.group(1)) if match else 0
+
+
+def is_generic_name(name: Optional[str], brand: Optional[str]) -> bool:
+    name = (name or "").strip().upper()
+    return (
+        len(name) < MIN_NAME_LENGTH
+        or name == (brand or "").strip().upper()
+        or name in GENERIC_WORDS
+    )
+
+
+def synthesize_name(brand: str, full_name: str) -> str:
+    """
+    Назва з бренду та ключових слів повної назви (без бренду і загальних слів).
+
+    Returns:
+        "BRAND слово1 слово2 ..." або порожній рядок, якщо ключових слів немає
+    """
+    brand_upper = brand.strip().upper()
+    brand_tokens = set(brand_upper.split())
+    keywords = []
+    for token in (full_name or "").split():
+        token = token.strip(_TOKEN_STRIP)
+        if not token or token.upper() in GENERIC_WORDS or token.upper() in brand_tokens:
+            continue
+        keywords.append(token)
+        if len(keywords) >= MAX_NAME_TOKENS:
+            break
+    return f"{brand.strip()} {' '.join(keywords)}" if keywords else ""
+
+
+def normalize_entry(entry: Dict[str, Any], product: str) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Локально виправляє запис парсера.
+
+    Returns:
+        (запис, шлях): шлях "local" - виправлено правилами, "llm" - правила не впорались
+        (повертається оригінальний запис), "dropped" - запис без ціни відкинуто (запис None)
+    """
+    normalized = dict(entry)
+
+    for field, cast in NUMERIC_FIELDS[product].items():
+        raw = entry.get(field)
+        # Порожнє поле - 0, як і раніше (без ціни запис відкидається, без струму - береться з назви)
+        value = cast(0) if raw is None or raw == "" else coerce_number(raw, cast)
+        if value is None:
+            return entry, "llm"
+        normalized[field] = value
+
+    if product in DROP_ZERO_PRICE and not normalized["price"]:
+        return None, "dropped"
+
+    brand = (entry.get("brand") or "").strip()
+    full_name = (entry.get("full_name") or "").strip()
+    if not brand or not full_name:
+        return entry, "llm"
+
+    if is_generic_name(entry.get("name"), brand):
+        name = synthesize_name(brand, full_name)
+        if is_generic_name(name, brand):
+            return entry, "llm"
+        normalized["name"] = name
+
+    if product == "batteries" and not normalized["c_amps"]:
+        normalized["c_amps"] = extract_en_current(full_name)
+
+    return normalized, "local"
+
+
+def normalize_products(data: List[Dict[str, Any]], product: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Локальна нормалізація замість другого проходу через LLM.
+
+    Args:
+        data: Записи від парсера
+        product: "batteries", "sollar_panels" або "inverters"
+
+    Returns:
+        (виправлені записи, записи для LLM, лічильники {"local", "llm", "dropped"})
+    """
+    if product not in NUMERIC_FIELDS:
+        raise ValueError("Неверный тип продукта")
+
+    resolved = []
+    unresolved = []
+    stats = {"local": 0, "llm": 0, "dropped": 0}
+    for entry in data or []:
+        normalized, path = normalize_entry(entry, product)
+        stats[path] += 1
+        if path == "local":
+            resolved.append(normalized)
+        elif path == "llm":
+            unresolved.append(normalized)
+    return resolved, unresolved, stats
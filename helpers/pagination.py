@@ -0,0 +1,111 @@
+import base64
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+load_dotenv()
+
+# Скільки секунд тримати точну кількість рядків для тих самих фільтрів
+LISTING_COUNT_TTL = float(os.getenv("LISTING_COUNT_TTL", "60"))
+LISTING_COUNT_CACHE_SIZE = 1000
+
+# SQL запиту підрахунку -> (кількість, час обчислення)
+_counts: Dict[str, Tuple[int, float]] = {}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, row_id: int) -> str:
+    """Непрозорий курсор: значення колонки сортування і id останнього рядка сторінки."""
+    payload = json.dumps({"s": sort_by, "o": sort_order, "v": value, "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], sort_by: str, sort_order: str) -> Dict[str, Any]:
+    """
+    Розбирає курсор (порожній - перша сторінка).
+
+    Raises:
+        InvalidCursor: пошкоджений курсор або курсор іншого сортування
+    """
+    if not cursor:
+        return {}
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        position = {"value": payload["v"], "id": int(payload["id"])}
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor("Невірний курсор")
+    if payload.get("s") != sort_by or payload.get("o") != sort_order:
+        raise InvalidCursor("Курсор належить іншому сортуванню - почніть з першої сторінки")
+    return position
+
+
+def paginate_keyset(query, sort_column, id_column, position: Dict[str, Any], descending: bool, page_size: int):
+    """
+    Сторінка після position за (колонка сортування, id), на рядок більше - щоб знати, чи є наступна.
+    Умова записана через окреме порівняння колонки сортування, щоб її індекс обмежував діапазон
+    (порівняння кортежів Postgres використовує лише індекс саме на (колонка, id)).
+    """
+    if position:
+        value, row_id = position["value"], position["id"]
+        if descending:
+            query = query.where(
+                sort_column <= value,
+                or_(sort_column < value, and_(sort_column == value, id_column < row_id)),
+            )
+        else:
+            query = query.where(
+                sort_column >= value,
+                or_(sort_column > value, and_(sort_column == value, id_column > row_id)),
+            )
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+    return query.limit(page_size + 1)
+
+
+def _count_key(count_query) -> str:
+    return str(count_query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+async def count_rows(session: AsyncSession, count_query, estimate_query, exact: bool) -> Tuple[int, bool]:
+    """
+    Кількість рядків для списку: точна з кешу (LISTING_COUNT_TTL), точна на вимогу
+    або оцінка планувальника (EXPLAIN без виконання - не сканує таблицю).
+
+    Args:
+        count_query: SELECT count(*) з фільтрами
+        estimate_query: SELECT id з тими ж фільтрами (для оцінки)
+        exact: Порахувати точно, якщо в кеші немає
+
+    Returns:
+        (кількість, чи точна)
+    """
+    key = _count_key(count_query)
+    cached = _counts.get(key)
+    now = time.monotonic()
+    if cached and now - cached[1] < LISTING_COUNT_TTL:
+        return cached[0], True
+
+    if exact:
+        count = (await session.execute(count_query)).scalar()
+        if len(_counts) >= LISTING_COUNT_CACHE_SIZE:
+            _counts.clear()
+        _counts[key] = (count, now)
+        return count, True
+
+    # Через драйвер напряму: двокрапки в літералах фільтрів text() сприйняв би як параметри
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {_count_key(estimate_query)}")
+    plan = result.scalar()
+    plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+    return int(plan["Plan Rows"]), False
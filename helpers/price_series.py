@@ -0,0 +1,182 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Допустимі інтервали date_trunc
+BUCKETS = ("day", "week", "month")
+# ohlc - перша/макс/мін/остання ціна інтервалу і кількість спостережень, last - лише остання
+MODES = ("ohlc", "last")
+# Максимум точок на постачальника: без days денний ряд інакше тягнеться від першого запису
+MAX_POINTS = 730
+
+
+def _bucket_start(day: date, bucket: str) -> date:
+    """Початок інтервалу, як date_trunc у Postgres (тиждень - з понеділка)."""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(start: date, bucket: str) -> date:
+    if bucket == "week":
+        return start + timedelta(days=7)
+    if bucket == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+async def price_series(
+    session: AsyncSession,
+    history_model,
+    suppliers_model,
+    conditions: Sequence[Any],
+    bucket: str = "day",
+    mode: str = "ohlc",
+    days: Optional[int] = None,
+    current_model=None,
+    current_conditions: Sequence[Any] = (),
+) -> List[Dict[str, Any]]:
+    """
+    Ряди цін по постачальниках, агреговані в базі одним запитом: date_trunc(bucket) + віконні функції
+    по (постачальник, інтервал). Умови мають іти індексом історії (бренд + характеристики + created_at
+    або product_id), тож час не залежить від розміру таблиці.
+
+    Історія зберігає лише зміни ціни, тому ряд доповнюється до поточного інтервалу останньою відомою
+    ціною (LOCF), а з days - починається з останньої ціни до вікна: постачальник, у якого ціна
+    не змінювалась N днів, не зникає з графіка. Ціна доноситься лише до останнього разу, коли
+    постачальник мав товар (updated_at поточної таблиці); без поточного рядка - до останньої зміни.
+    Кожен ряд обрізається до останніх MAX_POINTS інтервалів.
+
+    Args:
+        history_model: Модель історії (Batteries, SollarPanels)
+        suppliers_model: Модель постачальників продукту
+        conditions: Умови WHERE на історію (товар)
+        bucket: "day", "week" або "month"
+        mode: "ohlc" або "last"
+        days: Лише за останні N днів
+        current_model: Поточна таблиця продукту (CurrentBatteries, SollarPanelsCurrent)
+        current_conditions: Умови WHERE на поточну таблицю (той самий товар)
+
+    Returns:
+        [{"supplier": назва, "points": [[дата, open, high, low, close, n], ...]}] для ohlc
+        або [[дата, ціна], ...] для last; точки впорядковані за датою, по одній на кожен інтервал.
+        Інтервали без змін несуть попередню ціну (в ohlc - з n = 0)
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"Невідомий інтервал: {bucket}")
+    if mode not in MODES:
+        raise ValueError(f"Невідомий режим: {mode}")
+
+    period = func.date_trunc(literal(bucket), history_model.created_at).label("period")
+    window = {"partition_by": (history_model.supplier_id, period)}
+    now = datetime.utcnow()
+    window_start = now - timedelta(days=days) if days is not None else None
+    filters = list(conditions)
+    if window_start is not None:
+        filters.append(history_model.created_at >= window_start)
+
+    ranked = select(
+        history_model.supplier_id,
+        period,
+        history_model.price.label("close"),
+        # Остання ціна інтервалу - рядок з row_number = 1 за спаданням часу
+        func.row_number().over(**window, order_by=(history_model.created_at.desc(), history_model.id.desc())).label("rn"),
+    )
+    if mode == "ohlc":
+        ranked = ranked.add_columns(
+            func.first_value(history_model.price).over(**window, order_by=(history_model.created_at, history_model.id)).label("open"),
+            func.max(history_model.price).over(**window).label("high"),
+            func.min(history_model.price).over(**window).label("low"),
+            func.count().over(**window).label("n"),
+        )
+    ranked = ranked.where(*filters).subquery()
+
+    columns = [ranked.c.period, ranked.c.close]
+    if mode == "ohlc":
+        columns = [ranked.c.period, ranked.c.open, ranked.c.high, ranked.c.low, ranked.c.close, ranked.c.n]
+    query = (
+        select(suppliers_model.name, *columns)
+        .join(suppliers_model, suppliers_model.id == ranked.c.supplier_id)
+        .where(ranked.c.rn == 1)
+        .order_by(suppliers_model.name, ranked.c.period)
+    )
+
+    observed: Dict[str, Dict[date, list]] = {}
+    for supplier_name, period_start, *values in (await session.execute(query)).all():
+        values = [round(value, 2) if isinstance(value, float) else value for value in values]
+        observed.setdefault(supplier_name, {})[period_start.date()] = values
+
+    # Ціна на початок вікна - останній рядок кожного постачальника до нього (тим самим індексом)
+    seeds: Dict[str, float] = {}
+    if window_start is not None:
+        before = select(
+            history_model.supplier_id,
+            history_model.price,
+            func.row_number().over(
+                partition_by=history_model.supplier_id,
+                order_by=(history_model.created_at.desc(), history_model.id.desc()),
+            ).label("rn"),
+        ).where(*conditions, history_model.created_at < window_start).subquery()
+        seed_query = (
+            select(suppliers_model.name, before.c.price)
+            .join(suppliers_model, suppliers_model.id == before.c.supplier_id)
+            .where(before.c.rn == 1)
+        )
+        for supplier_name, price in (await session.execute(seed_query)).all():
+            seeds[supplier_name] = round(price, 2) if isinstance(price, float) else price
+
+    # Остання поява товару в постачальника: історія пише лише зміни, а зняття з продажу - ні.
+    # updated_at оновлює кожен імпорт, а в інкрементальному парсингу конкурентів - і для
+    # незмінених карток (helpers/crawl_state.save_site)
+    last_seen: Dict[str, date] = {}
+    if current_model is not None:
+        seen_query = (
+            select(suppliers_model.name, func.max(current_model.updated_at))
+            .join(suppliers_model, suppliers_model.id == current_model.supplier_id)
+            .where(*current_conditions)
+            .group_by(suppliers_model.name)
+        )
+        for supplier_name, updated_at in (await session.execute(seen_query)).all():
+            if updated_at is not None:
+                last_seen[supplier_name] = _bucket_start(updated_at.date(), bucket)
+
+    last_bucket = _bucket_start(now.date(), bucket)
+    series = []
+    for supplier_name in sorted(set(observed) | set(seeds)):
+        periods = observed.get(supplier_name, {})
+        carried = seeds.get(supplier_name)
+        period = _bucket_start(window_start.date(), bucket) if carried is not None else min(periods)
+        if current_model is None:
+            end = max([last_bucket, *periods])
+        elif not periods and last_seen.get(supplier_name, date.min) < period:
+            # Зник з продажу ще до вікна - лише ціна до нього, точок немає
+            continue
+        else:
+            end = max([min(last_seen.get(supplier_name, period), last_bucket), *periods])
+        points = []
+        while period <= end:
+            values = periods.get(period)
+            if values is not None:
+                carried = values[-2] if mode == "ohlc" else values[-1]
+            elif carried is not None:
+                values = [carried, carried, carried, carried, 0] if mode == "ohlc" else [carried]
+            if values is not None:
+                points.append([period.strftime("%Y-%m-%d"), *values])
+            period = _next_bucket(period, bucket)
+        series.append({"supplier": supplier_name, "points": points[-MAX_POINTS:]})
+    return series
+
+
+def series_to_datasets(series: List[Dict[str, Any]], title: str) -> List[Dict[str, Any]]:
+    """Ряди у форматі helpers/charts.plot_combined_price_chart (ціна - close)."""
+    return [
+        {
+            "name": item["supplier"],
+            "data": [{"name": title, "date": point[0], "price": point[-2] if len(point) > 2 else point[1]} for point in item["points"]],
+        }
+        for item in series
+    ]
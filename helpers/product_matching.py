@@ -0,0 +1,247 @@
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, bindparam, func, insert, select, text, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.database import SessionLocal
+from db.models import CanonicalProducts
+
+load_dotenv()
+
+# Присвоювати product_id під час імпорту
+PRODUCT_MATCHING = os.getenv("PRODUCT_MATCHING", "1") == "1"
+# Мінімальна схожість назв у межах бренду і характеристик, щоб вважати товари однаковими
+MATCH_THRESHOLD = float(os.getenv("PRODUCT_MATCH_THRESHOLD", "0.5"))
+BACKFILL_BATCH_SIZE = 1000
+
+# Характеристики, що мають збігатися повністю (ключ блоку разом з брендом)
+PRODUCT_SPECS = {
+    "batteries": ("volume", "c_amps", "polarity", "region", "electrolyte"),
+    "sollar_panels": ("power", "panel_type", "cell_type", "thickness"),
+    "inverters": ("inverter_type", "power", "generation", "string_count"),
+}
+
+# Слова, які не відрізняють одну модель від іншої
+STOP_WORDS = {
+    "акумулятор", "аккумулятор", "акумуляторна", "батарея", "battery", "акб", "авто", "автомобільний",
+    "автомобильный", "сонячна", "солнечная", "панель", "solar", "panel", "module", "модуль",
+    "інвертор", "инвертор", "inverter", "гібридний", "гибридный", "hybrid", "для", "та", "with",
+    "ah", "год", "ампер", "вт", "watt",
+}
+# Кількісні токени (ємність, струм, потужність, розміри) вже є в ключі характеристик
+_QUANTITY_RE = re.compile(r"^\d+(?:[.,]\d+)?(?:ah|аг|агод|ач|a|а|en|w|вт|wp|kw|квт|v|в|mm|мм)?$")
+_TOKEN_RE = re.compile(r"[0-9a-zа-яіїєґё]+")
+# Кириличні літери, які в кодах моделей пишуть замість латинських (і навпаки)
+_LOOKALIKES = str.maketrans("авекмнорстух", "abekmhopctyx")
+
+
+@dataclass
+class _Candidate:
+    id: Optional[int]
+    tokens: FrozenSet[str]
+    codes: FrozenSet[str] = field(default_factory=frozenset)
+
+
+def spec_key(product: str, row: Dict[str, Any]) -> str:
+    """Ключ характеристик: 60.0 і 60 однакові, текст - у верхньому регістрі."""
+    values = []
+    for column in PRODUCT_SPECS[product]:
+        value = row.get(column)
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        values.append("" if value is None else str(value).strip().upper())
+    return "|".join(values)
+
+
+def name_tokens(full_name: Optional[str], brand: Optional[str] = None) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """
+    Токени назви без бренду, службових слів і кількісних значень.
+
+    Returns:
+        (токени, коди моделей - токени з літерами й цифрами, наприклад d24 чи 6ct)
+    """
+    brand_tokens = set(_TOKEN_RE.findall((brand or "").lower()))
+    tokens, codes = set(), set()
+    for token in _TOKEN_RE.findall((full_name or "").lower()):
+        # Однобуквені токени - залишки полярності (R+), одиниць (А·год) тощо
+        if len(token) < 2 or token in STOP_WORDS or token in brand_tokens or _QUANTITY_RE.match(token):
+            continue
+        if any(char.isdigit() for char in token) and any(char.isalpha() for char in token):
+            token = token.translate(_LOOKALIKES)
+            codes.add(token)
+        tokens.add(token)
+    return frozenset(tokens), frozenset(codes)
+
+
+def similarity(left: _Candidate, right: _Candidate) -> float:
+    """
+    Схожість назв у межах одного бренду і характеристик.
+    Різні коди моделей - різні товари; якщо в одній з назв немає що порівнювати, нічого не суперечить збігу.
+    """
+    if left.codes and right.codes and left.codes.isdisjoint(right.codes):
+        return 0.0
+    if not left.tokens or not right.tokens:
+        return MATCH_THRESHOLD
+    common = len(left.tokens & right.tokens)
+    jaccard = common / len(left.tokens | right.tokens)
+    overlap = common / min(len(left.tokens), len(right.tokens))
+    return (jaccard + overlap) / 2
+
+
+async def assign_product_ids(
+    session: AsyncSession,
+    product: str,
+    rows: List[Dict[str, Any]],
+    brands: Optional[Sequence[Optional[str]]] = None,
+) -> Dict[str, int]:
+    """
+    Записує в кожен рядок product_id: найсхожіший канонічний товар того ж бренду і характеристик
+    або новий. Один SELECT кандидатів і один INSERT нових товарів на батч.
+
+    Args:
+        session: Сесія імпорту (коміт робить викликач)
+        product: "batteries", "sollar_panels" або "inverters"
+        rows: Рядки колонок (full_name, brand_id, характеристики); змінюються на місці
+        brands: Назви брендів рядків (щоб прибрати бренд з назви)
+
+    Returns:
+        Скільки рядків зіставлено з наявними товарами і скільки товарів створено
+    """
+    if not rows:
+        return {"matched": 0, "created": 0}
+    # Паралельні імпорти одного продукту не мають створити той самий товар двічі
+    await session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:lock))"), {"lock": f"canonical_products:{product}"})
+
+    keys = [(row.get("brand_id"), spec_key(product, row)) for row in rows]
+    result = await session.execute(
+        select(CanonicalProducts.id, CanonicalProducts.brand_id, CanonicalProducts.spec_key, CanonicalProducts.tokens)
+        .where(
+            CanonicalProducts.product == product,
+            tuple_(func.coalesce(CanonicalProducts.brand_id, 0), CanonicalProducts.spec_key).in_(
+                list({(brand_id or 0, key) for brand_id, key in keys})
+            ),
+        )
+    )
+    blocks: Dict[Tuple[Optional[int], str], List[_Candidate]] = {}
+    for product_id, brand_id, key, tokens in result.all():
+        token_set = frozenset(tokens.split())
+        codes = frozenset(token for token in token_set if any(c.isdigit() for c in token) and any(c.isalpha() for c in token))
+        blocks.setdefault((brand_id, key), []).append(_Candidate(product_id, token_set, codes))
+
+    matched = 0
+    pending: List[Tuple[_Candidate, Dict[str, Any]]] = []
+    assignments: List[_Candidate] = []
+    for index, row in enumerate(rows):
+        tokens, codes = name_tokens(row.get("full_name"), brands[index] if brands else None)
+        candidate = _Candidate(None, tokens, codes)
+        block = blocks.setdefault(keys[index], [])
+        best, best_score = None, MATCH_THRESHOLD
+        for existing in block:
+            score = similarity(candidate, existing)
+            if score >= best_score:
+                best, best_score = existing, score
+        if best is None:
+            # Новий товар; наступні рядки батчу можуть зіставитись з ним
+            block.append(candidate)
+            pending.append((candidate, {
+                "product": product,
+                "brand_id": row.get("brand_id"),
+                "spec_key": keys[index][1],
+                "title": row.get("full_name") or "",
+                "tokens": " ".join(sorted(tokens)),
+            }))
+            best = candidate
+        else:
+            matched += 1
+        assignments.append(best)
+
+    if pending:
+        created = await session.execute(
+            insert(CanonicalProducts).returning(CanonicalProducts.id, sort_by_parameter_order=True),
+            [values for _, values in pending],
+        )
+        for (candidate, _), product_id in zip(pending, created.scalars().all()):
+            candidate.id = product_id
+
+    for row, candidate in zip(rows, assignments):
+        row["product_id"] = candidate.id
+    return {"matched": matched, "created": len(pending)}
+
+
+async def backfill_product_ids(
+    product: str,
+    models: Sequence[Any],
+    brands_model,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Присвоює product_id рядкам, імпортованим до зіставлення: унікальні комбінації
+    (назва, бренд, характеристики) порціями, потім UPDATE всіх рядків з цією комбінацією.
+    Кожна порція - окрема транзакція.
+
+    Args:
+        product: "batteries", "sollar_panels" або "inverters"
+        models: Таблиці продукту (спершу поточна, потім історія - історія переважно зіставиться з уже створеними товарами)
+        brands_model: Модель брендів продукту
+    """
+    started = time.perf_counter()
+    columns = ("full_name", "brand_id", *PRODUCT_SPECS[product])
+    stats = {"product": product, "tables": {}}
+    async with SessionLocal() as session:
+        for model in models:
+            table_stats = {"combinations": 0, "matched": 0, "created": 0}
+            seen = set()
+            while True:
+                result = await session.execute(
+                    select(*[getattr(model, column) for column in columns], brands_model.name)
+                    .outerjoin(brands_model, model.brand_id == brands_model.id)
+                    .where(model.product_id.is_(None))
+                    .distinct()
+                    .limit(batch_size)
+                )
+                records = result.all()
+                rows = [dict(zip(columns, record[:-1])) for record in records]
+                fresh = [row for row in rows if tuple(row.values()) not in seen]
+                if not fresh:
+                    # Порожньо або ті самі комбінації (UPDATE їх не зачепив) - не зациклюємось
+                    break
+                seen.update(tuple(row.values()) for row in fresh)
+
+                counts = await assign_product_ids(session, product, rows, [record[-1] for record in records])
+                table = model.__table__
+                stmt = (
+                    update(table)
+                    .where(
+                        table.c.product_id.is_(None),
+                        and_(*[table.c[column].is_not_distinct_from(bindparam(f"b_{column}")) for column in columns]),
+                    )
+                    .values(product_id=bindparam("b_product_id"))
+                )
+                connection = await session.connection()
+                await connection.execute(stmt, [{f"b_{key}": value for key, value in row.items()} for row in rows])
+                await session.commit()
+
+                table_stats["combinations"] += len(rows)
+                table_stats["matched"] += counts["matched"]
+                table_stats["created"] += counts["created"]
+                print(f"🔗 {table.name}: {table_stats['combinations']} комбінацій, нових товарів {table_stats['created']}")
+            stats["tables"][model.__table__.name] = table_stats
+
+    stats["elapsed"] = round(time.perf_counter() - started, 2)
+    return stats
+
+
+async def product_ids_for(session: AsyncSession, current_model, full_name: str, brand_id: Optional[int] = None) -> List[int]:
+    """ID канонічних товарів для назви з поточного списку (те, що бачить користувач у дашборді)."""
+    query = select(current_model.product_id).where(
+        current_model.full_name == full_name, current_model.product_id.is_not(None)
+    )
+    if brand_id is not None:
+        query = query.where(current_model.brand_id == brand_id)
+    result = await session.execute(query.distinct())
+    return list(result.scalars().all())
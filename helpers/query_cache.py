@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis ставиться разом з Celery (requirements.docker.txt)
+    aioredis = None
+
+load_dotenv()
+
+QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "1") == "1"
+# Без Redis покоління живе в процесі API: імпорт у воркері Celery його не бачить, тож TTL обмежує застарілість
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "300"))
+QUERY_CACHE_MAX_ITEMS = int(os.getenv("QUERY_CACHE_MAX_ITEMS", "512"))
+# Спільні покоління і відповіді для API та воркерів, наприклад redis://redis:6379/1
+QUERY_CACHE_REDIS_URL = os.getenv("QUERY_CACHE_REDIS_URL", "")
+REDIS_PREFIX = "query_cache"
+
+# ключ -> (коли протермінується, тіло JSON, ETag)
+_entries: "OrderedDict[str, Tuple[float, bytes, str]]" = OrderedDict()
+_generations: Dict[str, int] = {}
+_inflight: Dict[str, asyncio.Future] = {}
+_redis = None
+_loop = None
+stats = {"hits": 0, "redis_hits": 0, "misses": 0, "not_modified": 0, "invalidations": 0}
+
+
+def _check_loop() -> None:
+    # Клієнт Redis і очікування запитів прив'язані до event loop (Celery запускає свій loop на задачу)
+    global _loop, _redis
+    loop = asyncio.get_running_loop()
+    if _loop is not loop:
+        _inflight.clear()
+        _redis = None
+        _loop = loop
+
+
+def _get_redis():
+    global _redis
+    if not QUERY_CACHE_REDIS_URL or aioredis is None:
+        return None
+    _check_loop()
+    if _redis is None:
+        _redis = aioredis.from_url(QUERY_CACHE_REDIS_URL)
+    return _redis
+
+
+async def get_generation(scope: str) -> str:
+    """
+    Поточне покоління даних продукту. Ключі кешу містять покоління,
+    тож після bump_generation старі записи просто перестають знаходитись.
+    """
+    client = _get_redis()
+    if client is not None:
+        try:
+            return f"r{int(await client.get(f'{REDIS_PREFIX}:gen:{scope}') or 0)}"
+        except Exception as e:
+            print(f"⚠️ Кеш запитів: Redis недоступний, покоління з процесу: {e}")
+    return f"l{_generations.get(scope, 0)}"
+
+
+async def bump_generation(*scopes: str) -> None:
+    """Скидає кеш відповідей продуктів після коміту імпорту. Помилки Redis не ламають імпорт."""
+    client = _get_redis()
+    for scope in scopes:
+        _generations[scope] = _generations.get(scope, 0) + 1
+        stats["invalidations"] += 1
+        if client is not None:
+            try:
+                await client.incr(f"{REDIS_PREFIX}:gen:{scope}")
+            except Exception as e:
+                print(f"⚠️ Кеш запитів: не вдалося оновити покоління {scope} в Redis: {e}")
+
+
+def _remember(key: str, body: bytes, etag: str, ttl: float) -> None:
+    _entries[key] = (time.monotonic() + ttl, body, etag)
+    _entries.move_to_end(key)
+    while len(_entries) > QUERY_CACHE_MAX_ITEMS:
+        _entries.popitem(last=False)
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+async def _lookup(key: str) -> Optional[Tuple[bytes, str]]:
+    entry = _entries.get(key)
+    if entry and entry[0] > time.monotonic():
+        _entries.move_to_end(key)
+        stats["hits"] += 1
+        return entry[1], entry[2]
+    client = _get_redis()
+    if client is not None:
+        try:
+            body = await client.get(f"{REDIS_PREFIX}:{key}")
+        except Exception as e:
+            print(f"⚠️ Кеш запитів: Redis недоступний: {e}")
+            body = None
+        if body is not None:
+            etag = _etag(body)
+            _remember(key, body, etag, QUERY_CACHE_TTL)
+            stats["redis_hits"] += 1
+            return body, etag
+    return None
+
+
+async def _produce(key: str, producer: Callable[[], Awaitable[Any]], ttl: float) -> Tuple[bytes, str]:
+    stats["misses"] += 1
+    result = await producer()
+    body = json.dumps(jsonable_encoder(result), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    etag = _etag(body)
+    _remember(key, body, etag, ttl)
+    client = _get_redis()
+    if client is not None:
+        try:
+            await client.set(f"{REDIS_PREFIX}:{key}", body, ex=int(ttl))
+        except Exception as e:
+            print(f"⚠️ Кеш запитів: не вдалося записати в Redis: {e}")
+    return body, etag
+
+
+async def cached_json(
+    scope: str,
+    name: str,
+    params: Any,
+    producer: Callable[[], Awaitable[Any]],
+    ttl: float = QUERY_CACHE_TTL,
+) -> Tuple[bytes, str]:
+    """
+    JSON відповіді з кешу або від producer (однакові паралельні запити чекають один виклик).
+
+    Args:
+        scope: Продукт, імпорт якого скидає кеш ("batteries", "sollar_panels")
+        name: Назва ендпоінта
+        params: Параметри запиту (фільтри, сторінка)
+        producer: Корутина, що рахує відповідь з бази
+
+    Returns:
+        (тіло JSON, ETag)
+    """
+    generation = await get_generation(scope)
+    key_source = json.dumps([scope, generation, name, jsonable_encoder(params)], sort_keys=True, default=str)
+    key = f"{scope}:{hashlib.sha256(key_source.encode('utf-8')).hexdigest()}"
+
+    found = await _lookup(key)
+    if found is not None:
+        return found
+
+    _check_loop()
+    waiting = _inflight.get(key)
+    if waiting is not None:
+        return await asyncio.shield(waiting)
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await _produce(key, producer, ttl)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        # Виняток вже піднімається тут; без цього asyncio скаржиться на необроблений виняток future
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+async def cached_response(
+    request: Request,
+    scope: str,
+    name: str,
+    params: Any,
+    producer: Callable[[], Awaitable[Any]],
+    ttl: float = QUERY_CACHE_TTL,
+) -> Any:
+    """
+    Відповідь ендпоінта з кешу з ETag: на If-None-Match з тим самим ETag - 304 без тіла.
+    Cache-Control: no-cache - браузер щоразу перепитує, але отримує 304, поки дані не змінились.
+    """
+    if not QUERY_CACHE_ENABLED:
+        return await producer()
+    body, etag = await cached_json(scope, name, params, producer, ttl)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        stats["not_modified"] += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def get_query_cache_stats() -> Dict[str, Any]:
+    return {
+        **stats,
+        "enabled": QUERY_CACHE_ENABLED,
+        "redis": bool(QUERY_CACHE_REDIS_URL and aioredis is not None),
+        "entries": len(_entries),
+    }
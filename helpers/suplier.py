@@ -1,7 +1,24 @@
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from db.models import BatteriesSuppliers, SollarPanelsSuppliers, InvertersSuppliers
-from typing import Optional
+from typing import Dict, Optional, Tuple
+
+# Кеш ID постачальників у процесі: (продукт, назва у верхньому регістрі) -> id.
+# Спільний для get_or_create_supplier / get_or_create_competitor / get_or_create_me.
+_supplier_cache: Dict[Tuple[str, str], int] = {}
+
+
+def get_cached_supplier_id(product: str, suplier_name_upper: str) -> Optional[int]:
+    return _supplier_cache.get((product, suplier_name_upper))
+
+
+def cache_supplier_id(product: str, suplier_name_upper: str, suplier_id: int) -> None:
+    _supplier_cache[(product, suplier_name_upper)] = suplier_id
+
+
+def clear_supplier_cache() -> None:
+    _supplier_cache.clear()
+
 
 async def get_or_create_supplier(session: AsyncSession, suplier_name: str, product: str = "batteries") -> int:
     if product == "batteries":
@@ -18,6 +35,10 @@ async def get_or_create_supplier(session: AsyncSession, suplier_name: str, produ
     
     # Преобразуем название бренда в верхний регистр
     suplier_name_upper = suplier_name.strip().upper()
+
+    cached_id = get_cached_supplier_id(product, suplier_name_upper)
+    if cached_id is not None:
+        return cached_id
     
     # Ищем бренд в базе данных
     query = select(suplier_model).where(suplier_model.name == suplier_name_upper)
@@ -25,6 +46,7 @@ async def get_or_create_supplier(session: AsyncSession, suplier_name: str, produ
     suplier = result.scalar_one_or_none()
     
     if suplier:
+        cache_supplier_id(product, suplier_name_upper, suplier.id)
         return suplier.id
     
     new_suplier = suplier_model(name=suplier_name_upper, is_me=False, is_supplier=True, is_competitor=False)
@@ -7,6 +7,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 from db.database import SessionLocal, engine, init_db, get_session
+from helpers.brand import warm_brand_cache
+from helpers.http_client import close_http_client
+from helpers.extract_pool import shutdown_extract_pool
+from helpers.charts import shutdown_chart_pool
 
 # Завантаження змінних середовища з .env файлу
 load_dotenv()
@@ -14,6 +18,7 @@ load_dotenv()
 from services.batteries.views import router as batteries_router
 from services.sollar_panels.views import router as sollar_panels_router
 from services.backend.views import router as backend_router
+from services.jobs.views import router as jobs_router
 
 app = FastAPI()
 
@@ -62,9 +67,19 @@ async def startup_db_client():
     try:
         await init_db()
         print("База данных инициализирована успешно!")
+        async with SessionLocal() as session:
+            brands_count = await warm_brand_cache(session)
+        print(f"Кеш брендів завантажено: {brands_count}")
     except Exception as e:
         print(f"Ошибка при инициализации базы данных: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    """Закриває спільний пул з'єднань парсерів і пули процесів розбору файлів та графіків"""
+    await close_http_client()
+    shutdown_extract_pool()
+    shutdown_chart_pool()
+
 # @app.get("/current_products")
 # async def read_current_products(session: AsyncSession = Depends(get_session)):
 #     result = await session.execute(select(CurrentProducts))
@@ -86,4 +101,5 @@ async def health_check():
 
 app.include_router(batteries_router)
 app.include_router(sollar_panels_router)
-app.include_router(backend_router)
\ No newline at end of file
+app.include_router(backend_router)
+app.include_router(jobs_router)
\ No newline at end of file
@@ -1,3 +1,5 @@
+import json
+import asyncio
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import joinedload
 from typing import Callable, List, Dict, Any, Optional
@@ -22,19 +24,27 @@ from services.backend.schemas import (
     SolarPanelAnalyticDataSchema, 
     ChartBatteryDataSchema, 
     ChartSolarPanelDataSchema,
-    SollarPanelBase
+    BatteryPriceHistorySchema,
+    SolarPanelPriceHistorySchema,
+    SeriesModeEnum,
+    ChartFormatEnum,
+    MarketAggregateEnum,
     )
 from datetime import datetime
-from helpers.brand import get_or_create_brand
+from helpers.brand import get_brand_by_name
+from helpers.history import get_history_stats
+from helpers.pagination import count_rows, decode_cursor, encode_cursor, paginate_keyset
+from helpers.price_series import price_series, series_to_datasets
+from helpers.product_matching import product_ids_for
+from helpers.ingestion import PRODUCT_SCHEMAS
+from helpers.market_aggregates import get_market_aggregate, market_context
 from helpers.me import get_my_id
 from helpers.competitors import get_competitors_ids
 from helpers.get_prompt import get_prompt
 from helpers.prompt import analytics_prompt
-from helpers.ai_charts import get_chart_data
-from helpers.charts import plot_combined_price_chart
-from analytic.price_comparison import price_comparison
-from analytic.get_comparsipn_promt import get_price_comparison_prompt
-from services.backend.schemas import BatteryBase
+from helpers.charts import render_price_chart
+from analytic.comparison_engine import BATTERY_SPEC, SOLAR_SPEC, compare_prices
+from analytic.get_comparsipn_promt import get_price_summary_prompt
 
 async def get_brands(product_type: str = "batteries"):
     if product_type == "batteries":
@@ -57,6 +67,87 @@ async def get_suppliers(product_type: str = "batteries"):
     return result.scalars().all()
 
 
+def _has_values(values, placeholder) -> bool:
+    # Фронтенд і Swagger шлють [0] / ["string"] замість порожнього фільтра
+    return bool(values) and values != [placeholder]
+
+
+def current_batteries_filters(
+    brand_ids: Optional[List[int]] = None,
+    supplier_ids: Optional[List[int]] = None,
+    volumes: Optional[List[float]] = None,
+    polarities: Optional[List[str]] = None,
+    regions: Optional[List[str]] = None,
+    electrolytes: Optional[List[str]] = None,
+    c_amps: Optional[List[int]] = None,
+    price_diapason: Optional[List[int]] = None,
+) -> list:
+    """Умови WHERE списку поточних акумуляторів (спільні для вибірки й підрахунку, див. benchmarks/listing_queries.py)."""
+    filters = []
+    if _has_values(brand_ids, 0):
+        filters.append(CurrentBatteries.brand_id.in_(brand_ids))
+    if _has_values(supplier_ids, 0):
+        filters.append(CurrentBatteries.supplier_id.in_(supplier_ids))
+    if _has_values(volumes, 0):
+        filters.append(CurrentBatteries.volume.in_(volumes))
+    if _has_values(polarities, "string"):
+        filters.append(CurrentBatteries.polarity.in_(polarities))
+    if regions:
+        filters.append(CurrentBatteries.region.in_(regions))
+    if electrolytes:
+        filters.append(CurrentBatteries.electrolyte.in_(electrolytes))
+    if _has_values(c_amps, 0):
+        filters.append(CurrentBatteries.c_amps.in_(c_amps))
+    if isinstance(price_diapason, list) and len(price_diapason) == 2:
+        min_price, max_price = price_diapason
+        filters.append(CurrentBatteries.price.between(min_price, max_price))
+    return filters
+
+
+def current_batteries_sort_column(sort_by: SortEnumModel):
+    if sort_by == SortEnumModel.c_amps:
+        return CurrentBatteries.c_amps
+    if sort_by == SortEnumModel.volume:
+        return CurrentBatteries.volume
+    return CurrentBatteries.price  # За замовчуванням
+
+
+def current_batteries_queries(
+    filters: list,
+    page: int = 1,
+    page_size: int = 10,
+    sort_by: SortEnumModel = SortEnumModel.price,
+    sort_order: SortOrderEnumModel = SortOrderEnumModel.desc,
+    keyset: Optional[Dict[str, Any]] = None,
+):
+    """
+    Запит сторінки і запит підрахунку для списку поточних акумуляторів.
+    keyset - позиція з курсора (див. helpers/pagination.py): сторінка після неї замість OFFSET.
+    """
+    sort_column = current_batteries_sort_column(sort_by)
+    query = (
+        select(CurrentBatteries)
+        .where(*filters)
+        .options(
+            joinedload(CurrentBatteries.brand),
+            joinedload(CurrentBatteries.supplier)
+        )
+    )
+    if keyset is None:
+        query = (
+            query
+            .order_by(sort_column.asc() if sort_order == SortOrderEnumModel.asc else sort_column.desc())
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        )
+    else:
+        query = paginate_keyset(
+            query, sort_column, CurrentBatteries.id, keyset, sort_order != SortOrderEnumModel.asc, page_size
+        )
+    count_query = select(func.count()).select_from(CurrentBatteries).where(*filters)
+    return query, count_query
+
+
 async def get_current_batteries(
     brand_ids: Optional[List[int]] = None,
     supplier_ids: Optional[List[int]] = None,
@@ -70,95 +161,37 @@ async def get_current_batteries(
     page_size: int = 10,
     sort_by: SortEnumModel = SortEnumModel.price,
     sort_order: SortOrderEnumModel = SortOrderEnumModel.desc,
+    use_cursor: bool = False,
+    cursor: Optional[str] = None,
+    exact_count: bool = False,
     ):
+    # Курсор перевіряємо до відкриття сесії: InvalidCursor -> 400 у views
+    keyset = decode_cursor(cursor, sort_by.value, sort_order.value) if use_cursor else None
     session = SessionLocal()
-    query = select(CurrentBatteries)
-    if len(brand_ids) != 0 and brand_ids is not None and brand_ids != [0]:
-        query = query.filter(CurrentBatteries.brand_id.in_(brand_ids))
-    if len(supplier_ids) != 0 and supplier_ids is not None and supplier_ids != [0]:
-        query = query.filter(CurrentBatteries.supplier_id.in_(supplier_ids))
-    if len(volumes) != 0 and volumes is not None and volumes != [0]:
-        query = query.filter(CurrentBatteries.volume.in_(volumes))
-    if len(polarities) != 0 and polarities is not None and polarities != ["string"]:
-        query = query.filter(CurrentBatteries.polarity.in_(polarities))
-    # Детальне логування регіонів
-    print(f"Regions: {regions}, type: {type(regions)}")
-    if regions is not None and len(regions) > 0:
-        print(f"Filtering by regions: {regions}")
-        query = query.filter(CurrentBatteries.region.in_(regions))
-    
-    # Детальне логування електролітів
-    print(f"Electrolytes: {electrolytes}, type: {type(electrolytes)}")
-    if electrolytes is not None and len(electrolytes) > 0:
-        print(f"Filtering by electrolytes: {electrolytes}")
-        query = query.filter(CurrentBatteries.electrolyte.in_(electrolytes))
-    if len(c_amps) != 0 and c_amps is not None and c_amps != [0]:
-        query = query.filter(CurrentBatteries.c_amps.in_(c_amps))
-    # Детальне логування цінового діапазону
-    print(f"Price diapason: {price_diapason}, type: {type(price_diapason)}")
-    if price_diapason is not None and isinstance(price_diapason, list) and len(price_diapason) == 2:
-        min_price, max_price = price_diapason
-        print(f"Filtering by price between {min_price} and {max_price}")
-        query = query.filter(CurrentBatteries.price.between(min_price, max_price))
+    filters = current_batteries_filters(
+        brand_ids, supplier_ids, volumes, polarities, regions, electrolytes, c_amps, price_diapason
+    )
+    query, count_query = current_batteries_queries(filters, page, page_size, sort_by, sort_order, keyset)
 
-    count_query = select(func.count()).select_from(CurrentBatteries)
-    
-    # Застосовуємо ті ж фільтри до запиту підрахунку
-    if len(brand_ids) != 0 and brand_ids is not None and brand_ids != [0]:
-        count_query = count_query.filter(CurrentBatteries.brand_id.in_(brand_ids))
-    if len(supplier_ids) != 0 and supplier_ids is not None and supplier_ids != [0]:
-        count_query = count_query.filter(CurrentBatteries.supplier_id.in_(supplier_ids))
-    if len(volumes) != 0 and volumes is not None and volumes != [0]:
-        count_query = count_query.filter(CurrentBatteries.volume.in_(volumes))
-    if len(polarities) != 0 and polarities is not None and polarities != ["string"]:
-        count_query = count_query.filter(CurrentBatteries.polarity.in_(polarities))
-    # Детальне логування регіонів для запиту підрахунку
-    if regions is not None and len(regions) > 0:
-        print(f"Filtering count by regions: {regions}")
-        count_query = count_query.filter(CurrentBatteries.region.in_(regions))
-    
-    # Детальне логування електролітів для запиту підрахунку
-    if electrolytes is not None and len(electrolytes) > 0:
-        print(f"Filtering count by electrolytes: {electrolytes}")
-        count_query = count_query.filter(CurrentBatteries.electrolyte.in_(electrolytes))
-    if len(c_amps) != 0 and c_amps is not None and c_amps != [0]:
-        count_query = count_query.filter(CurrentBatteries.c_amps.in_(c_amps))
-    if price_diapason is not None and price_diapason != [0]:
-        count_query = count_query.filter(CurrentBatteries.price.between(price_diapason[0], price_diapason[1]))
-
-    # Виконуємо запит для отримання загальної кількості
-    total_count_result = await session.execute(count_query)
-    total_count = total_count_result.scalar()
+    # Точна кількість кешується на LISTING_COUNT_TTL, тож гортання сторінок її не перераховує;
+    # у курсорному режимі без exact_count - оцінка планувальника
+    total_count, count_exact = await count_rows(
+        session, count_query, select(CurrentBatteries.id).where(*filters), exact=exact_count or not use_cursor
+    )
     
     # Розраховуємо загальну кількість сторінок
     total_pages = (total_count + page_size - 1) // page_size if total_count > 0 else 1
 
-    # Сортування
-    if sort_by == SortEnumModel.price:
-        sort_column = CurrentBatteries.price
-    elif sort_by == SortEnumModel.c_amps:
-        sort_column = CurrentBatteries.c_amps
-    elif sort_by == SortEnumModel.volume:
-        sort_column = CurrentBatteries.volume
-    else:
-        sort_column = CurrentBatteries.price  # За замовчуванням
-    
-    # Напрямок сортування
-    if sort_order == SortOrderEnumModel.asc:
-        query = query.order_by(sort_column.asc())
-    else:  # desc
-        query = query.order_by(sort_column.desc())
-
-    # Пагінація
-    query = query.offset((page - 1) * page_size).limit(page_size)
-
-    query = query.options(
-        joinedload(CurrentBatteries.brand),
-        joinedload(CurrentBatteries.supplier)
-    )
     result_data = await session.execute(query)
+    rows = result_data.scalars().all()
+    next_cursor = None
+    if use_cursor and len(rows) > page_size:
+        rows = rows[:page_size]
+        sort_key = current_batteries_sort_column(sort_by).key
+        next_cursor = encode_cursor(sort_by.value, sort_order.value, getattr(rows[-1], sort_key), rows[-1].id)
+
     batteries = []
-    for result in result_data.scalars().all():
+    for result in rows:
         result_dict = {
             "brand": result.brand.name,
             "supplier": result.supplier.name,
@@ -179,151 +212,246 @@ async def get_current_batteries(
         "batteries": batteries,
         "total_pages": total_pages,
         "total_count": total_count,
-        "current_page": page
+        "count_exact": count_exact,
+        "current_page": page,
+        "next_cursor": next_cursor,
         }
 
 
+async def get_history_stats_data(days: Optional[int] = None):
+    history_models = {product: schema.history_model for product, schema in PRODUCT_SCHEMAS.items()}
+    return await get_history_stats(history_models, days)
+
+
+async def get_market_data(
+    product: str,
+    kind: MarketAggregateEnum,
+    brand_ids: Optional[List[int]] = None,
+    only_ours: bool = False,
+    limit: int = 100,
+    offset: int = 0,
+):
+    """Агрегати ринку з матеріалізованих представлень замість перерахунку з поточної таблиці."""
+    session = SessionLocal()
+    try:
+        rows = await get_market_aggregate(session, product, kind.value, brand_ids, only_ours, limit, offset)
+    finally:
+        await session.close()
+    return {"product": product, "kind": kind.value, "rows": rows}
+
+
 async def battery_ai_analytic(data: BatteryAnalyticDataSchema):
     batteries = data.batteries
     comment = data.comment
-    prompt = get_prompt(product_type="batteries", data=batteries, comment=comment)
+    session = SessionLocal()
+    try:
+        market = await market_context(session, "batteries", batteries)
+    finally:
+        await session.close()
+    prompt = get_prompt(
+        product_type="batteries", data=batteries, comment=comment,
+        market=json.dumps(market, ensure_ascii=False, default=str) if market else None,
+    )
     result = await analytics_prompt(prompt)
     print(result)
     return {"analytics": result}
 
 
 
-async def ai_battery_chart(data: ChartBatteryDataSchema):
+async def _find_supplier_ids(session: AsyncSession, suppliers_model, names: Optional[List[str]]) -> List[int]:
+    if not names:
+        return []
+    result = await session.execute(select(suppliers_model.id).where(suppliers_model.name.in_(names)))
+    return list(result.scalars().all())
+
+
+async def _price_history(
+    product: str,
+    history_model,
+    current_model,
+    suppliers_model,
+    data,
+    spec_conditions: Callable[[Any], list],
+) -> Dict[str, Any]:
+    """
+    Ряди цін товару по постачальниках (helpers/price_series.py).
+    Товар - product_id з поточного списку, якщо вже зіставлений (helpers/product_matching.py),
+    інакше бренд + характеристики.
+    """
     session = SessionLocal()
-    include_suppliers = data.include_suppliers
-    supplier_ids = []
-    
-    # Якщо вказані постачальники, знаходимо їх ID
-    if include_suppliers:
-        for supplier_name in include_suppliers:
-            query = select(BatteriesSuppliers).where(BatteriesSuppliers.name == supplier_name)
-            result = await session.execute(query)
-            supplier = result.scalar_one_or_none()
-            if supplier:
-                supplier_ids.append(supplier.id)
-    
-    battery = data
-    brand_name = battery.brand
-    brand_id = await get_or_create_brand(session, brand_name)
-    prompt_data = []
-    
-    # Використовуємо асинхронний API SQLAlchemy
-    query = select(Batteries).where(
-        Batteries.brand_id == brand_id,
-        Batteries.volume == battery.volume,
-        Batteries.c_amps == battery.c_amps,
-        Batteries.polarity == battery.polarity,
-        Batteries.region == battery.region
-    )
-    
-    # Якщо вказані постачальники, фільтруємо за ними
-    if supplier_ids:
-        query = query.where(Batteries.supplier_id.in_(supplier_ids))
-    
-    # Додаємо завантаження зв'язаних об'єктів
-    query = query.options(
-        joinedload(Batteries.brand),
-        joinedload(Batteries.supplier)
+    try:
+        supplier_ids = await _find_supplier_ids(session, suppliers_model, data.include_suppliers)
+        brand = await get_brand_by_name(session, data.brand, product)
+        brand_id = brand.id if brand else None
+        product_ids = await product_ids_for(session, current_model, data.full_name, brand_id)
+        conditions, current_conditions = (
+            [model.product_id.in_(product_ids)] if product_ids
+            else [model.brand_id == brand_id, *spec_conditions(model)]
+            for model in (history_model, current_model)
+        )
+        if supplier_ids:
+            conditions.append(history_model.supplier_id.in_(supplier_ids))
+            current_conditions.append(current_model.supplier_id.in_(supplier_ids))
+        series = await price_series(
+            session, history_model, suppliers_model, conditions, data.bucket.value, data.mode.value, data.days,
+            current_model=current_model, current_conditions=current_conditions,
+        )
+    finally:
+        await session.close()
+    return {
+        "full_name": data.full_name,
+        "bucket": data.bucket.value,
+        "mode": data.mode.value,
+        "matched_by": "product_id" if product_ids else "spec",
+        "series": series,
+    }
+
+
+async def get_battery_price_history(data: BatteryPriceHistorySchema):
+    return await _price_history(
+        "batteries", Batteries, CurrentBatteries, BatteriesSuppliers, data,
+        lambda model: [
+            model.volume == data.volume,
+            model.c_amps == data.c_amps,
+            model.polarity == data.polarity,
+            model.region == data.region,
+        ],
     )
-    
-    result = await session.execute(query)
-    batteries = result.scalars().all()
-    
-    for battery in batteries:
-        battery_dict = {
-            "brand": battery.brand.name if battery.brand else "",
-            "supplier": battery.supplier.name if battery.supplier else "",
-            "name": battery.name,
-            "volume": battery.volume,
-            "full_name": battery.full_name,
-            "price": battery.price,
-            "c_amps": battery.c_amps,
-            "region": battery.region,
-            "polarity": battery.polarity,
-            "electrolyte": battery.electrolyte,
-            "created_at": battery.created_at
-        }
-        prompt_data.append(battery_dict)
-    await session.close()
 
-    chart_data = await get_chart_data(input=battery, data=prompt_data)
-    chart = plot_combined_price_chart(datasets=chart_data, normalize=True)
 
-    return {"chart": chart}
+async def ai_battery_chart(data: ChartBatteryDataSchema):
+    # Денні останні ціни з бази замість групування історії через LLM
+    history = await get_battery_price_history(
+        BatteryPriceHistorySchema(**data.model_dump(), mode=SeriesModeEnum.last)
+    )
+    if not history["series"] or data.format == ChartFormatEnum.json:
+        return {"chart": None, "format": data.format.value, "series": history["series"]}
+    chart = await render_price_chart(
+        series_to_datasets(history["series"], data.full_name), normalize=True, fmt=data.format.value
+    )
+    return {"chart": chart, "format": data.format.value}
+
+async def _comparison_rows(session: AsyncSession, model, brands_model, suppliers_model, columns, conditions) -> List[Dict[str, Any]]:
+    """Лише колонки для порівняння цін (без ORM-об'єктів і зв'язків)."""
+    result = await session.execute(
+        select(
+            *[getattr(model, column) for column in columns],
+            brands_model.name.label("brand"),
+            suppliers_model.name.label("supplier"),
+        )
+        .join(brands_model, model.brand_id == brands_model.id)
+        .join(suppliers_model, model.supplier_id == suppliers_model.id)
+        .where(*conditions)
+    )
+    return [dict(row) for row in result.mappings().all()]
+
 
-async def get_battery_price_comparison_data():
+async def get_battery_price_comparison_data(narrative: bool = True):
     session = SessionLocal()
     try:
         competitor_ids = await get_competitors_ids(session)
         my_id = await get_my_id(session)
         
-        
-        # Використовуємо joinedload для завантаження зв'язаних об'єктів
-        my_data_result = await session.execute(
-            select(CurrentBatteries)
-            .options(joinedload(CurrentBatteries.brand), joinedload(CurrentBatteries.supplier))
-            .where(CurrentBatteries.supplier_id == my_id, CurrentBatteries.price > 0, CurrentBatteries.c_amps > 0, CurrentBatteries.volume > 0, CurrentBatteries.price < 11000)
+        columns = ("full_name", "price", "volume", "c_amps", "polarity", "region", "electrolyte", "brand_id")
+        valid = (CurrentBatteries.price > 0, CurrentBatteries.c_amps > 0, CurrentBatteries.volume > 0, CurrentBatteries.price < 11000)
+        my_rows = await _comparison_rows(
+            session, CurrentBatteries, BatteriesBrands, BatteriesSuppliers, columns,
+            (CurrentBatteries.supplier_id == my_id, *valid),
         )
-        my_data = my_data_result.scalars().all()
-        my_brands_ids = [battery.brand_id for battery in my_data]
-        
-        competitors_data_result = await session.execute(
-            select(CurrentBatteries)
-            .options(joinedload(CurrentBatteries.brand), joinedload(CurrentBatteries.supplier))
-            .where(CurrentBatteries.supplier_id.in_(competitor_ids), CurrentBatteries.brand_id.in_(my_brands_ids), CurrentBatteries.price > 0, CurrentBatteries.c_amps > 0, CurrentBatteries.volume > 0, CurrentBatteries.price < 11000)
+        my_brands_ids = list({row["brand_id"] for row in my_rows})
+        competitor_rows = await _comparison_rows(
+            session, CurrentBatteries, BatteriesBrands, BatteriesSuppliers, columns,
+            (CurrentBatteries.supplier_id.in_(competitor_ids), CurrentBatteries.brand_id.in_(my_brands_ids), *valid),
         )
-        competitors_data = competitors_data_result.scalars().all()
         
         # Додаємо await і розділяємо на два кроки
         supplier_result = await session.execute(select(BatteriesSuppliers).where(BatteriesSuppliers.id == my_id))
         supplier = supplier_result.scalar_one_or_none()
         my_company_name = supplier.name if supplier else "Моя компанія"
-
-
-        my_batteries = [
-            BatteryBase(
-                brand=battery.brand.name if battery.brand else "",
-                supplier=battery.supplier.name if battery.supplier else "",
-                name=battery.name,
-                volume=battery.volume,
-                full_name=battery.full_name,
-                price=battery.price,
-                c_amps=battery.c_amps,
-                region=battery.region,
-                polarity=battery.polarity,
-                electrolyte=battery.electrolyte,
-                updated_at=battery.updated_at
-            ) for battery in my_data
-        ]
-        
-        competitors_batteries = [
-            BatteryBase(
-                brand=battery.brand.name if battery.brand else "",
-                supplier=battery.supplier.name if battery.supplier else "",
-                name=battery.name,
-                full_name=battery.full_name,
-                volume=battery.volume,
-                price=battery.price,
-                c_amps=battery.c_amps,
-                region=battery.region,
-                polarity=battery.polarity,
-                electrolyte=battery.electrolyte,
-                supplier_id=battery.supplier_id,
-                updated_at=battery.updated_at
-            ) for battery in competitors_data
-        ]
-
-        # Викликаємо імпортовану функцію price_comparison
-        result = price_comparison(my_batteries, competitors_batteries, my_company_name)
-        return {"price_comparison": result}
     finally:
         await session.close()
 
+    # Зіставлення і розриви рахуються локально; в LLM іде лише стисле зведення для текстового висновку
+    comparison = await asyncio.to_thread(compare_prices, my_rows, competitor_rows, BATTERY_SPEC)
+    print(f"📊 Порівняння цін акумуляторів: {comparison['summary']}")
+    result = None
+    if narrative and comparison["summary"]["matched_models"]:
+        prompt = get_price_summary_prompt("batteries", comparison, my_company_name)
+        result = await analytics_prompt(prompt)
+    elif narrative:
+        result = "Немає спільних з конкурентами моделей для порівняння"
+    return {"price_comparison": result, "comparison": comparison}
+
+
+def current_solar_panels_filters(
+    brand_ids: Optional[List[int]] = None,
+    supplier_ids: Optional[List[int]] = None,
+    power: Optional[List[float]] = None,
+    panel_type: str = "одностороння",
+    cell_type: str = "n-type",
+    thickness: Optional[List[float]] = None,
+    price_diapason: Optional[List[int]] = None,
+    price_per_w_diapason: Optional[List[int]] = None,
+) -> list:
+    """Умови WHERE списку поточних сонячних панелей (спільні для вибірки й підрахунку)."""
+    filters = []
+    if _has_values(brand_ids, 0):
+        filters.append(SollarPanelsCurrent.brand_id.in_(brand_ids))
+    if _has_values(supplier_ids, 0):
+        filters.append(SollarPanelsCurrent.supplier_id.in_(supplier_ids))
+    if _has_values(power, 0):
+        filters.append(SollarPanelsCurrent.power.in_(power))
+    if panel_type not in ("string", "all"):
+        filters.append(SollarPanelsCurrent.panel_type == panel_type)
+    if cell_type not in ("string", "all"):
+        filters.append(SollarPanelsCurrent.cell_type == cell_type)
+    if thickness is not None and thickness != [0]:
+        filters.append(SollarPanelsCurrent.thickness.in_(thickness))
+    if isinstance(price_diapason, list) and len(price_diapason) == 2:
+        min_price, max_price = price_diapason
+        filters.append(SollarPanelsCurrent.price.between(min_price, max_price))
+    if isinstance(price_per_w_diapason, list) and len(price_per_w_diapason) == 2:
+        min_price_per_w, max_price_per_w = price_per_w_diapason
+        filters.append(SollarPanelsCurrent.price_per_w.between(min_price_per_w, max_price_per_w))
+    return filters
+
+
+def current_solar_panels_sort_column(sort_by: SortEnumModel):
+    return SollarPanelsCurrent.power if sort_by == SortEnumModel.power else SollarPanelsCurrent.price
+
+
+def current_solar_panels_queries(
+    filters: list,
+    page: int = 1,
+    page_size: int = 10,
+    sort_by: SortEnumModel = SortEnumModel.price,
+    sort_order: SortOrderEnumModel = SortOrderEnumModel.desc,
+    keyset: Optional[Dict[str, Any]] = None,
+):
+    """Запит сторінки і запит підрахунку для списку поточних сонячних панелей (keyset - як у current_batteries_queries)."""
+    sort_column = current_solar_panels_sort_column(sort_by)
+    query = (
+        select(SollarPanelsCurrent)
+        .where(*filters)
+        .options(
+            joinedload(SollarPanelsCurrent.brand),
+            joinedload(SollarPanelsCurrent.supplier)
+        )
+    )
+    if keyset is None:
+        query = (
+            query
+            .order_by(sort_column.asc() if sort_order == SortOrderEnumModel.asc else sort_column.desc())
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        )
+    else:
+        query = paginate_keyset(
+            query, sort_column, SollarPanelsCurrent.id, keyset, sort_order != SortOrderEnumModel.asc, page_size
+        )
+    count_query = select(func.count()).select_from(SollarPanelsCurrent).where(*filters)
+    return query, count_query
+
 
 async def get_current_solar_panels(
     brand_ids: Optional[List[int]] = None,
@@ -338,85 +466,34 @@ async def get_current_solar_panels(
     page_size: int = 10,
     sort_by: SortEnumModel = SortEnumModel.price,
     sort_order: SortOrderEnumModel = SortOrderEnumModel.desc,
+    use_cursor: bool = False,
+    cursor: Optional[str] = None,
+    exact_count: bool = False,
     ):
+    keyset = decode_cursor(cursor, sort_by.value, sort_order.value) if use_cursor else None
     session = SessionLocal()
-    query = select(SollarPanelsCurrent)
-    if len(brand_ids) != 0 and brand_ids is not None and brand_ids != [0]:
-        query = query.filter(SollarPanelsCurrent.brand_id.in_(brand_ids))
-    if len(supplier_ids) != 0 and supplier_ids is not None and supplier_ids != [0]:
-        query = query.filter(SollarPanelsCurrent.supplier_id.in_(supplier_ids))
-    if len(power) != 0 and power is not None and power != [0]:
-        query = query.filter(SollarPanelsCurrent.power.in_(power))
-    if panel_type != "string" and panel_type != "all":
-        query = query.filter(SollarPanelsCurrent.panel_type == panel_type)
-    if cell_type != "string" and cell_type != "all":
-        query = query.filter(SollarPanelsCurrent.cell_type == cell_type)
-    if thickness is not None and thickness != [0]:
-        query = query.filter(SollarPanelsCurrent.thickness.in_(thickness))
-    
-    print(f"Price diapason: {price_diapason}, type: {type(price_diapason)}")
-    if price_diapason is not None and isinstance(price_diapason, list) and len(price_diapason) == 2:
-        min_price, max_price = price_diapason
-        print(f"Filtering by price between {min_price} and {max_price}")
-        query = query.filter(SollarPanelsCurrent.price.between(min_price, max_price))
-    
-    if price_per_w_diapason is not None and isinstance(price_per_w_diapason, list) and len(price_per_w_diapason) == 2:
-        min_price_per_w, max_price_per_w = price_per_w_diapason
-        query = query.filter(SollarPanelsCurrent.price_per_w.between(min_price_per_w, max_price_per_w))
-
-    count_query = select(func.count()).select_from(SollarPanelsCurrent)
-    
-    # Застосовуємо ті ж фільтри до запиту підрахунку
-    if len(brand_ids) != 0 and brand_ids is not None and brand_ids != [0]:
-        count_query = count_query.filter(SollarPanelsCurrent.brand_id.in_(brand_ids))
-    if len(supplier_ids) != 0 and supplier_ids is not None and supplier_ids != [0]:
-        count_query = count_query.filter(SollarPanelsCurrent.supplier_id.in_(supplier_ids))
-    if len(power) != 0 and power is not None and power != [0]:
-        count_query = count_query.filter(SollarPanelsCurrent.power.in_(power))
-    if panel_type != "string" and panel_type != "all":
-        count_query = count_query.filter(SollarPanelsCurrent.panel_type == panel_type)
-    if cell_type != "string" and cell_type != "all":
-        count_query = count_query.filter(SollarPanelsCurrent.cell_type == cell_type)
-    if thickness is not None and thickness != [0]:
-        count_query = count_query.filter(SollarPanelsCurrent.thickness.in_(thickness))
-    if price_diapason is not None and isinstance(price_diapason, list) and len(price_diapason) == 2:
-        min_price, max_price = price_diapason
-        count_query = count_query.filter(SollarPanelsCurrent.price.between(min_price, max_price))
-    if price_per_w_diapason is not None and isinstance(price_per_w_diapason, list) and len(price_per_w_diapason) == 2:
-        min_price_per_w, max_price_per_w = price_per_w_diapason
-        count_query = count_query.filter(SollarPanelsCurrent.price_per_w.between(min_price_per_w, max_price_per_w))
+    filters = current_solar_panels_filters(
+        brand_ids, supplier_ids, power, panel_type, cell_type, thickness, price_diapason, price_per_w_diapason
+    )
+    query, count_query = current_solar_panels_queries(filters, page, page_size, sort_by, sort_order, keyset)
 
-    # Виконуємо запит для отримання загальної кількості
-    total_count_result = await session.execute(count_query)
-    total_count = total_count_result.scalar()
+    total_count, count_exact = await count_rows(
+        session, count_query, select(SollarPanelsCurrent.id).where(*filters), exact=exact_count or not use_cursor
+    )
     
     # Розраховуємо загальну кількість сторінок
     total_pages = (total_count + page_size - 1) // page_size if total_count > 0 else 1
 
-    # Сортування
-    if sort_by == SortEnumModel.price:
-        sort_column = SollarPanelsCurrent.price
-    elif sort_by == SortEnumModel.power:
-        sort_column = SollarPanelsCurrent.power
-    else:
-        sort_column = SollarPanelsCurrent.price  # За замовчуванням
-    
-    # Напрямок сортування
-    if sort_order == SortOrderEnumModel.asc:
-        query = query.order_by(sort_column.asc())
-    else:  # desc
-        query = query.order_by(sort_column.desc())
-
-    # Пагінація
-    query = query.offset((page - 1) * page_size).limit(page_size)
-
-    query = query.options(
-        joinedload(SollarPanelsCurrent.brand),
-        joinedload(SollarPanelsCurrent.supplier)
-    )
     result_data = await session.execute(query)
+    rows = result_data.scalars().all()
+    next_cursor = None
+    if use_cursor and len(rows) > page_size:
+        rows = rows[:page_size]
+        sort_key = current_solar_panels_sort_column(sort_by).key
+        next_cursor = encode_cursor(sort_by.value, sort_order.value, getattr(rows[-1], sort_key), rows[-1].id)
+
     sollar_panels = []
-    for result in result_data.scalars().all():
+    for result in rows:
         result_dict = {
             "brand": result.brand.name,
             "supplier": result.supplier.name,
@@ -438,145 +515,86 @@ async def get_current_solar_panels(
         "sollar_panels": sollar_panels,
         "total_pages": total_pages,
         "total_count": total_count,
-        "current_page": page
+        "count_exact": count_exact,
+        "current_page": page,
+        "next_cursor": next_cursor,
         }
 
 async def solar_panel_ai_analytic(data: SolarPanelAnalyticDataSchema):
     sollar_panels = data.sollar_panels
     comment = data.comment
-    prompt = get_prompt(product_type="solar_panels", data=sollar_panels, comment=comment)
+    session = SessionLocal()
+    try:
+        market = await market_context(session, "sollar_panels", sollar_panels)
+    finally:
+        await session.close()
+    prompt = get_prompt(
+        product_type="solar_panels", data=sollar_panels, comment=comment,
+        market=json.dumps(market, ensure_ascii=False, default=str) if market else None,
+    )
     result = await analytics_prompt(prompt)
     print(result)
     return {"analytics": result}
 
 
-async def ai_sollar_panels_chart(data: ChartSolarPanelDataSchema):
-    session = SessionLocal()
-    include_suppliers = data.include_suppliers
-    supplier_ids = []
-    
-    # Якщо вказані постачальники, знаходимо їх ID
-    if include_suppliers:
-        for supplier_name in include_suppliers:
-            query = select(SolarPanelsSuppliers).where(SolarPanelsSuppliers.name == supplier_name)
-            result = await session.execute(query)
-            supplier = result.scalar_one_or_none()
-            if supplier:
-                supplier_ids.append(supplier.id)
-    
-    solar_panel = data
-    brand_name = solar_panel.brand
-    brand_id = await get_or_create_brand(session, brand_name)
-    prompt_data = []
-    
-    # Використовуємо асинхронний API SQLAlchemy
-    query = select(SolarPanels).where(
-        SolarPanels.brand_id == brand_id,
-        SolarPanels.power == solar_panel.power,
-        SolarPanels.panel_type == solar_panel.panel_type,
-        SolarPanels.cell_type == solar_panel.cell_type,
-        SolarPanels.thickness == solar_panel.thickness,
-    )
-    
-    # Якщо вказані постачальники, фільтруємо за ними
-    if supplier_ids:
-        query = query.where(SolarPanels.supplier_id.in_(supplier_ids))
-    
-    # Додаємо завантаження зв'язаних об'єктів
-    query = query.options(
-        joinedload(SolarPanels.brand),
-        joinedload(SolarPanels.supplier)
+async def get_sollar_panel_price_history(data: SolarPanelPriceHistorySchema):
+    return await _price_history(
+        "sollar_panels", SollarPanels, SollarPanelsCurrent, SollarPanelsSuppliers, data,
+        lambda model: [
+            model.power == data.power,
+            model.panel_type == data.panel_type,
+            model.cell_type == data.cell_type,
+            model.thickness == data.thickness,
+        ],
     )
-    
-    result = await session.execute(query)
-    solar_panels = result.scalars().all()
-    
-    for solar_panel in solar_panels:
-        solar_panel_dict = {
-            "brand": solar_panel.brand.name if solar_panel.brand else "",
-            "supplier": solar_panel.supplier.name if solar_panel.supplier else "",
-            "name": solar_panel.name,
-            "power": solar_panel.power,
-            "panel_type": solar_panel.panel_type,
-            "cell_type": solar_panel.cell_type,
-            "thickness": solar_panel.thickness,
-            "price": solar_panel.price,
-            "price_per_w": solar_panel.price_per_w,
-            "created_at": solar_panel.created_at
-        }
-        prompt_data.append(solar_panel_dict)
-    await session.close()
 
-    chart_data = await get_chart_data(input=solar_panel, data=prompt_data)
-    chart = plot_combined_price_chart(datasets=chart_data, normalize=True)
 
-    return {"chart": chart}
+async def ai_sollar_panels_chart(data: ChartSolarPanelDataSchema):
+    history = await get_sollar_panel_price_history(
+        SolarPanelPriceHistorySchema(**data.model_dump(), mode=SeriesModeEnum.last)
+    )
+    if not history["series"] or data.format == ChartFormatEnum.json:
+        # Фронтенд будує графік сам з рядів цін постачальників
+        return {"chart": None, "format": data.format.value, "series": history["series"]}
+    chart = await render_price_chart(
+        series_to_datasets(history["series"], data.full_name), normalize=True, fmt=data.format.value
+    )
+    return {"chart": chart, "format": data.format.value}
 
 
-async def get_sollar_panel_price_comparison_data():
+async def get_sollar_panel_price_comparison_data(narrative: bool = True):
     session = SessionLocal()
     try:
-        competitor_ids = await get_competitors_ids(session)
-        my_id = await get_my_id(session)
-        
+        competitor_ids = await get_competitors_ids(session, "sollar_panels")
+        my_id = await get_my_id(session, "sollar_panels")
         
-        # Використовуємо joinedload для завантаження зв'язаних об'єктів
-        my_data_result = await session.execute(
-            select(SollarPanelsCurrent)
-            .options(joinedload(SollarPanelsCurrent.brand), joinedload(SollarPanelsCurrent.supplier))
-            .where(SollarPanelsCurrent.supplier_id == my_id, SollarPanelsCurrent.price > 0, SollarPanelsCurrent.power > 0)
+        columns = ("full_name", "price", "price_per_w", "power", "panel_type", "cell_type", "thickness", "brand_id")
+        valid = (SollarPanelsCurrent.price > 0, SollarPanelsCurrent.power > 0)
+        my_rows = await _comparison_rows(
+            session, SollarPanelsCurrent, SollarPanelsBrands, SollarPanelsSuppliers, columns,
+            (SollarPanelsCurrent.supplier_id == my_id, *valid),
         )
-        my_data = my_data_result.scalars().all()
-        my_brands_ids = [battery.brand_id for battery in my_data]
-        
-        competitors_data_result = await session.execute(
-            select(SollarPanelsCurrent)
-            .options(joinedload(SollarPanelsCurrent.brand), joinedload(SollarPanelsCurrent.supplier))
-            .where(SollarPanelsCurrent.supplier_id.in_(competitor_ids), SollarPanelsCurrent.brand_id.in_(my_brands_ids), SollarPanelsCurrent.price > 0, SollarPanelsCurrent.power > 0)
+        my_brands_ids = list({row["brand_id"] for row in my_rows})
+        competitor_rows = await _comparison_rows(
+            session, SollarPanelsCurrent, SollarPanelsBrands, SollarPanelsSuppliers, columns,
+            (SollarPanelsCurrent.supplier_id.in_(competitor_ids), SollarPanelsCurrent.brand_id.in_(my_brands_ids), *valid),
         )
-        competitors_data = competitors_data_result.scalars().all()
         
         # Додаємо await і розділяємо на два кроки
         supplier_result = await session.execute(select(SollarPanelsSuppliers).where(SollarPanelsSuppliers.id == my_id))
         supplier = supplier_result.scalar_one_or_none()
         my_company_name = supplier.name if supplier else "Моя компанія"
+    finally:
+        await session.close()
 
-
-        my_sollar_panels = [
-            SollarPanelBase(
-                brand=sollar_panel.brand.name if sollar_panel.brand else "",
-                supplier=sollar_panel.supplier.name if sollar_panel.supplier else "",
-                name=sollar_panel.name,
-                power=sollar_panel.power,
-                full_name=sollar_panel.full_name,
-                price=sollar_panel.price,
-                price_per_w=sollar_panel.price_per_w,
-                thickness=sollar_panel.thickness,
-                panel_type=sollar_panel.panel_type,
-                cell_type=sollar_panel.cell_type,
-                updated_at=sollar_panel.updated_at
-            ) for sollar_panel in my_data
-        ]
-        
-        competitors_sollar_panels = [
-            SollarPanelBase(
-                brand=sollar_panel.brand.name if sollar_panel.brand else "",
-                supplier=sollar_panel.supplier.name if sollar_panel.supplier else "",
-                name=sollar_panel.name,
-                full_name=sollar_panel.full_name,
-                power=sollar_panel.power,
-                price=sollar_panel.price,
-                price_per_w=sollar_panel.price_per_w,
-                thickness=sollar_panel.thickness,
-                panel_type=sollar_panel.panel_type,
-                cell_type=sollar_panel.cell_type,
-                updated_at=sollar_panel.updated_at
-            ) for sollar_panel in competitors_data
-        ]
-
-        # Викликаємо імпортовану функцію price_comparison
-        prompt = get_price_comparison_prompt(product_type="solar_panels", my_data=my_sollar_panels, competitors_data=competitors_sollar_panels, my_company_name=my_company_name)
+    comparison = await asyncio.to_thread(
+        compare_prices, my_rows, competitor_rows, SOLAR_SPEC, extra_columns=("price_per_w",)
+    )
+    print(f"📊 Порівняння цін сонячних панелей: {comparison['summary']}")
+    result = None
+    if narrative and comparison["summary"]["matched_models"]:
+        prompt = get_price_summary_prompt("solar_panels", comparison, my_company_name)
         result = await analytics_prompt(prompt)
-        return {"price_comparison": result}
-    finally:
-        await session.close()
\ No newline at end of file
+    elif narrative:
+        result = "Немає спільних з конкурентами моделей для порівняння"
+    return {"price_comparison": result, "comparison": comparison}
\ No newline at end of file
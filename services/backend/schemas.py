@@ -14,6 +14,26 @@ class SortOrderEnumModel(enum.Enum):
     asc = "asc"
     desc = "desc"
 
+class SeriesBucketEnum(enum.Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+class SeriesModeEnum(enum.Enum):
+    ohlc = "ohlc"
+    last = "last"
+
+class MarketAggregateEnum(enum.Enum):
+    specs = "specs"
+    suppliers = "suppliers"
+    brands = "brands"
+
+class ChartFormatEnum(enum.Enum):
+    png = "png"
+    svg = "svg"
+    # Лише ряди цін, графік малює клієнт
+    json = "json"
+
 
 class BatteryBase(BaseModel):
     brand: str = ""
@@ -45,6 +65,11 @@ class CurrentBattery(BaseModel):
     page_size: int = 10
     sort_by: SortEnumModel = SortEnumModel.price
     sort_order: SortOrderEnumModel = SortOrderEnumModel.desc
+    # Курсорна пагінація: use_cursor=True, cursor - next_cursor попередньої відповіді (None - перша сторінка)
+    use_cursor: bool = False
+    cursor: Optional[str] = None
+    # У курсорному режимі total_count - оцінка планувальника, якщо не просити точну
+    exact_count: bool = False
 
 class BatteryAnalyticDataSchema(BaseModel):
     batteries: List
@@ -61,6 +86,14 @@ class ChartBatteryDataSchema(BaseModel):
     region: str
     # Змінюємо ban_suppliers на include_suppliers для вибору постачальників
     include_suppliers: List[str] = []
+    format: ChartFormatEnum = ChartFormatEnum.png
+
+
+class BatteryPriceHistorySchema(ChartBatteryDataSchema):
+    bucket: SeriesBucketEnum = SeriesBucketEnum.day
+    mode: SeriesModeEnum = SeriesModeEnum.ohlc
+    # Лише за останні N днів
+    days: Optional[int] = None
 
 
 class CurrentSollarPanels(BaseModel):
@@ -76,6 +109,11 @@ class CurrentSollarPanels(BaseModel):
     page_size: int = 10
     sort_by: SortEnumModel = SortEnumModel.price
     sort_order: SortOrderEnumModel = SortOrderEnumModel.desc
+    # Курсорна пагінація: use_cursor=True, cursor - next_cursor попередньої відповіді (None - перша сторінка)
+    use_cursor: bool = False
+    cursor: Optional[str] = None
+    # У курсорному режимі total_count - оцінка планувальника, якщо не просити точну
+    exact_count: bool = False
 
 
 class SolarPanelAnalyticDataSchema(BaseModel):
@@ -92,6 +130,15 @@ class ChartSolarPanelDataSchema(BaseModel):
     thickness: float
     # Змінюємо ban_suppliers на include_suppliers для вибору постачальників
     include_suppliers: List[str] = []
+    # Фронтенд малює графік сонячних панелей сам
+    format: ChartFormatEnum = ChartFormatEnum.json
+
+
+class SolarPanelPriceHistorySchema(ChartSolarPanelDataSchema):
+    bucket: SeriesBucketEnum = SeriesBucketEnum.day
+    mode: SeriesModeEnum = SeriesModeEnum.ohlc
+    # Лише за останні N днів
+    days: Optional[int] = None
 
 
 class SollarPanelBase(BaseModel):
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, status
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Request, status
 import tempfile, os
 from typing import Optional, List
 from services.backend.schemas import( 
@@ -7,53 +7,72 @@ from services.backend.schemas import(
     ChartBatteryDataSchema, 
     CurrentSollarPanels, 
     SolarPanelAnalyticDataSchema, 
-    ChartSolarPanelDataSchema
+    ChartSolarPanelDataSchema,
+    BatteryPriceHistorySchema,
+    SolarPanelPriceHistorySchema,
+    MarketAggregateEnum,
     )
+from helpers.pagination import InvalidCursor
+from helpers.query_cache import cached_response, get_query_cache_stats
 from services.backend.controllers import (
     get_brands,
     get_suppliers,
     get_current_batteries,
     battery_ai_analytic,
     ai_battery_chart,
+    get_battery_price_history,
     get_battery_price_comparison_data,
     get_current_solar_panels,
     solar_panel_ai_analytic,
     ai_sollar_panels_chart,
-    get_sollar_panel_price_comparison_data
+    get_sollar_panel_price_history,
+    get_sollar_panel_price_comparison_data,
+    get_history_stats_data,
+    get_market_data,
     )
 
 
 router = APIRouter(prefix="", tags=["backend"])
 
+# Відповіді читальних ендпоінтів кешуються до наступного імпорту продукту (helpers/query_cache.py)
 @router.get("/batteries/brands")
-async def get_current_brands():
-    brands = await get_brands()
-    return {"brands": brands}
+async def get_current_brands(request: Request):
+    async def produce():
+        return {"brands": await get_brands()}
+    return await cached_response(request, "batteries", "brands", None, produce)
 
 
 @router.get("/batteries/suppliers")
-async def get_current_suppliers():
-    suppliers = await get_suppliers()
-    return {"suppliers": suppliers}
+async def get_current_suppliers(request: Request):
+    async def produce():
+        return {"suppliers": await get_suppliers()}
+    return await cached_response(request, "batteries", "suppliers", None, produce)
 
 
 @router.post("/batteries/current_batteries")
-async def get_current_batteries_data(data: CurrentBattery):
-    batteries = await get_current_batteries(
-        brand_ids=data.brand_ids,
-        supplier_ids=data.supplier_ids,
-        volumes=data.volumes,
-        polarities=data.polarities,
-        regions=data.regions,
-        electrolytes=data.electrolytes,
-        c_amps=data.c_amps,
-        page=data.page,
-        page_size=data.page_size,
-        price_diapason=data.price_diapason,
-        sort_by=data.sort_by,
-        sort_order=data.sort_order,
-    )
-    return batteries
+async def get_current_batteries_data(data: CurrentBattery, request: Request):
+    async def produce():
+        return await get_current_batteries(
+            brand_ids=data.brand_ids,
+            supplier_ids=data.supplier_ids,
+            volumes=data.volumes,
+            polarities=data.polarities,
+            regions=data.regions,
+            electrolytes=data.electrolytes,
+            c_amps=data.c_amps,
+            page=data.page,
+            page_size=data.page_size,
+            price_diapason=data.price_diapason,
+            sort_by=data.sort_by,
+            sort_order=data.sort_order,
+            use_cursor=data.use_cursor,
+            cursor=data.cursor,
+            exact_count=data.exact_count,
+        )
+    try:
+        return await cached_response(request, "batteries", "current_batteries", data, produce)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @router.post("/batteries/analytics")
@@ -62,53 +81,129 @@ async def get_battery_analytics(data: BatteryAnalyticDataSchema):
 
 
 @router.post("/batteries/chart")
-async def get_battery_chart(data: ChartBatteryDataSchema):
-    return await ai_battery_chart(data)
+async def get_battery_chart(data: ChartBatteryDataSchema, request: Request):
+    async def produce():
+        return await ai_battery_chart(data)
+    return await cached_response(request, "batteries", "chart", data, produce)
+
+
+@router.post("/batteries/price_history")
+async def get_battery_price_history_data(data: BatteryPriceHistorySchema, request: Request):
+    """Ряди цін товару по постачальниках: інтервал day/week/month, режим ohlc або last."""
+    async def produce():
+        return await get_battery_price_history(data)
+    return await cached_response(request, "batteries", "price_history", data, produce)
 
 @router.get("/batteries/price_comparison")
-async def get_battery_price_comparison():
-    return await get_battery_price_comparison_data()
+async def get_battery_price_comparison(request: Request, narrative: bool = True):
+    """Порівняння з конкурентами; narrative=false - лише пораховані цифри, без запиту до LLM."""
+    async def produce():
+        return await get_battery_price_comparison_data(narrative)
+    return await cached_response(request, "batteries", "price_comparison", {"narrative": narrative}, produce)
+
+@router.get("/batteries/market/{kind}")
+async def get_battery_market(
+    kind: MarketAggregateEnum,
+    request: Request,
+    brand_ids: Optional[List[int]] = Query(None),
+    only_ours: bool = False,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    """Агрегати ринку: specs - ціни по характеристиках, suppliers - покриття постачальників, brands - цінові індекси."""
+    params = {"kind": kind.value, "brand_ids": brand_ids, "only_ours": only_ours, "limit": limit, "offset": offset}
+    async def produce():
+        return await get_market_data("batteries", kind, brand_ids, only_ours, limit, offset)
+    return await cached_response(request, "batteries", "market", params, produce)
+
+@router.get("/history/stats")
+async def get_history_stats_endpoint(days: Optional[int] = None):
+    """Скільки рядків історії цін не записано як повтори і видалено компактуванням."""
+    return await get_history_stats_data(days)
+
+
+@router.get("/cache/stats")
+async def get_query_cache_stats_endpoint():
+    """Влучання, промахи і 304 кешу відповідей."""
+    return get_query_cache_stats()
+
 
 @router.get("/solar_panels/brands")
-async def get_solar_panels_brands():
-    brands = await get_brands(product_type="solar_panels")
-    return {"brands": brands}
+async def get_solar_panels_brands(request: Request):
+    async def produce():
+        return {"brands": await get_brands(product_type="solar_panels")}
+    return await cached_response(request, "sollar_panels", "brands", None, produce)
 
 @router.get("/solar_panels/suppliers")
-async def get_solar_panels_suppliers():
-    suppliers = await get_suppliers(product_type="solar_panels")
-    return {"suppliers": suppliers}
+async def get_solar_panels_suppliers(request: Request):
+    async def produce():
+        return {"suppliers": await get_suppliers(product_type="solar_panels")}
+    return await cached_response(request, "sollar_panels", "suppliers", None, produce)
 
 
 @router.post("/solar_panels/current_solar_panels")
-async def get_current_solar_panels_data(data: CurrentSollarPanels):
-    sollar_panels = await get_current_solar_panels(
-        brand_ids=data.brand_ids,
-        supplier_ids=data.supplier_ids,
-        power=data.power,
-        panel_type=data.panel_type,
-        cell_type=data.cell_type,
-        thickness=data.thickness,
-        price_per_w=data.price_per_w,
-        page=data.page,
-        page_size=data.page_size,
-        price_diapason=data.price_diapason,
-        sort_by=data.sort_by,
-        sort_order=data.sort_order,
-    )
-    return sollar_panels
+async def get_current_solar_panels_data(data: CurrentSollarPanels, request: Request):
+    async def produce():
+        return await get_current_solar_panels(
+            brand_ids=data.brand_ids,
+            supplier_ids=data.supplier_ids,
+            power=data.power,
+            panel_type=data.panel_type,
+            cell_type=data.cell_type,
+            thickness=data.thickness,
+            price_per_w_diapason=data.price_per_w,
+            page=data.page,
+            page_size=data.page_size,
+            price_diapason=data.price_diapason,
+            sort_by=data.sort_by,
+            sort_order=data.sort_order,
+            use_cursor=data.use_cursor,
+            cursor=data.cursor,
+            exact_count=data.exact_count,
+        )
+    try:
+        return await cached_response(request, "sollar_panels", "current_solar_panels", data, produce)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.post("/solar_panels/analytics")
 async def get_sollar_panels_analytics(data: SolarPanelAnalyticDataSchema):
     return await solar_panel_ai_analytic(data)
 
 @router.post("/solar_panels/chart")
-async def get_sollar_panels_chart(data: ChartSolarPanelDataSchema):
-    return await ai_sollar_panels_chart(data)
+async def get_sollar_panels_chart(data: ChartSolarPanelDataSchema, request: Request):
+    async def produce():
+        return await ai_sollar_panels_chart(data)
+    return await cached_response(request, "sollar_panels", "chart", data, produce)
+
+
+@router.post("/solar_panels/price_history")
+async def get_sollar_panels_price_history(data: SolarPanelPriceHistorySchema, request: Request):
+    """Ряди цін товару по постачальниках: інтервал day/week/month, режим ohlc або last."""
+    async def produce():
+        return await get_sollar_panel_price_history(data)
+    return await cached_response(request, "sollar_panels", "price_history", data, produce)
 
 @router.get("/solar_panels/price_comparison")
-async def get_sollar_panels_price_comparison():
-    return await get_sollar_panel_price_comparison_data()
+async def get_sollar_panels_price_comparison(request: Request, narrative: bool = True):
+    async def produce():
+        return await get_sollar_panel_price_comparison_data(narrative)
+    return await cached_response(request, "sollar_panels", "price_comparison", {"narrative": narrative}, produce)
+
+@router.get("/solar_panels/market/{kind}")
+async def get_sollar_panels_market(
+    kind: MarketAggregateEnum,
+    request: Request,
+    brand_ids: Optional[List[int]] = Query(None),
+    only_ours: bool = False,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    """Агрегати ринку: specs - ціни по характеристиках, suppliers - покриття постачальників, brands - цінові індекси."""
+    params = {"kind": kind.value, "brand_ids": brand_ids, "only_ours": only_ours, "limit": limit, "offset": offset}
+    async def produce():
+        return await get_market_data("sollar_panels", kind, brand_ids, only_ours, limit, offset)
+    return await cached_response(request, "sollar_panels", "market", params, produce)
 
 # Ендпоінти для парсерів акумуляторів
 @router.post("/upload_batteries/ai_upload/parse_competitor")
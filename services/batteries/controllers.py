@@ -1,16 +1,13 @@
+import asyncio
 from sqlalchemy import create_engine, text
 from typing import Callable, List, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from db.database import SessionLocal
 from db.models import Batteries, CurrentBatteries, BatteriesBrands, BatteriesSuppliers
-from helpers.brand import get_or_create_brand
-from helpers.suplier import get_or_create_supplier
-from helpers.competitors import get_or_create_competitor
+from helpers.ingestion import ingest_products
 from services.batteries.parsers.competitors_head import parse_ai_reports as parse_ai_reports_competitors
 from services.batteries.parsers.ai_txt_head import parse_ai_reports as parse_ai_reports_ai_txt
-from helpers.me import get_or_create_me
-from datetime import datetime
 
 # Функція для отримання всіх записів з таблиці Good бази TorgSoftDB
 def get_all_goods():
@@ -26,12 +23,13 @@ def get_all_goods():
     # Повертаємо дані у вигляді списку словників
     return [dict(zip(columns, row)) for row in rows]
 
+
 async def process_batteries_import(
     file_path: str | None = None,
     parser_func: Callable[[str], List[Dict[str, Any]]] = parse_ai_reports_ai_txt,
     supplier_name: str = "",
     docs_link: str | None = None,
-) -> None:
+) -> Dict[str, Any]:
     """
     Парсит XLSX через parser_func, ищет supplier и brand по имени, затем записывает в таблицу Batteries и CurrentBatteries (create or update).
     """
@@ -39,84 +37,14 @@ async def process_batteries_import(
     try:
         # Парсим файл до подключения к БД
         data = ""
+        # Розбір файлу (PDF, OCR, LLM) блокуючий - виконуємо в потоці, щоб не зупиняти інші запити
         if file_path:
-            data = parser_func(file_path)
+            data = await asyncio.to_thread(parser_func, file_path)
         if docs_link:
-            data = parser_func(docs_link)
+            data = await asyncio.to_thread(parser_func, docs_link)
         print(data)
 
-        
-        # Создаем новую сессию для каждой операции
-        session = SessionLocal()
-        try:
-            # Ищем поставщика
-            supplier_id = await get_or_create_supplier(session, supplier_name)
-            
-            # Обрабатываем каждую запись
-            for entry in data:
-                brand_name = entry.get("brand")
-                # Ищем бренд
-                brand_id = await get_or_create_brand(session, brand_name)
-                
-                # Вставляем запись в Batteries
-                battery = Batteries(
-                    name=entry.get("name"),
-                    price=entry.get("price"),
-                    volume=float(entry.get("volume")) if entry.get("volume") else None,
-                    full_name=entry.get("full_name"),
-                    brand_id=brand_id,
-                    supplier_id=supplier_id,
-                    c_amps=entry.get("c_amps"),
-                    region=entry.get("region"),
-                    polarity=entry.get("polarity"),
-                    electrolyte=entry.get("electrolyte"),
-                )
-                session.add(battery)
-                
-                # Upsert в CurrentBatteries
-                res = await session.execute(select(CurrentBatteries).where(CurrentBatteries.full_name == entry.get("full_name")))
-                current = res.scalar_one_or_none()
-                if current:
-                    current.name = entry.get("name")
-                    current.price = entry.get("price")
-                    current.volume = float(entry.get("volume")) if entry.get("volume") else None
-                    current.brand_id = brand_id
-                    current.supplier_id = supplier_id
-                    current.c_amps = entry.get("c_amps")
-                    current.region = entry.get("region")
-                    current.polarity = entry.get("polarity")
-                    current.electrolyte = entry.get("electrolyte")
-                    current.updated_at = datetime.utcnow()  # Обновляем дату изменения
-                else:
-                    current = CurrentBatteries(
-                        name=entry.get("name"),
-                        price=entry.get("price"),
-                        volume=float(entry.get("volume")) if entry.get("volume") else None,
-                        full_name=entry.get("full_name"),
-                        brand_id=brand_id,
-                        supplier_id=supplier_id,
-                        c_amps=entry.get("c_amps"),
-                        region=entry.get("region"),
-                        polarity=entry.get("polarity"),
-                        electrolyte=entry.get("electrolyte"),
-                        # updated_at заполнится автоматически значением по умолчанию
-                    )
-                    session.add(current)
-                
-                # Коммитим изменения после каждых 10 записей
-                if len(session.new) >= 10:
-                    await session.commit()
-            
-            # Финальный коммит для оставшихся записей
-            await session.commit()
-            
-        except Exception as e:
-            # Откатываем изменения в случае ошибки
-            await session.rollback()
-            raise e
-        finally:
-            # Всегда закрываем сессию
-            await session.close()
+        return await ingest_products(data, "batteries", supplier_name, "supplier")
     except Exception as e:
         # Логируем ошибку и пробрасываем дальше
         print(f"Ошибка при импорте: {e}")
@@ -127,7 +55,7 @@ async def process_batteries_import(
 async def process_batteries_import_parser(
     async_func,
     supplier_name: str
-) -> None:
+) -> Dict[str, Any]:
     """
     Парсит XLSX через parser_func, ищет supplier и brand по имени, затем записывает в таблицу Batteries и CurrentBatteries (create or update).
     """
@@ -135,78 +63,8 @@ async def process_batteries_import_parser(
         # Парсим файл до подключения к БД
         data = await parse_ai_reports_competitors(async_func)
         print(data)
-        
-        # Создаем новую сессию для каждой операции
-        session = SessionLocal()
-        try:
-            # Ищем поставщика
-            competitor_id = await get_or_create_competitor(session, supplier_name)
-            
-            # Обрабатываем каждую запись
-            for entry in data:
-                brand_name = entry.get("brand")
-                # Ищем бренд
-                brand_id = await get_or_create_brand(session, brand_name)
-                
-                # Вставляем запись в Batteries
-                battery = Batteries(
-                    name=entry.get("name"),
-                    price=float(entry.get("price")),
-                    volume=float(entry.get("volume")) if entry.get("volume") else None,
-                    full_name=entry.get("full_name"),
-                    brand_id=brand_id,
-                    supplier_id=competitor_id,
-                    c_amps=entry.get("c_amps"),
-                    region=entry.get("region"),
-                    polarity=entry.get("polarity"),
-                    electrolyte=entry.get("electrolyte"),
-                )
-                session.add(battery)
-                
-                # Upsert в CurrentBatteries
-                res = await session.execute(select(CurrentBatteries).where(CurrentBatteries.full_name == entry.get("full_name")))
-                current = res.scalar_one_or_none()
-                if current:
-                    current.name = entry.get("name")
-                    current.price = float(entry.get("price"))
-                    current.volume = float(entry.get("volume")) if entry.get("volume") else None
-                    current.brand_id = brand_id
-                    current.supplier_id = competitor_id
-                    current.c_amps = entry.get("c_amps")
-                    current.region = entry.get("region")
-                    current.polarity = entry.get("polarity")
-                    current.electrolyte = entry.get("electrolyte")
-                    current.updated_at = datetime.utcnow()  # Обновляем дату изменения
-                else:
-                    current = CurrentBatteries(
-                        name=entry.get("name"),
-                        price=float(entry.get("price")),
-                        volume=float(entry.get("volume")) if entry.get("volume") else None,
-                        full_name=entry.get("full_name"),
-                        brand_id=brand_id,
-                        supplier_id=competitor_id,
-                        c_amps=entry.get("c_amps"),
-                        region=entry.get("region"),
-                        polarity=entry.get("polarity"),
-                        electrolyte=entry.get("electrolyte"),
-                        # updated_at заполнится автоматически значением по умолчанию
-                    )
-                    session.add(current)
-                
-                # Коммитим изменения после каждых 10 записей
-                if len(session.new) >= 10:
-                    await session.commit()
-            
-            # Финальный коммит для оставшихся записей
-            await session.commit()
-            
-        except Exception as e:
-            # Откатываем изменения в случае ошибки
-            await session.rollback()
-            raise e
-        finally:
-            # Всегда закрываем сессию
-            await session.close()
+
+        return await ingest_products(data, "batteries", supplier_name, "competitor")
     except Exception as e:
         # Логируем ошибку и пробрасываем дальше
         print(f"Ошибка при импорте: {e}")
@@ -217,85 +75,15 @@ async def process_batteries_import_parser(
 async def me_parser(
     async_func,
     supplier_name: str
-) -> None:
+) -> Dict[str, Any]:
 
     try:
         print(supplier_name)
         # Парсим файл до подключения к БД
         data = await parse_ai_reports_competitors(async_func)
         print("data complited")
-        
-        # Создаем новую сессию для каждой операции
-        session = SessionLocal()
-        try:
-            # Ищем поставщика
-            me_id = await get_or_create_me(session, supplier_name)
-            
-            # Обрабатываем каждую запись
-            for entry in data:
-                brand_name = entry.get("brand")
-                # Ищем бренд
-                brand_id = await get_or_create_brand(session, brand_name)
-                
-                # Вставляем запись в Batteries
-                battery = Batteries(
-                    name=entry.get("name"),
-                    price=float(entry.get("price")),
-                    volume=float(entry.get("volume")) if entry.get("volume") else None,
-                    full_name=entry.get("full_name"),
-                    brand_id=brand_id,
-                    supplier_id=me_id,
-                    c_amps=entry.get("c_amps"),
-                    region=entry.get("region"),
-                    polarity=entry.get("polarity"),
-                    electrolyte=entry.get("electrolyte"),
-                )
-                session.add(battery)
-                
-                # Upsert в CurrentBatteries
-                res = await session.execute(select(CurrentBatteries).where(CurrentBatteries.full_name == entry.get("full_name")))
-                current = res.scalar_one_or_none()
-                if current:
-                    current.name = entry.get("name")
-                    current.price = float(entry.get("price"))
-                    current.volume = float(entry.get("volume")) if entry.get("volume") else None
-                    current.brand_id = brand_id
-                    current.supplier_id = me_id
-                    current.c_amps = entry.get("c_amps")
-                    current.region = entry.get("region")
-                    current.polarity = entry.get("polarity")
-                    current.electrolyte = entry.get("electrolyte")
-                    current.updated_at = datetime.utcnow()  # Обновляем дату изменения
-                else:
-                    current = CurrentBatteries(
-                        name=entry.get("name"),
-                        price=float(entry.get("price")),
-                        volume=float(entry.get("volume")) if entry.get("volume") else None,
-                        full_name=entry.get("full_name"),
-                        brand_id=brand_id,
-                        supplier_id=me_id,
-                        c_amps=entry.get("c_amps"),
-                        region=entry.get("region"),
-                        polarity=entry.get("polarity"),
-                        electrolyte=entry.get("electrolyte"),
-                        # updated_at заполнится автоматически значением по умолчанию
-                    )
-                    session.add(current)
-                
-                # Коммитим изменения после каждых 10 записей
-                if len(session.new) >= 10:
-                    await session.commit()
-            
-            # Финальный коммит для оставшихся записей
-            await session.commit()
-            
-        except Exception as e:
-            # Откатываем изменения в случае ошибки
-            await session.rollback()
-            raise e
-        finally:
-            # Всегда закрываем сессию
-            await session.close()
+
+        return await ingest_products(data, "batteries", supplier_name, "me")
     except Exception as e:
         # Логируем ошибку и пробрасываем дальше
         print(f"Ошибка при импорте: {e}")
@@ -305,83 +93,14 @@ async def me_parser(
 async def parse_txt(
     text: str,
     supplier_name: str
-) -> None:
+) -> Dict[str, Any]:
 
     try:
         # Парсим файл до подключения к БД
         data = await parse_ai_reports_ai_txt(text)
-        
-        # Создаем новую се ссию для каждой операции
-        session = SessionLocal()
-        try:
-            # Ищем поставщика
-            competitor_id = await get_or_create_competitor(session, supplier_name)
-            
-            # Обрабатываем каждую запись
-            for entry in data:
-                brand_name = entry.get("brand")
-                # Ищем бренд
-                brand_id = await get_or_create_brand(session, brand_name)
-                
-                battery = Batteries(
-                    name=entry.get("name"),
-                    price=float(entry.get("price")),
-                    volume=float(entry.get("volume")) if entry.get("volume") else None,
-                    full_name=entry.get("full_name"),
-                    brand_id=brand_id,
-                    supplier_id=competitor_id,
-                    c_amps=entry.get("c_amps"),
-                    region=entry.get("region"),
-                    polarity=entry.get("polarity"),
-                    electrolyte=entry.get("electrolyte"),
-                )
-                session.add(battery)
-                
-                # Upsert в CurrentBatteries
-                res = await session.execute(select(CurrentBatteries).where(CurrentBatteries.full_name == entry.get("full_name")))
-                current = res.scalar_one_or_none()
-                if current:
-                    current.name = entry.get("name")
-                    current.price = float(entry.get("price"))
-                    current.volume = float(entry.get("volume")) if entry.get("volume") else None
-                    current.brand_id = brand_id
-                    current.supplier_id = competitor_id
-                    current.c_amps = entry.get("c_amps")
-                    current.region = entry.get("region")
-                    current.polarity = entry.get("polarity")
-                    current.electrolyte = entry.get("electrolyte")
-                    current.updated_at = datetime.utcnow()  # Обновляем дату изменения
-                else:
-                    current = CurrentBatteries(
-                        name=entry.get("name"),
-                        price=float(entry.get("price")),
-                        volume=float(entry.get("volume")) if entry.get("volume") else None,
-                        full_name=entry.get("full_name"),
-                        brand_id=brand_id,
-                        supplier_id=competitor_id,
-                        c_amps=entry.get("c_amps"),
-                        region=entry.get("region"),
-                        polarity=entry.get("polarity"),
-                        electrolyte=entry.get("electrolyte"),
-                        # updated_at заполнится автоматически значением по умолчанию
-                    )
-                    session.add(current)
-                
-                # Коммитим изменения после каждых 10 записей
-                if len(session.new) >= 10:
-                    await session.commit()
-            
-            # Финальный коммит для оставшихся записей
-            await session.commit()
-            
-        except Exception as e:
-            # Откатываем изменения в случае ошибки
-            await session.rollback()
-            raise e
-        finally:
-            # Всегда закрываем сессию
-            await session.close()
+
+        return await ingest_products(data, "batteries", supplier_name, "competitor")
     except Exception as e:
         # Логируем ошибку и пробрасываем дальше
         print(f"Ошибка при импорте: {e}")
-        raise e
\ No newline at end of file
+        raise e
@@ -1,10 +1,11 @@
 from services.batteries.parsers.ai_parser import ai_parser
-from helpers.csv_export import convert_to_csv
+from helpers.csv_export import iter_rows
 from services.batteries.parsers.ai_batteries_filter import ai_filter
 
 
-def parse_ai_reports(file_path: str):
-    csv_report = convert_to_csv(file_path)
-    ai_data = ai_parser(csv_report)
+def parse_ai_reports(file_path, file_name: str | None = None):
+    # Рядки читаються потоком прямо з файлу (або UploadFile.file), без проміжного CSV
+    rows = iter_rows(file_path, file_name)
+    ai_data = ai_parser(rows)
     result = ai_filter(ai_data)
     return result
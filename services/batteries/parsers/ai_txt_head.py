@@ -1,8 +1,10 @@
+import asyncio
 from services.batteries.parsers.ai_txt_parse import ai_parser
 from services.batteries.parsers.ai_batteries_filter import ai_filter
 
 
 async def parse_ai_reports(data: str):
     ai_data = await ai_parser(data)
-    result = ai_filter(ai_data)
+    # Фільтр синхронний (чекає на ліміти моделі) - поза event loop
+    result = await asyncio.to_thread(ai_filter, ai_data)
     return result
\ No newline at end of file
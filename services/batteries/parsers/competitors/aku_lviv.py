@@ -3,22 +3,21 @@ import os
 import sys
 from typing import List, Tuple
 import random
-import requests
 import asyncio
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from helpers.get_user_agent import get_headers
+from helpers.http_client import get_http_client
 
 
 
 async def parse_batteries_aku_lviv():
-    headers = get_headers()
     url = "https://aku.lviv.ua/"
-    html = requests.get(url, headers=headers)
-    if html.status_code != 200:
-        raise Exception("Failed to fetch page")
+    async with get_http_client().get(url) as response:
+        if response.status != 200:
+            raise Exception("Failed to fetch page")
+        html = await response.text()
     print(f"✅ Завантажено сторінку 1 {url}")
-    soup = BeautifulSoup(html.text, 'html.parser')
+    soup = BeautifulSoup(html, 'html.parser')
     catalog = soup.find("div", class_="fm catalog")
     return [{"page_num": 1, "batteries": catalog}]
 
@@ -1,19 +1,17 @@
 import asyncio
-import aiohttp
 from bs4 import BeautifulSoup
 import os
 import sys
 from typing import List, Tuple
-import random
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from helpers.get_user_agent import get_headers
+from helpers.http_client import HttpClient, get_http_client
 
 
 def get_page_url(page: int) -> str:
     return f"https://dviklemy.com.ua/avtomobilni/filter/brand-bosch-or-exide-or-fiamm-or-inter-or-ista-or-platin-or-topla-or-varta-or-westa?utm_source=google&utm_medium=cpc&utm_campaign=search_akumulyatory_dlya_avto&utm_content=&utm_term=&gad_source=1&gbraid=0AAAAAp6FrgpN4ij8iJvErj1xPj5i3gqZS&gclid=Cj0KCQjww-HABhCGARIsALLO6Xx0m_YJ8ag2PWNGMCbToQcN8UtitmNk4UifhIl-0KD5LS32IEtELeMaAjECEALw_wcB&page={page}"
 
-async def fetch_html(session: aiohttp.ClientSession, url: str, page_num: int) -> Tuple[str, int]:
+async def fetch_html(session: HttpClient, url: str, page_num: int) -> Tuple[str, int]:
     try:
         async with session.get(url) as response:
             if response.status == 200:
@@ -28,8 +26,7 @@ async def fetch_html(session: aiohttp.ClientSession, url: str, page_num: int) ->
         return "", page_num
 
 async def get_last_page() -> int:
-    headers = get_headers()
-    async with aiohttp.ClientSession(headers=headers) as session:
+    async with get_http_client() as session:
         url = "https://dviklemy.com.ua/avtomobilni/filter/brand-bosch-or-exide-or-fiamm-or-inter-or-ista-or-platin-or-topla-or-varta-or-westa?utm_source=google&utm_medium=cpc&utm_campaign=search_akumulyatory_dlya_avto&utm_content=&utm_term=&gad_source=1&gbraid=0AAAAAp6FrgpN4ij8iJvErj1xPj5i3gqZS&gclid=Cj0KCQjww-HABhCGARIsALLO6Xx0m_YJ8ag2PWNGMCbToQcN8UtitmNk4UifhIl-0KD5LS32IEtELeMaAjECEALw_wcB&page=1"
         html, _ = await fetch_html(session, url, 0)
         soup = BeautifulSoup(html, 'html.parser')
@@ -58,7 +55,7 @@ def extract_batteries_links_from_html(html: str) -> List[str]:
     return batteries_links
 
 
-async def fetch_battery_details(session: aiohttp.ClientSession, url: str):
+async def fetch_battery_details(session: HttpClient, url: str):
     """
     Асинхронно отримує детальну інформацію про акумулятор за посиланням
     """
@@ -88,7 +85,7 @@ async def fetch_battery_details(session: aiohttp.ClientSession, url: str):
         print(f"❌ Помилка при отриманні деталей {url}: {e}")
         return None
 
-async def extract_batteries_html(session: aiohttp.ClientSession, links: List[str], page_num: int):
+async def extract_batteries_html(session: HttpClient, links: List[str], page_num: int):
     """
     Асинхронно отримує детальну інформацію про акумулятори за посиланнями
     """
@@ -108,16 +105,14 @@ async def extract_batteries_html(session: aiohttp.ClientSession, links: List[str
     return {"page_num": page_num, "batteries": batteries}
 
 async def parse_batteries_dvi_klemy() -> List[str]:
-    headers = get_headers()
     last_page = await get_last_page()
     all_batteries = []
 
-    async with aiohttp.ClientSession(headers=headers) as session:
+    async with get_http_client() as session:
         tasks = []
         for i in range(1, last_page + 1):
             url = get_page_url(i)
             tasks.append(fetch_html(session, url, i))
-            await asyncio.sleep(random.uniform(0.1, 0.3))  # антиспам-пауза
 
         results = await asyncio.gather(*tasks)
 
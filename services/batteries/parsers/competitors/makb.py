@@ -1,13 +1,11 @@
 import asyncio
-import aiohttp
 from bs4 import BeautifulSoup
 import os
 import sys
 from typing import List, Tuple
-import random
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from helpers.get_user_agent import get_headers
+from helpers.http_client import HttpClient, get_http_client
 
 
 def get_page_url(page: int) -> str:
@@ -17,7 +15,7 @@ def get_page_url(page: int) -> str:
     return f"https://makb.com.ua/akkumuliatory-legkovye/brand-bosch-or-exide-or-fiamm-or-platin-or-plazma-or-rocket-or-varta-or-westa?per_page={page_num}"
 
 
-async def fetch_html(session: aiohttp.ClientSession, url: str, page_num: int) -> Tuple[str, int]:
+async def fetch_html(session: HttpClient, url: str, page_num: int) -> Tuple[str, int]:
     try:
         async with session.get(url) as response:
             if response.status == 200:
@@ -33,8 +31,7 @@ async def fetch_html(session: aiohttp.ClientSession, url: str, page_num: int) ->
 
 
 async def get_last_page() -> int:
-    headers = get_headers()
-    async with aiohttp.ClientSession(headers=headers) as session:
+    async with get_http_client() as session:
         url = "https://makb.com.ua/akkumuliatory-legkovye/brand-bosch-or-exide-or-fiamm-or-platin-or-plazma-or-rocket-or-varta-or-westa"
         html, _ = await fetch_html(session, url, 0)
         soup = BeautifulSoup(html, 'html.parser')
@@ -61,7 +58,7 @@ def extract_batteries_links_from_html(html: str) -> List[str]:
         batteries_links.append(link_div["href"])
     return batteries_links
 
-async def fetch_battery_details(session: aiohttp.ClientSession, url: str):
+async def fetch_battery_details(session: HttpClient, url: str):
     """
     Асинхронно отримує детальну інформацію про акумулятор за посиланням
     """
@@ -97,7 +94,7 @@ async def fetch_battery_details(session: aiohttp.ClientSession, url: str):
         return None
 
 
-async def extract_batteries_html(session: aiohttp.ClientSession, links: List[str], page_num: int):
+async def extract_batteries_html(session: HttpClient, links: List[str], page_num: int):
     """
     Асинхронно отримує детальну інформацію про акумулятори за посиланнями
     """
@@ -117,16 +114,14 @@ async def extract_batteries_html(session: aiohttp.ClientSession, links: List[str
     return {"page_num": page_num, "batteries": batteries}
 
 async def parse_batteries_makb() -> List[str]:
-    headers = get_headers()
     last_page = await get_last_page()
     all_batteries = []
 
-    async with aiohttp.ClientSession(headers=headers) as session:
+    async with get_http_client() as session:
         tasks = []
         for i in range(1, last_page + 1):
             url = get_page_url(i)
             tasks.append(fetch_html(session, url, i))
-            await asyncio.sleep(random.uniform(0.1, 0.3))  # антиспам-пауза
 
         results = await asyncio.gather(*tasks)
 
@@ -1,19 +1,17 @@
 import asyncio
-import aiohttp
 from bs4 import BeautifulSoup
 import os
 import sys
 from typing import List, Tuple
-import random
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from helpers.get_user_agent import get_headers
+from helpers.http_client import HttpClient, get_http_client
 
 
 def get_page_url(page: int) -> str:
     return f"https://shyp-shyna.com.ua/catalogs/batteries/filter/brand-a_mega+exide+topla+westa/?page={page}"
 
-async def fetch_html(session: aiohttp.ClientSession, url: str, page_num: int) -> Tuple[str, int]:
+async def fetch_html(session: HttpClient, url: str, page_num: int) -> Tuple[str, int]:
     try:
         async with session.get(url) as response:
             if response.status == 200:
@@ -45,7 +43,7 @@ def extract_batteries_links_from_html(html: str) -> List[str]:
     return batteries_links
 
 
-async def fetch_battery_details(session: aiohttp.ClientSession, url: str):
+async def fetch_battery_details(session: HttpClient, url: str):
     """
     Асинхронно отримує детальну інформацію про акумулятор за посиланням
     """
@@ -69,7 +67,7 @@ async def fetch_battery_details(session: aiohttp.ClientSession, url: str):
         print(f"❌ Помилка при отриманні деталей {url}: {e}")
         return None
 
-async def extract_batteries_html(session: aiohttp.ClientSession, links: List[str], page_num: int):
+async def extract_batteries_html(session: HttpClient, links: List[str], page_num: int):
     """
     Асинхронно отримує детальну інформацію про акумулятори за посиланнями
     """
@@ -90,16 +88,14 @@ async def extract_batteries_html(session: aiohttp.ClientSession, links: List[str
 
 
 async def parse_batteries_shyp_shuna() -> List[str]:
-    headers = get_headers()
     last_page = await get_last_page()
     all_batteries = []
 
-    async with aiohttp.ClientSession(headers=headers) as session:
+    async with get_http_client() as session:
         tasks = []
         for i in range(1, last_page + 1):
             url = get_page_url(i)
             tasks.append(fetch_html(session, url, i))
-            await asyncio.sleep(random.uniform(0.1, 0.3)) # антиспам-пауза
 
         results = await asyncio.gather(*tasks)
 
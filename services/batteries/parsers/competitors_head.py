@@ -1,5 +1,27 @@
+import asyncio
 from services.batteries.parsers.ai_competitors_parser import ai_parser
 from services.batteries.parsers.ai_batteries_filter import ai_filter
+from helpers.crawl_orchestrator import run_competitors
+from services.batteries.parsers.competitors.avto_zvuk import parse_batteries_avto_zvuk
+from services.batteries.parsers.competitors.aku_lviv import parse_batteries_aku_lviv
+from services.batteries.parsers.competitors.makb import parse_batteries_makb
+from services.batteries.parsers.competitors.shyp_shuna import parse_batteries_shyp_shuna
+from services.batteries.parsers.competitors.aet_ua import parse_batteries_aet_ua
+from services.batteries.parsers.competitors.akb_mag import parse_batteries_akb_mag
+from services.batteries.parsers.competitors.akb_plus import parse_batteries_akb_plus
+from services.batteries.parsers.competitors.dvi_klemy import parse_batteries_dvi_klemy
+
+# Парсери сайтів конкурентів (запускаються паралельно через crawl_orchestrator)
+COMPETITOR_PARSERS = [
+    parse_batteries_makb,
+    parse_batteries_avto_zvuk,
+    parse_batteries_aku_lviv,
+    parse_batteries_shyp_shuna,
+    parse_batteries_aet_ua,
+    parse_batteries_akb_mag,
+    parse_batteries_akb_plus,
+    parse_batteries_dvi_klemy,
+]
 
 
 async def parse_ai_reports(acync_parse_func):
@@ -20,7 +42,8 @@ async def parse_ai_reports(acync_parse_func):
         print(f"Дані після AI парсера: {len(ai_data) if isinstance(ai_data, list) else ai_data}")
         
         # Фільтруємо дані
-        result = ai_filter(ai_data)
+        # Фільтр синхронний (чекає на ліміти моделі) - поза event loop
+        result = await asyncio.to_thread(ai_filter, ai_data)
         print(f"Результат після фільтрації: {len(result) if isinstance(result, list) else result}")
         
         return result
@@ -28,3 +51,8 @@ async def parse_ai_reports(acync_parse_func):
         print(f"Помилка в parse_ai_reports: {e}")
         # Повертаємо порожній список у випадку помилки
         return []
+
+
+async def crawl_competitors(background: bool = False):
+    """Парсинг усіх конкурентів продукту через оркестратор (див. helpers/crawl_orchestrator.py)."""
+    return await run_competitors("batteries", COMPETITOR_PARSERS, ai_parser, ai_filter, background=background)
@@ -0,0 +1,212 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from helpers.brand import get_cached_brand_names
+from helpers.normalization import A_CURRENT_RE, EN_CURRENT_RE
+
+# Рядки з впевненістю нижче порогу йдуть в Gemini
+CONFIDENCE_THRESHOLD = 0.8
+
+# Базовий словник брендів; доповнюється брендами з бази (кеш helpers.brand)
+KNOWN_BRANDS = (
+    "VARTA", "BOSCH", "EXIDE", "MUTLU", "ROCKET", "CENTRA", "TOPLA", "BANNER", "AKOM",
+    "WESTA", "FORSE", "ISTA", "A-MEGA", "ENERGIZER", "YUASA", "FIAMM", "MONBAT", "PLATIN",
+    "BRAVO", "ZAP", "ATLAS", "SOLITE", "DELKOR",
+    "MEDALIST", "HANKOOK", "AMAXX", "ENERGY BOX", "BLACK HORSE", "INCI AKU",
+    "OPTIMA", "PANASONIC", "GS", "AURORA", "MAGNUM", "ARCTIC", "JENOX", "DETA", "TUDOR",
+    "CRAFT", "KRAFTWERK", "TAB", "VOLTMAN", "BARS", "TYUMEN", "ENERGIA", "GIGAWATT",
+)
+
+_VOLUME_RE = re.compile(
+    r"(?<![\d.,])(\d{1,3}(?:[.,]\d+)?)\s*(?:Ah|A/h|A\*h|Аг|Ач|А/г|А\*г)(?![a-zа-яіїє])",
+    re.IGNORECASE,
+)
+# Українське маркування 6СТ-60 (60 - ємність)
+_GOST_VOLUME_RE = re.compile(r"\b6\s*[СC][ТT]\s*-?\s*(\d{2,3})", re.IGNORECASE)
+_POLARITY_R_RE = re.compile(r"\(\s*-\s*/?\s*\+\s*\)|-\s*/\s*\+|\bR\s*\+|\+\s*R\b|\bправ", re.IGNORECASE)
+_POLARITY_L_RE = re.compile(r"\(\s*\+\s*/?\s*-\s*\)|\+\s*/\s*-|\bL\s*\+|\+\s*L\b|\bлів|\bлев", re.IGNORECASE)
+_ASIA_RE = re.compile(r"\bASIA\b|\bJIS\b|\bазі[яї]\b|\bазия\b", re.IGNORECASE)
+_AGM_RE = re.compile(r"\bAGM\b", re.IGNORECASE)
+_GEL_RE = re.compile(r"\bGEL\b|\bгел", re.IGNORECASE)
+# Колонки з пусковим струмом (лише їх перевіряємо на струм, крім повної назви)
+_AMPS_HEADER_RE = re.compile(r"\bEN\b|\bCCA\b|amp|пуск|струм|\bток", re.IGNORECASE)
+_PRICE_HEADER_RE = re.compile(r"ц[іеi]н|price|опт|вартіст|стоимост|грн|uah|usd|\$", re.IGNORECASE)
+_NUMBER_RE = re.compile(r"^\s*(\d[\d\s]*(?:[.,]\d+)?)\s*(?:грн\.?|uah|usd|\$|₴)?\s*$", re.IGNORECASE)
+_LETTERS_RE = re.compile(r"[a-zа-яіїє]", re.IGNORECASE)
+_NAME_STOP_PATTERNS = (_VOLUME_RE, _GOST_VOLUME_RE, EN_CURRENT_RE, A_CURRENT_RE, _POLARITY_R_RE, _POLARITY_L_RE)
+
+
+@lru_cache(maxsize=8)
+def _compile_brand_pattern(brands: Tuple[str, ...]) -> re.Pattern:
+    # Довші назви першими, щоб "ENERGY BOX" не зловився як "ENERGY"
+    alternatives = "|".join(re.escape(brand) for brand in sorted(brands, key=len, reverse=True))
+    return re.compile(rf"(?<![\w-])({alternatives})(?![\w-])", re.IGNORECASE)
+
+
+def _brand_pattern() -> re.Pattern:
+    brands = set(KNOWN_BRANDS) | set(get_cached_brand_names("batteries"))
+    return _compile_brand_pattern(tuple(sorted(brands)))
+
+
+def _parse_number(value: str) -> Optional[float]:
+    match = _NUMBER_RE.match(value or "")
+    if not match:
+        return None
+    try:
+        return float(match.group(1).replace(" ", "").replace(",", "."))
+    except ValueError:
+        return None
+
+
+def _find_price(cells: Sequence[str], headers: Sequence[str], exclude: Sequence[float]) -> Tuple[Optional[float], bool]:
+    """
+    Найменша оптова ціна з рядка.
+
+    Returns:
+        (ціна, чи однозначна) - неоднозначна, якщо колонки з ціною не підписані
+        і в рядку кілька різних чисел
+    """
+    price_columns = [i for i, header in enumerate(headers) if _PRICE_HEADER_RE.search(header or "")]
+    if price_columns:
+        candidates = [_parse_number(cells[i]) for i in price_columns if i < len(cells)]
+        candidates = [value for value in candidates if value]
+        return (min(candidates), True) if candidates else (None, False)
+
+    candidates = {_parse_number(cell) for cell in cells}
+    candidates = {value for value in candidates if value and value not in exclude}
+    if not candidates:
+        return None, False
+    return min(candidates), len(candidates) == 1
+
+
+def extract_battery(cells: Sequence[str], headers: Sequence[str] = ()) -> Dict:
+    """
+    Витягує атрибути акумулятора з рядка прайсу регулярками та словником брендів.
+
+    Args:
+        cells: Комірки рядка CSV
+        headers: Заголовки CSV (для пошуку колонок з ціною)
+
+    Returns:
+        Запис у форматі AI-парсера + "confidence" від 0 до 1
+    """
+    cells = [str(cell or "").strip() for cell in cells]
+    text_cells = [cell for cell in cells if _LETTERS_RE.search(cell)]
+    brand_pattern = _brand_pattern()
+
+    brand = None
+    full_name = ""
+    for cell in text_cells:
+        match = brand_pattern.search(cell)
+        if match:
+            brand = match.group(1).upper()
+            full_name = cell
+            break
+    if not full_name and text_cells:
+        full_name = max(text_cells, key=len)
+    # Решта текстових комірок (об'єм, струм, полярність часто в окремих колонках)
+    text = " ".join([full_name] + [cell for cell in cells if cell != full_name])
+
+    confidence = 1.0
+
+    volume_match = _VOLUME_RE.search(text) or _GOST_VOLUME_RE.search(text)
+    volume = float(volume_match.group(1).replace(",", ".")) if volume_match else None
+    if volume is None:
+        confidence -= 0.3
+
+    # Струм шукаємо лише в назві та колонках струму: інакше ціна з сусідньої комірки
+    # "приклеюється" до EN в кінці назви ("540A EN 2500" -> 2500)
+    amps_cells = [
+        cell for i, cell in enumerate(cells)
+        if cell and cell != full_name and i < len(headers) and _AMPS_HEADER_RE.search(headers[i] or "")
+    ]
+    amps_match = EN_CURRENT_RE.search(full_name)
+    if amps_match:
+        c_amps = int(amps_match.group(1) or amps_match.group(2))
+    else:
+        amps_match = A_CURRENT_RE.search(full_name)
+        # Колонка струму може містити голе число без A/EN
+        amps_value = next((_parse_number(cell) for cell in amps_cells if _parse_number(cell)), None)
+        if amps_match:
+            c_amps = int(amps_match.group(1))
+            confidence -= 0.05
+        elif amps_value:
+            c_amps = int(amps_value)
+        else:
+            c_amps = 0
+            confidence -= 0.15
+
+    if _POLARITY_L_RE.search(text):
+        polarity = "L+"
+    elif _POLARITY_R_RE.search(text):
+        polarity = "R+"
+    else:
+        # Найпоширеніша полярність (євро, "0"), але це здогадка - такі рядки перевіряє LLM
+        polarity = "R+"
+        confidence -= 0.25
+
+    region = "ASIA" if _ASIA_RE.search(text) else "EUROPE"
+    if _AGM_RE.search(text):
+        electrolyte = "AGM"
+    elif _GEL_RE.search(text):
+        electrolyte = "GEL"
+    else:
+        electrolyte = "LAB"
+
+    price, price_certain = _find_price(cells, headers, [value for value in (volume, c_amps) if value])
+    if price is None:
+        confidence -= 0.4
+    elif not price_certain:
+        confidence -= 0.25
+
+    if brand is None:
+        confidence -= 0.5
+        name = ""
+    else:
+        # Назва - між брендом і першою характеристикою (ємність, струм, полярність)
+        brand_match = brand_pattern.search(full_name)
+        end = len(full_name)
+        for pattern in _NAME_STOP_PATTERNS:
+            match = pattern.search(full_name, brand_match.end())
+            if match:
+                end = min(end, match.start())
+        name = full_name[brand_match.end():end].strip(" ,.;:-/()")
+        name = name or brand
+
+    return {
+        "brand": brand,
+        "name": name,
+        "volume": volume or 0,
+        "full_name": full_name,
+        "price": price or 0,
+        "c_amps": c_amps,
+        "region": region,
+        "polarity": polarity,
+        "electrolyte": electrolyte,
+        "confidence": round(max(confidence, 0.0), 2),
+    }
+
+
+def split_by_confidence(
+    headers: Sequence[str],
+    rows: List[List[str]],
+    threshold: float = CONFIDENCE_THRESHOLD,
+) -> Tuple[List[Dict], List[List[str]]]:
+    """
+    Розділяє рядки прайсу на розпізнані локально та ті, що треба віддати в LLM.
+
+    Returns:
+        (записи з впевненістю >= threshold, сирі рядки для LLM)
+    """
+    extracted = []
+    unresolved = []
+    for row in rows:
+        if not any(cell.strip() for cell in row):
+            continue
+        entry = extract_battery(row, headers)
+        if entry["confidence"] >= threshold:
+            extracted.append(entry)
+        else:
+            unresolved.append(row)
+    return extracted, unresolved
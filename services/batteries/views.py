@@ -1,3 +1,5 @@
+import asyncio
+from functools import partial
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, status
 import tempfile, os
 from helpers.csv_export import convert_to_csv
@@ -9,15 +11,8 @@ from services.batteries.parsers.async_versions.avto_alians import parse_avto_ali
 from services.batteries.parsers.async_versions.a_mega_auto import parse_a_mega_auto_xlsx
 from services.batteries.parsers.ai_head import parse_ai_reports
 
-from services.batteries.parsers.competitors.avto_zvuk import parse_batteries_avto_zvuk as parse_avto_zvuk
-from services.batteries.parsers.competitors.aku_lviv import parse_batteries_aku_lviv as parse_aku_lviv
-from services.batteries.parsers.competitors.makb import parse_batteries_makb as parse_makb
-from services.batteries.parsers.competitors.shyp_shuna import parse_batteries_shyp_shuna as parse_shyp_shuna
-from services.batteries.parsers.competitors.aet_ua import parse_batteries_aet_ua as parse_aet_ua
-from services.batteries.parsers.competitors.akb_mag import parse_batteries_akb_mag as parse_akb_mag
-from services.batteries.parsers.competitors.akb_plus import parse_batteries_akb_plus as parse_akb_plus
-from services.batteries.parsers.competitors.dvi_klemy import parse_batteries_dvi_klemy as parse_dvi_klemy
-from helpers.competitors import get_competitors_name
+from helpers.crawl_orchestrator import get_run
+from services.batteries.parsers.competitors_head import crawl_competitors
 
 
 from services.batteries.parsers.me_parser import parse_batteries_me as parse_me
@@ -117,59 +112,17 @@ async def upload_batteries_file(
     doc_file: UploadFile | None = None,
     docs_link: str | None = None,
 ):
-    # Визначаємо розширення файлу
-    tmp_path = None
-    csv_path = None
-    if doc_file:
-        file_name = doc_file.filename
-        suffix = os.path.splitext(file_name)[1]
-    
-        # Створюємо тимчасовий файл
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-        tmp_path = tmp.name
-    
-        try:
-            # Записуємо вміст файлу
-            content = await doc_file.read() 
-            tmp.write(content)
-            tmp.close()  # Закриваємо файл перед подальшою обробкою
-            
-            # Конвертуємо файл у CSV
-            csv_path = convert_to_csv(tmp_path)
-            
-            # Виводимо вміст CSV файлу
-            print("\n--- Вміст CSV файлу ---")
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                csv_content = f.read()
-                print(csv_content)
-            print("--- Кінець вмісту CSV файлу ---\n")
-            
-            return {"detail": "Conversion completed", "csv_file": csv_path}
-        finally:
-            # Видаляємо тимчасовий файл, якщо він існує
-            try:
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-            except Exception as e:
-                # Якщо не вдалося видалити файл, просто логуємо помилку
-                print(f"Не вдалося видалити тимчасовий файл: {str(e)}")
-    
-    else:
-        try:
+    try:
+        if doc_file:
+            # Конвертуємо потоком прямо з завантаження, без тимчасової копії файлу
+            csv_path = await asyncio.to_thread(convert_to_csv, doc_file.file, file_name=doc_file.filename)
+        else:
             # Конвертуємо файл з посилання Google Docs
-            csv_path = convert_to_csv(docs_link)
-            
-            # Виводимо вміст CSV файлу
-            print("\n--- Вміст CSV файлу ---")
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                csv_content = f.read()
-                print(csv_content)
-            print("--- Кінець вмісту CSV файлу ---\n")
-            
-            return {"detail": "Conversion completed", "csv_file": csv_path}
-        except Exception as e:
-            print(f"Помилка при конвертації з Google Docs: {str(e)}")
-            raise HTTPException(status_code=500, detail=str(e))
+            csv_path = await asyncio.to_thread(convert_to_csv, docs_link)
+        return {"detail": "Conversion completed", "csv_file": csv_path}
+    except Exception as e:
+        print(f"Помилка при конвертації: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/ai_upload/upload_reports")
 async def upload_batteries_file(
@@ -177,63 +130,42 @@ async def upload_batteries_file(
     supplier_name: str = "", 
     docs_link: str | None = None,
 ):
-    # Визначаємо розширення файлу
     if doc_file:
-        file_name = doc_file.filename
-        suffix = os.path.splitext(file_name)[1]
-    
-        # Створюємо тимчасовий файл
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-        tmp_path = tmp.name
-        csv_path = None
-        
+        # Файл читається потоком прямо з завантаження, без копії в тимчасовий файл і проміжного CSV
+        parser = partial(parse_ai_reports, file_name=doc_file.filename)
         try:
-            # Записуємо вміст файлу
-            content = await doc_file.read() 
-            tmp.write(content)
-            tmp.close()  # Закриваємо файл перед подальшою обробкою
-
-            await process_batteries_import(tmp.name, parse_ai_reports, supplier_name)
-            return {"detail": "Conversion completed", "csv_file": csv_path}
+            stats = await process_batteries_import(doc_file.file, parser, supplier_name)
+            return {"detail": "Conversion completed", "csv_file": None, "stats": stats}
         except Exception as e:
             # Логуємо помилку для діагностики
             import traceback
             traceback.print_exc()
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
-        finally:
-            # Видаляємо тимчасовий файл, якщо він існує
-            try:
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-            except Exception as e:
-                # Якщо не вдалося видалити файл, просто логуємо помилку
-                print(f"Не вдалося видалити тимчасовий файл: {str(e)}")
     else:
-        await process_batteries_import(docs_link, parse_ai_reports, supplier_name)
-        return {"detail": "Conversion completed"}
+        stats = await process_batteries_import(docs_link, parse_ai_reports, supplier_name)
+        return {"detail": "Conversion completed", "stats": stats}
 
 @router.post("/ai_upload/parse_competitor")
-async def upload_batteries_file():
-    func_list =[]
-    func_list.append(parse_makb)
-    func_list.append(parse_avto_zvuk)
-    func_list.append(parse_aku_lviv)
-    func_list.append(parse_shyp_shuna)
-    func_list.append(parse_aet_ua)
-    func_list.append(parse_akb_mag)
-    func_list.append(parse_akb_plus)
-    func_list.append(parse_dvi_klemy)
-    for func in func_list:
-        supplier_name = await get_competitors_name(func)
-        print(supplier_name)
-        await process_batteries_import_parser(func, supplier_name)
-    return {"detail": "Import completed"}
+async def upload_batteries_file(background: bool = False):
+    # Конкуренти парсяться паралельно; з background=true прогрес - через GET /ai_upload/parse_competitor/{run_id}
+    run = await crawl_competitors(background=background)
+    if background:
+        return {"detail": "Import started", "run_id": run.run_id, "progress": run.to_dict()}
+    return {"detail": "Import completed", "run_id": run.run_id, "stats": run.stats(), "progress": run.to_dict()}
+
+
+@router.get("/ai_upload/parse_competitor/{run_id}")
+async def get_competitor_parse_progress(run_id: str):
+    run = get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Запуск не знайдено")
+    return run.to_dict()
 
 @router.post("/ai_upload/parse_me")
 async def upload_batteries_from_me():
     supplier_name = "Акумулятор центр"
-    await me_parser(parse_me, supplier_name)
-    return {"detail": "Import completed"}
+    stats = await me_parser(parse_me, supplier_name)
+    return {"detail": "Import completed", "stats": stats}
 
 
 @router.post("/ai_upload/upload_reports_text")
@@ -241,5 +173,5 @@ async def upload_batteries_file(
     supplier_name: str,
     text: str
 ):
-    await parse_txt(text=text, supplier_name=supplier_name)
-    return {"detail": "Import completed"}
\ No newline at end of file
+    stats = await parse_txt(text=text, supplier_name=supplier_name)
+    return {"detail": "Import completed", "stats": stats}
\ No newline at end of file
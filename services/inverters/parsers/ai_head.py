@@ -1,16 +1,16 @@
 from services.inverters.parsers.ai_parser import ai_parser
-from helpers.csv_export import convert_to_csv
+from helpers.csv_export import iter_rows
 from services.inverters.parsers.ai_inverters_filter import ai_filter
 
 
-def parse_ai_reports(file_path: str | None = None, docs_link: str | None = None):
-    csv_report = ""
-    if file_path and docs_link is None:
-        csv_report = convert_to_csv(file_path)
+def parse_ai_reports(file_path=None, docs_link: str | None = None, file_name: str | None = None):
+    # Рядки читаються потоком прямо з файлу (або UploadFile.file), без проміжного CSV
+    if file_path is not None and docs_link is None:
+        rows = iter_rows(file_path, file_name)
     elif file_path is None and docs_link:
-        csv_report = convert_to_csv(docs_link)
+        rows = iter_rows(docs_link)
     else:
         raise ValueError("Невідомий формат файлу")
-    ai_data = ai_parser(csv_report)
+    ai_data = ai_parser(rows)
     result = ai_filter(ai_data)
-    return result
\ No newline at end of file
+    return result
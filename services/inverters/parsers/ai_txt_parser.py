@@ -1,10 +1,11 @@
-import asyncio
 import json
-import time
 import google.generativeai as genai
 from typing import List, Dict
 from dotenv import load_dotenv
 import os
+from helpers.chunking import ChunkReport, pack_rows, text_rows
+from helpers.llm_cache import run_cached
+from helpers.llm_scheduler import estimate_tokens
 
 load_dotenv()
 
@@ -22,8 +23,14 @@ model = genai.GenerativeModel(
 )
 
 
-def parse_chunk(index: int, data: str) -> List[Dict]:
-    prompt = f"""
+# Змінюйте версію при редагуванні промпту - старі відповіді в кеші стануть недійсними
+PROMPT_VERSION = "inverters-txt-v1"
+# Оцінка відповіді на один товар (JSON-об'єкт) для пакування блоків
+OUTPUT_TOKENS_PER_ROW = 110
+
+
+def build_prompt(data: str) -> str:
+    return f"""
 Дій як професійний парсер і спеціаліст з продажу інверторів для сонячних електростанцій.
 
 📌 ГОЛОВНЕ: спочатку визнач, чи дійсно товар є інвертором для сонячних електростанцій. Якщо це не інвертор — ПРОПУСТИ його.
@@ -62,9 +69,13 @@ def parse_chunk(index: int, data: str) -> List[Dict]:
 ❗️Поверни лише чистий JSON у відповідь. Без зайвого тексту.
 """
 
+
+def parse_response(index: int, response_text: str | None) -> List[Dict]:
+    if response_text is None:
+        return []
+
     try:
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
+        response_text = response_text.strip()
 
         # Очищення
         if response_text.startswith("```json"):
@@ -82,82 +93,16 @@ def parse_chunk(index: int, data: str) -> List[Dict]:
 
 
 async def ai_parser(all_data: str) -> List[Dict]:
-    parsed_results = []
-    min_request_time = 10
-    
-    start_time = time.time()
-    result = parse_chunk(0, all_data)
-    parsed_results.extend(result)
-
-    elapsed_time = time.time() - start_time
-    if elapsed_time < min_request_time:  # не чекаємо після останнього запиту
-        wait_time = min_request_time - elapsed_time
-        print(f"⏳ Запит виконано за {elapsed_time:.1f} сек. Очікування {wait_time:.1f} секунд перед наступним запитом...")
-        time.sleep(wait_time)
-
-    return parsed_results
-
-
-# Приклад запуску:
-    parsed_results = []
-    base_wait_time = 10  # Базовий час очікування в секундах
-    max_wait_time = 120  # Максимальний час очікування в секундах
-    consecutive_errors = 0  # Лічильник послідовних помилок
-    
-    for i, data in enumerate(all_data):
-        start_time = time.time()
-        
-        # Спроба з повторами при помилках
-        max_retries = 3
-        for retry in range(max_retries):
-            try:
-                result = parse_chunk(i, data)
-                parsed_results.extend(result)
-                consecutive_errors = 0  # Скидаємо лічильник помилок при успіху
-                break
-            except Exception as e:
-                error_message = str(e)
-                if "429" in error_message:  # Помилка обмеження швидкості
-                    consecutive_errors += 1
-                    
-                    # Витягуємо час очікування з повідомлення про помилку, якщо можливо
-                    retry_delay = 0
-                    if "retry_delay" in error_message and "seconds" in error_message:
-                        try:
-                            # Спроба витягти число секунд з повідомлення про помилку
-                            retry_part = error_message.split("retry_delay")[1]
-                            seconds_part = retry_part.split("seconds:")[1].split("}")[0].strip()
-                            retry_delay = int(seconds_part)
-                        except:
-                            retry_delay = 0
-                    
-                    # Розрахунок часу очікування з експоненційним відступанням
-                    wait_time = max(
-                        base_wait_time * (2 ** consecutive_errors),  # Експоненційне відступання
-                        retry_delay + 5  # Використовуємо час з API + запас
-                    )
-                    wait_time = min(wait_time, max_wait_time)  # Обмежуємо максимальним часом
-                    
-                    print(f"⚠️ Помилка обмеження швидкості на блоці {i}, спроба {retry+1}/{max_retries}. Очікування {wait_time} секунд...")
-                    time.sleep(wait_time)
-                    
-                    if retry == max_retries - 1:  # Остання спроба
-                        print(f"❌ Вичерпано максимальну кількість спроб для блоку {i}")
-                        break
-                else:
-                    # Інша помилка, не пов'язана з обмеженням швидкості
-                    print(f"❌ Помилка на блоці {i}: {e}")
-                    break
-        
-        # Завжди чекаємо між запитами, навіть після помилки
-        elapsed_time = time.time() - start_time
-        
-        # Адаптивний час очікування в залежності від кількості послідовних помилок
-        adaptive_wait_time = base_wait_time * (1 + (consecutive_errors * 0.5))
-        
-        if elapsed_time < adaptive_wait_time and i < len(all_data) - 1:
-            wait_time = adaptive_wait_time - elapsed_time
-            print(f"⏳ Запит виконано за {elapsed_time:.1f} сек. Очікування {wait_time:.1f} секунд перед наступним запитом...")
-            time.sleep(wait_time)
-
-    return parsed_results
+    # Текст пакується в блоки за бюджетом токенів, рядок прайсу не розривається між блоками
+    report = ChunkReport(PROMPT_VERSION)
+    chunks = list(pack_rows(
+        text_rows(all_data),
+        output_tokens_per_row=OUTPUT_TOKENS_PER_ROW,
+        base_tokens=estimate_tokens(build_prompt("")),
+        report=report,
+    ))
+    report.print()
+
+    # Запити йдуть через спільний планувальник (квота Gemini, без блокування event loop)
+    results = await run_cached(model, PROMPT_VERSION, [build_prompt("\n".join(chunk)) for chunk in chunks], parse_response)
+    return [item for parsed in results for item in parsed]
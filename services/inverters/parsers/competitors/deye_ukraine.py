@@ -1,14 +1,12 @@
 import asyncio
-import aiohttp
 from bs4 import BeautifulSoup
 import os
 import sys
 from typing import List, Tuple
-import random
 import re
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from helpers.get_user_agent import get_headers
+from helpers.http_client import HttpClient, get_http_client
 
 
 
@@ -16,7 +14,7 @@ def get_page_url(page: int) -> str:
     return f"https://www.deye-ukraine.com.ua/category/hybridinverter"
 
 
-async def fetch_html(session: aiohttp.ClientSession, url: str, page_num: int) -> Tuple[str, int]:
+async def fetch_html(session: HttpClient, url: str, page_num: int) -> Tuple[str, int]:
     try:
         async with session.get(url) as response:
             if response.status == 200:
@@ -50,7 +48,7 @@ def extract_inverters_links_from_html(html: str) -> List[str]:
         inverters_links.append(link_div["href"])
     return inverters_links
 
-async def fetch_inverter_details(session: aiohttp.ClientSession, url: str):
+async def fetch_inverter_details(session: HttpClient, url: str):
     """
     Асинхронно отримує детальну інформацію про акумулятор за посиланням
     """
@@ -84,7 +82,7 @@ async def fetch_inverter_details(session: aiohttp.ClientSession, url: str):
         return None
 
 
-async def extract_inverters_html(session: aiohttp.ClientSession, links: List[str], page_num: int):
+async def extract_inverters_html(session: HttpClient, links: List[str], page_num: int):
     """
     Асинхронно отримує детальну інформацію про сонячні панелі за посиланнями
     """
@@ -105,16 +103,14 @@ async def extract_inverters_html(session: aiohttp.ClientSession, links: List[str
 
 
 async def parse_inverters_deye_ukraine() -> List[str]:
-    headers = get_headers()
     last_page = await get_last_page()
     all_inverters = []
 
-    async with aiohttp.ClientSession(headers=headers) as session:
+    async with get_http_client() as session:
         tasks = []
         for i in range(1, last_page + 1):
             url = get_page_url(i)
             tasks.append(fetch_html(session, url, i))
-            await asyncio.sleep(random.uniform(5, 10))  # антиспам-пауза
 
         results = await asyncio.gather(*tasks)
 
@@ -1,5 +1,13 @@
+import asyncio
 from services.inverters.parsers.ai_competitors_parser import ai_parser
 from services.inverters.parsers.ai_inverters_filter import ai_filter
+from helpers.crawl_orchestrator import run_competitors
+from services.inverters.parsers.competitors.deye_ukraine import parse_inverters_deye_ukraine
+
+# Парсери сайтів конкурентів (запускаються паралельно через crawl_orchestrator)
+COMPETITOR_PARSERS = [
+    parse_inverters_deye_ukraine,
+]
 
 
 async def parse_ai_reports(acync_parse_func):
@@ -20,7 +28,8 @@ async def parse_ai_reports(acync_parse_func):
         print(f"Дані після AI парсера: {len(ai_data) if isinstance(ai_data, list) else ai_data}")
         
         # Фільтруємо дані
-        result = ai_filter(ai_data)
+        # Фільтр синхронний (чекає на ліміти моделі) - поза event loop
+        result = await asyncio.to_thread(ai_filter, ai_data)
         print(f"Результат після фільтрації: {len(result) if isinstance(result, list) else result}")
         
         return result
@@ -28,3 +37,8 @@ async def parse_ai_reports(acync_parse_func):
         print(f"Помилка в parse_ai_reports: {e}")
         # Повертаємо порожній список у випадку помилки
         return []
+
+
+async def crawl_competitors(background: bool = False):
+    """Парсинг усіх конкурентів продукту через оркестратор (див. helpers/crawl_orchestrator.py)."""
+    return await run_competitors("inverters", COMPETITOR_PARSERS, ai_parser, ai_filter, background=background)
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import shutil
+import uuid
+
+from celery.result import AsyncResult
+from fastapi import APIRouter, UploadFile, HTTPException, status
+
+from celery_app import celery_app
+from tasks import JOB_UPLOAD_DIR, PRODUCTS, compact_history, import_file, import_text, match_products, parse_competitors, parse_me
+
+router = APIRouter(prefix="/jobs", tags=["background jobs"])
+
+# Фронтенд називає сонячні панелі solar_panels
+PRODUCT_ALIASES = {"solar_panels": "sollar_panels"}
+
+
+def _get_product(product: str) -> str:
+    product = PRODUCT_ALIASES.get(product, product)
+    if product not in PRODUCTS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Неверный тип продукта")
+    return product
+
+
+def _save_upload(doc_file: UploadFile) -> str:
+    """Копіює завантаження потоком у JOB_UPLOAD_DIR під випадковим ім'ям (ім'я від клієнта в шлях не йде)."""
+    os.makedirs(JOB_UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(JOB_UPLOAD_DIR, uuid.uuid4().hex)
+    doc_file.file.seek(0)
+    with open(path, "wb") as f:
+        shutil.copyfileobj(doc_file.file, f)
+    return path
+
+
+async def _enqueue(task, *args, **kwargs):
+    # Відправка в брокер - мережевий виклик, не блокуємо event loop
+    result = await asyncio.to_thread(task.apply_async, args=args, kwargs=kwargs)
+    return {"job_id": result.id, "state": "PENDING"}
+
+
+@router.post("/{product}/upload_reports")
+async def enqueue_upload_reports(
+    product: str,
+    doc_file: UploadFile | None = None,
+    supplier_name: str = "",
+    docs_link: str | None = None,
+):
+    product = _get_product(product)
+    if doc_file is None and not docs_link:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Потрібен файл або docs_link")
+    if doc_file is None:
+        return await _enqueue(import_file, product, supplier_name, docs_link=docs_link)
+
+    # Через брокер - лише шлях: файл не тримається цілком ні в пам'яті веба, ні в Redis
+    upload_path = await asyncio.to_thread(_save_upload, doc_file)
+    try:
+        return await _enqueue(import_file, product, supplier_name, file_name=doc_file.filename, upload_path=upload_path)
+    except Exception:
+        os.unlink(upload_path)
+        raise
+
+
+@router.post("/{product}/upload_reports_text")
+async def enqueue_upload_reports_text(product: str, supplier_name: str, text: str):
+    return await _enqueue(import_text, _get_product(product), supplier_name, text)
+
+
+@router.post("/{product}/parse_competitor")
+async def enqueue_parse_competitor(product: str):
+    return await _enqueue(parse_competitors, _get_product(product))
+
+
+@router.post("/{product}/parse_me")
+async def enqueue_parse_me(product: str):
+    product = _get_product(product)
+    if product != "batteries":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Парсер наших цін для {product} відсутній")
+    return await _enqueue(parse_me, product)
+
+
+@router.post("/{product}/compact_history")
+async def enqueue_compact_history(product: str, dry_run: bool = False):
+    """Згортання повторів в історії цін; dry_run - лише порахувати."""
+    return await _enqueue(compact_history, _get_product(product), dry_run)
+
+
+@router.post("/{product}/match_products")
+async def enqueue_match_products(product: str):
+    """Зіставлення вже імпортованих рядків з канонічними товарами (product_id)."""
+    return await _enqueue(match_products, _get_product(product))
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    """
+    Статус задачі: PENDING (в черзі або невідома), STARTED, PROGRESS, SUCCESS, FAILURE, REVOKED.
+    progress - етап або прогрес по конкурентах, result - статистика імпорту.
+    """
+    result = AsyncResult(job_id, app=celery_app)
+    state = result.state
+    response = {"job_id": job_id, "state": state, "progress": None, "result": None, "error": None}
+    if state == "SUCCESS":
+        response["result"] = result.result
+    elif state == "FAILURE":
+        response["error"] = str(result.result)
+    elif state == "PROGRESS":
+        response["progress"] = result.info
+    return response
+
+
+@router.delete("/{job_id}")
+def cancel_job(job_id: str):
+    # terminate=True зупиняє і задачу, яка вже виконується
+    celery_app.control.revoke(job_id, terminate=True)
+    return {"job_id": job_id, "state": "REVOKED"}
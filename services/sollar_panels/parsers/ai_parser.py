@@ -1,41 +1,50 @@
-import csv
 import json
 import google.generativeai as genai
 from dotenv import load_dotenv
 import os
+from typing import Iterable, List, Dict, Sequence
+from helpers.chunking import ChunkReport, pack_rows
+from helpers.llm_cache import generate_cached
+from helpers.llm_scheduler import estimate_tokens
 
 load_dotenv()
 
 
-def ai_parser(csv_path: str, chunk_size: int = 50):
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+# Змінюйте версію при редагуванні промпту - старі відповіді в кеші стануть недійсними
+PROMPT_VERSION = "sollar_panels-csv-v1"
+# Оцінка відповіді на один товар (JSON-об'єкт) для пакування блоків
+OUTPUT_TOKENS_PER_ROW = 110
 
-    # Використовуємо доступну модель gemini-1.5-flash або gemini-pro
-    model = genai.GenerativeModel(
-        model_name="gemini-1.5-flash",
-        generation_config={
-            "temperature": 0.3,
-            "top_p": 1,
-            "top_k": 40,
-            "max_output_tokens": 999999
-        }
-    )
-    results = []
 
-    with open(csv_path, newline='', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        headers = next(reader)
-        rows = list(reader)
-    
+def parse_response(index: int, response_text: str | None) -> List[Dict]:
+    if response_text is None:
+        return []
 
-        for i in range(0, len(rows), chunk_size):
-            chunk = rows[i:i + chunk_size]
+    try:
+        # Видаляємо зайві символи, які можуть заважати парсингу JSON
+        response_text = response_text.strip()
+        if response_text.startswith("```json"):
+            response_text = response_text.replace("```json", "", 1)
+        if response_text.endswith("```"):
+            response_text = response_text.rsplit("```", 1)[0]
+        response_text = response_text.strip()
 
-            # Формуємо CSV-рядок
-            csv_chunk = [headers] + chunk
-            csv_text = '\n'.join([','.join(row) for row in csv_chunk])
+        # Парсимо JSON
+        json_data = json.loads(response_text)
+        print(f"Успішно оброблено блок {index}: знайдено {len(json_data)} сонячних панелей")
+        return json_data
+    except Exception as e:
+        print(f"Помилка на блоці {index}: {e}")
+        print(f"Відповідь API: {response_text}")
+        return []
 
-            prompt = f"""
+
+def build_prompt(headers: Sequence[str], rows: List[Sequence[str]]) -> str:
+    # Формуємо CSV-рядок
+    csv_chunk = [headers] + rows
+    csv_text = '\n'.join([','.join(row) for row in csv_chunk])
+
+    return f"""
 Дій як професійний парсер та спеціаліст із продажу сонячних панелей.
 
 Твоє завдання — проаналізувати CSV-фрагмент, що містить перелік товарів, та витягнути структуровані дані про сонячні панелі. Поверни результат у вигляді масиву JSON-об'єктів із такою структурою:
@@ -106,25 +115,50 @@ def ai_parser(csv_path: str, chunk_size: int = 50):
 ❗ Поверни **тільки чистий JSON** — без додаткових коментарів або тексту.
 """
 
-            try:
-                response = model.generate_content(prompt)
-                response_text = response.text
-                
-                # Видаляємо зайві символи, які можуть заважати парсингу JSON
-                response_text = response_text.strip()
-                if response_text.startswith("```json"):
-                    response_text = response_text.replace("```json", "", 1)
-                if response_text.endswith("```"):
-                    response_text = response_text.rsplit("```", 1)[0]
-                response_text = response_text.strip()
-                
-                # Парсимо JSON
-                json_data = json.loads(response_text)
-                results.extend(json_data)
-                print(f"Успішно оброблено блок {i}-{i + len(chunk)}: знайдено {len(json_data)} акумуляторів")
-            except Exception as e:
-                print(f"Помилка на блоці {i}-{i + chunk_size}: {e}")
-                print(f"Відповідь API: {response.text if 'response' in locals() else 'Немає відповіді'}")
-                continue
 
+def ai_parser(rows: Iterable[Sequence[str]]):
+    """
+    Args:
+        rows: Рядки прайсу (перший - заголовки), зазвичай потік з helpers.csv_export.iter_rows
+
+    Returns:
+        Список сонячних панелей
+    """
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+
+    # Використовуємо доступну модель gemini-1.5-flash або gemini-pro
+    model = genai.GenerativeModel(
+        model_name="gemini-1.5-flash",
+        generation_config={
+            "temperature": 0.3,
+            "top_p": 1,
+            "top_k": 40,
+            "max_output_tokens": 999999
+        }
+    )
+    results = []
+
+    rows = iter(rows)
+    headers = next(rows, None)
+    if headers is None:
+        return results
+
+    # Рядки читаються з файлу потоком і пакуються в запити за бюджетом токенів
+    report = ChunkReport(PROMPT_VERSION)
+    i = 0
+    for chunk in pack_rows(
+        rows,
+        to_text=','.join,
+        output_tokens_per_row=OUTPUT_TOKENS_PER_ROW,
+        base_tokens=estimate_tokens(build_prompt(headers, [])),
+        report=report,
+    ):
+        # Незмінені блоки беруться з кешу без запиту до моделі
+        parsed, from_cache = generate_cached(model, PROMPT_VERSION, build_prompt(headers, chunk), parse_response, i)
+        results.extend(parsed)
+        if from_cache:
+            print(f"🗄 Блок {i}-{i + len(chunk)} взято з кешу: {len(parsed)} записів")
+        i += len(chunk)
+
+    report.print()
     return results
@@ -1,9 +1,10 @@
 import json
-import time
 import google.generativeai as genai
 from typing import List, Dict
 from dotenv import load_dotenv
 import os
+from helpers.llm_cache import generate_cached
+from helpers.normalization import normalize_products
 
 load_dotenv()
 
@@ -21,8 +22,12 @@ model = genai.GenerativeModel(
 )
 
 
-def parse_chunk(index, data) -> List[Dict]:
-    prompt = f"""
+# Змінюйте версію при редагуванні промпту - старі відповіді в кеші стануть недійсними
+PROMPT_VERSION = "sollar_panels-filter-v1"
+
+
+def build_prompt(data) -> str:
+    return f"""
 Твоя роль — досвідчений спеціаліст з парсингу та продажу сонячних панелей панелей.
 
 🔧 Я надаю тобі список даних у форматі JSON:
@@ -64,9 +69,13 @@ def parse_chunk(index, data) -> List[Dict]:
 {data}
 """
 
+
+def parse_response(index: int, response_text: str | None) -> List[Dict]:
+    if response_text is None:
+        return []
+
     try:
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
+        response_text = response_text.strip()
 
         # Очищення
         if response_text.startswith("```json"):
@@ -82,8 +91,9 @@ def parse_chunk(index, data) -> List[Dict]:
 
 
 def ai_filter(data: list):
-    parsed_results = []
-    min_request_time = 10
+    # Типові виправлення робимо локально, в модель йдуть лише рядки, з якими правила не впорались
+    parsed_results, data, stats = normalize_products(data, "sollar_panels")
+    print(f"📊 Нормалізація: локально {stats['local']}, через LLM {stats['llm']}, відкинуто без ціни {stats['dropped']}")
     total_items = len(data)
     
     print(f"Початок фільтрації {total_items} товарів")
@@ -102,27 +112,17 @@ def ai_filter(data: list):
         if chunk_count == 0:
             continue  # Пропускаємо порожні частини
         
-        start_time = time.time()
-        
         # Відправляємо частину на обробку
         chunk_index = i // chunk_size
         print(f"chunk: {len(chunk)}")
-        result = parse_chunk(chunk_index, chunk)
+        # Незмінені частини беруться з кешу без запиту до моделі; темп запитів задає спільний планувальник
+        result, _ = generate_cached(model, PROMPT_VERSION, build_prompt(chunk), parse_response, chunk_index)
         print(f"result: {len(result)}")
 
         
         if result:
             for item in result:
                 parsed_results.append(item)
-            
-        elapsed_time = time.time() - start_time
-        
-        # Додаємо затримку між обробкою частин, якщо це не остання частина
-        if i + chunk_size < total_items:
-            if elapsed_time < min_request_time:
-                wait_time = min_request_time - elapsed_time
-                print(f"⏳ Частину оброблено за {elapsed_time:.1f} сек. Очікування {wait_time:.1f} секунд перед наступною частиною...")
-                time.sleep(wait_time)
     
     print(f"✅ Фільтрацію завершено. Знайдено {len(parsed_results)} товарів")
     return parsed_results
\ No newline at end of file
@@ -1,8 +1,10 @@
+import asyncio
 from services.sollar_panels.parsers.ai_txt_parser import ai_parser
 from services.sollar_panels.parsers.ai_sollar_filter import ai_filter
 
 
 async def parse_ai_reports(data: str):
     ai_data = await ai_parser(data)
-    result = ai_filter(ai_data)
+    # Фільтр синхронний (чекає на ліміти моделі) - поза event loop
+    result = await asyncio.to_thread(ai_filter, ai_data)
     return result
\ No newline at end of file
@@ -1,14 +1,12 @@
 import asyncio
-import aiohttp
 from bs4 import BeautifulSoup
 import os
 import sys
 from typing import List, Tuple
-import random
 import re
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from helpers.get_user_agent import get_headers
+from helpers.http_client import HttpClient, get_http_client
 
 
 
@@ -16,7 +14,7 @@ def get_page_url(page: int) -> str:
     return f"https://friendssolar.com.ua/g133828090-sonyachni-paneli/page_{page}?presence_available=true"
 
 
-async def fetch_html(session: aiohttp.ClientSession, url: str, page_num: int) -> Tuple[str, int]:
+async def fetch_html(session: HttpClient, url: str, page_num: int) -> Tuple[str, int]:
     try:
         async with session.get(url) as response:
             if response.status == 200:
@@ -31,8 +29,7 @@ async def fetch_html(session: aiohttp.ClientSession, url: str, page_num: int) ->
         return "", page_num
 
 async def get_last_page() -> int:
-    headers = get_headers()
-    async with aiohttp.ClientSession(headers=headers) as session:
+    async with get_http_client() as session:
         url = "https://friendssolar.com.ua/g133828090-sonyachni-paneli?presence_available=true"
         html, _ = await fetch_html(session, url, 0)
         soup = BeautifulSoup(html, 'html.parser')
@@ -61,7 +58,7 @@ def extract_sollar_panels_links_from_html(html: str) -> List[str]:
         solar_panels_links.append(link_div["href"])
     return solar_panels_links
 
-async def fetch_sollar_panel_details(session: aiohttp.ClientSession, url: str):
+async def fetch_sollar_panel_details(session: HttpClient, url: str):
     """
     Асинхронно отримує детальну інформацію про акумулятор за посиланням
     """
@@ -95,7 +92,7 @@ async def fetch_sollar_panel_details(session: aiohttp.ClientSession, url: str):
         return None
 
 
-async def extract_sollar_panels_html(session: aiohttp.ClientSession, links: List[str], page_num: int):
+async def extract_sollar_panels_html(session: HttpClient, links: List[str], page_num: int):
     """
     Асинхронно отримує детальну інформацію про сонячні панелі за посиланнями
     """
@@ -118,16 +115,14 @@ async def extract_sollar_panels_html(session: aiohttp.ClientSession, links: List
 
 
 async def parse_sollar_panels_friends_solar() -> List[str]:
-    headers = get_headers()
     last_page = await get_last_page()
     all_sollar_panels = []
 
-    async with aiohttp.ClientSession(headers=headers) as session:
+    async with get_http_client() as session:
         tasks = []
         for i in range(1, last_page + 1):
             url = get_page_url(i)
             tasks.append(fetch_html(session, url, i))
-            await asyncio.sleep(random.uniform(0.1, 0.3))  # антиспам-пауза
 
         results = await asyncio.gather(*tasks)
 
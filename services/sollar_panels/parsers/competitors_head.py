@@ -1,5 +1,15 @@
+import asyncio
 from services.sollar_panels.parsers.ai_competitors_parser import ai_parser
 from services.sollar_panels.parsers.ai_sollar_filter import ai_filter
+from helpers.crawl_orchestrator import run_competitors
+from services.sollar_panels.parsers.competitors.friends_solar import parse_sollar_panels_friends_solar
+from services.sollar_panels.parsers.competitors.solarflow import parse_sollar_panels_solarflow
+
+# Парсери сайтів конкурентів (запускаються паралельно через crawl_orchestrator)
+COMPETITOR_PARSERS = [
+    parse_sollar_panels_friends_solar,
+    parse_sollar_panels_solarflow,
+]
 
 
 async def parse_ai_reports(acync_parse_func):
@@ -20,7 +30,8 @@ async def parse_ai_reports(acync_parse_func):
         print(f"Дані після AI парсера: {len(ai_data) if isinstance(ai_data, list) else ai_data}")
         
         # Фільтруємо дані
-        result = ai_filter(ai_data)
+        # Фільтр синхронний (чекає на ліміти моделі) - поза event loop
+        result = await asyncio.to_thread(ai_filter, ai_data)
         print(f"Результат після фільтрації: {len(result) if isinstance(result, list) else result}")
         
         return result
@@ -28,3 +39,8 @@ async def parse_ai_reports(acync_parse_func):
         print(f"Помилка в parse_ai_reports: {e}")
         # Повертаємо порожній список у випадку помилки
         return []
+
+
+async def crawl_competitors(background: bool = False):
+    """Парсинг усіх конкурентів продукту через оркестратор (див. helpers/crawl_orchestrator.py)."""
+    return await run_competitors("sollar_panels", COMPETITOR_PARSERS, ai_parser, ai_filter, background=background)
@@ -1,11 +1,11 @@
+from functools import partial
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, status
 import tempfile, os
 from helpers.csv_export import convert_to_csv
-from helpers.competitors import get_competitors_name
+from helpers.crawl_orchestrator import get_run
+from services.sollar_panels.parsers.competitors_head import crawl_competitors
 from services.sollar_panels.controllers import process_sollar_panels_import, parse_txt, process_sollar_panels_import_parser
 from services.sollar_panels.parsers.ai_head import parse_ai_reports
-from services.sollar_panels.parsers.competitors.friends_solar import parse_sollar_panels_friends_solar
-from services.sollar_panels.parsers.competitors.solarflow import parse_sollar_panels_solarflow
 
 
 router = APIRouter(prefix="/upload_sollar_panels", tags=["sollar_panels uploads/exports"])
@@ -18,42 +18,21 @@ async def upload_sollar_panels_file(
     supplier_name: str = "",
     docs_link: str | None = None,
 ):
-    # Визначаємо розширення файлу
-    
     if doc_file:
-        file_name = doc_file.filename
-        suffix = os.path.splitext(file_name)[1]
-    
-        # Створюємо тимчасовий файл
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-        tmp_path = tmp.name
-        csv_path = None
-        
+        # Файл читається потоком прямо з завантаження, без копії в тимчасовий файл і проміжного CSV
+        parser = partial(parse_ai_reports, file_name=doc_file.filename)
         try:
-            # Записуємо вміст файлу
-            content = await doc_file.read() 
-            tmp.write(content)
-            tmp.close()  # Закриваємо файл перед подальшою обробкою
-
-            await process_sollar_panels_import(tmp.name, parse_ai_reports, supplier_name)
-            return {"detail": "Conversion completed", "csv_file": csv_path}
+            stats = await process_sollar_panels_import(doc_file.file, parser, supplier_name)
+            return {"detail": "Conversion completed", "csv_file": None, "stats": stats}
         except Exception as e:
             # Логуємо помилку для діагностики
             import traceback
             traceback.print_exc()
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
-        finally:
-            # Видаляємо тимчасовий файл, якщо він існує
-            try:
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-            except Exception as e:
-                # Якщо не вдалося видалити файл, просто логуємо помилку
-                print(f"Не вдалося видалити тимчасовий файл: {str(e)}")
     else:
         print(docs_link)
-        await process_sollar_panels_import(docs_link, parse_ai_reports, supplier_name)
-        return {"detail": "Conversion completed"}
+        stats = await process_sollar_panels_import(docs_link, parse_ai_reports, supplier_name)
+        return {"detail": "Conversion completed", "stats": stats}
 
 
 @router.post("/ai_upload/upload_reports_text")
@@ -61,20 +40,25 @@ async def upload_sollar_panels_text(
     supplier_name: str,
     text: str
 ):
-    await parse_txt(text=text, supplier_name=supplier_name)
-    return {"detail": "Import completed"}
+    stats = await parse_txt(text=text, supplier_name=supplier_name)
+    return {"detail": "Import completed", "stats": stats}
 
 
 @router.post("/ai_upload/parse_competitor")
-async def upload_sollar_panels_competitor():
-    func_list =[]
-    func_list.append(parse_sollar_panels_friends_solar)
-    func_list.append(parse_sollar_panels_solarflow)
-    for func in func_list:
-        supplier_name = await get_competitors_name(func)
-        print(supplier_name)
-        await process_sollar_panels_import_parser(func, supplier_name)
-    return {"detail": "Import completed"}
+async def upload_sollar_panels_competitor(background: bool = False):
+    # Конкуренти парсяться паралельно; з background=true прогрес - через GET /ai_upload/parse_competitor/{run_id}
+    run = await crawl_competitors(background=background)
+    if background:
+        return {"detail": "Import started", "run_id": run.run_id, "progress": run.to_dict()}
+    return {"detail": "Import completed", "run_id": run.run_id, "stats": run.stats(), "progress": run.to_dict()}
+
+
+@router.get("/ai_upload/parse_competitor/{run_id}")
+async def get_competitor_parse_progress(run_id: str):
+    run = get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Запуск не знайдено")
+    return run.to_dict()
 
 # @router.post("/ai_upload/parse_me")
 # async def upload_batteries_from_me():
@@ -0,0 +1,139 @@
+import asyncio
+import importlib
+import os
+import tempfile
+from functools import partial
+from typing import Any, Dict, Optional
+
+from celery_app import celery_app
+
+PRODUCTS = ("batteries", "sollar_panels", "inverters")
+# Як часто оновлювати прогрес парсингу конкурентів у result backend (секунди)
+PROGRESS_INTERVAL = 2.0
+# Завантажені файли для імпорту: каталог, спільний для веба і воркерів імпорту (том у docker-compose).
+# Через брокер іде лише шлях, не вміст файлу
+JOB_UPLOAD_DIR = os.getenv("JOB_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "ai_analytic_uploads"))
+
+
+def _check_product(product: str) -> None:
+    if product not in PRODUCTS:
+        raise ValueError("Неверный тип продукта")
+
+
+def _run_async(coro):
+    """
+    Виконує корутину в окремому event loop воркера.
+    Після задачі закриваємо пули з'єднань (база, HTTP) - вони прив'язані до loop.
+    """
+    from db.database import engine
+    from helpers.http_client import close_http_client
+
+    async def runner():
+        try:
+            return await coro
+        finally:
+            await close_http_client()
+            await engine.dispose()
+
+    return asyncio.run(runner())
+
+
+@celery_app.task(bind=True, name="tasks.import_file")
+def import_file(
+    self,
+    product: str,
+    supplier_name: str,
+    file_name: Optional[str] = None,
+    upload_path: Optional[str] = None,
+    docs_link: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Імпорт прайсу постачальника (файл або посилання на Google Docs) через AI парсер.
+    upload_path - файл у JOB_UPLOAD_DIR, збережений вебом; після імпорту видаляється.
+    """
+    _check_product(product)
+    controllers = importlib.import_module(f"services.{product}.controllers")
+    ai_head = importlib.import_module(f"services.{product}.parsers.ai_head")
+    process_import = getattr(controllers, f"process_{product}_import")
+
+    self.update_state(state="PROGRESS", meta={"stage": "importing", "supplier_name": supplier_name})
+    if upload_path is None:
+        return _run_async(process_import(docs_link, ai_head.parse_ai_reports, supplier_name))
+
+    # Парсер читає файл потоком з диска
+    parser = partial(ai_head.parse_ai_reports, file_name=file_name)
+    try:
+        with open(upload_path, "rb") as f:
+            return _run_async(process_import(f, parser, supplier_name))
+    finally:
+        os.unlink(upload_path)
+
+
+@celery_app.task(bind=True, name="tasks.import_text")
+def import_text(self, product: str, supplier_name: str, text: str) -> Dict[str, Any]:
+    """Імпорт прайсу з тексту."""
+    _check_product(product)
+    controllers = importlib.import_module(f"services.{product}.controllers")
+
+    self.update_state(state="PROGRESS", meta={"stage": "importing", "supplier_name": supplier_name})
+    return _run_async(controllers.parse_txt(text=text, supplier_name=supplier_name))
+
+
+@celery_app.task(bind=True, name="tasks.parse_competitors")
+def parse_competitors(self, product: str) -> Dict[str, Any]:
+    """Парсинг усіх конкурентів продукту з прогресом по кожному конкуренту."""
+    from helpers.crawl_orchestrator import create_run, execute_run
+
+    _check_product(product)
+    competitors_head = importlib.import_module(f"services.{product}.parsers.competitors_head")
+    parsers = competitors_head.COMPETITOR_PARSERS
+
+    async def crawl():
+        run = await create_run(product, parsers)
+        job = asyncio.create_task(execute_run(run, parsers, competitors_head.ai_parser, competitors_head.ai_filter))
+        while not job.done():
+            self.update_state(state="PROGRESS", meta=run.to_dict())
+            await asyncio.wait({job}, timeout=PROGRESS_INTERVAL)
+        await job
+        return {"stats": run.stats(), "progress": run.to_dict()}
+
+    return _run_async(crawl())
+
+
+@celery_app.task(bind=True, name="tasks.parse_me")
+def parse_me(self, product: str) -> Dict[str, Any]:
+    """Парсинг наших цін (поки що лише акумулятори)."""
+    if product != "batteries":
+        raise ValueError(f"Парсер наших цін для {product} відсутній")
+    from services.batteries.controllers import me_parser
+    from services.batteries.parsers.me_parser import parse_batteries_me
+
+    self.update_state(state="PROGRESS", meta={"stage": "importing"})
+    return _run_async(me_parser(parse_batteries_me, "Акумулятор центр"))
+
+
+@celery_app.task(bind=True, name="tasks.compact_history")
+def compact_history(self, product: str, dry_run: bool = False) -> Dict[str, Any]:
+    """Згортання повторів в історії цін продукту (див. helpers/history.py)."""
+    from helpers.bulk_upsert import CURRENT_KEY_COLUMNS
+    from helpers.history import compact_history as compact
+    from helpers.ingestion import PRODUCT_SCHEMAS
+
+    _check_product(product)
+    self.update_state(state="PROGRESS", meta={"stage": "compacting", "dry_run": dry_run})
+    return _run_async(compact(product, PRODUCT_SCHEMAS[product].history_model, CURRENT_KEY_COLUMNS, dry_run))
+
+
+@celery_app.task(bind=True, name="tasks.match_products")
+def match_products(self, product: str) -> Dict[str, Any]:
+    """Присвоєння product_id рядкам, імпортованим до зіставлення товарів (див. helpers/product_matching.py)."""
+    from helpers.brand import BRAND_MODELS
+    from helpers.ingestion import PRODUCT_SCHEMAS
+    from helpers.product_matching import backfill_product_ids
+
+    _check_product(product)
+    self.update_state(state="PROGRESS", meta={"stage": "matching"})
+    schema = PRODUCT_SCHEMAS[product]
+    return _run_async(
+        backfill_product_ids(product, (schema.current_model, schema.history_model), BRAND_MODELS[product])
+    )
@@ -0,0 +1,92 @@
+import asyncio
+
+from helpers import crawl_orchestrator, html_compact
+from helpers.crawl_state import SiteDelta
+
+CARDS = {
+    "Акумулятор A 60Ah 540A 2500 грн": "Акумулятор A 60Ah 540A",
+    "Акумулятор B 74Ah 680A 3100 грн": "Акумулятор B 74Ah 680A",
+}
+
+
+class _FakeClient:
+    def preload(self, validators):
+        pass
+
+    def track_pages(self, host):
+        pass
+
+    def pop_pages(self, host):
+        return {}
+
+    def metrics(self):
+        return {}
+
+
+def _patch_state(monkeypatch, parsed_at):
+    async def load_pages(host):
+        return {}
+
+    async def load_site(product, host):
+        return SiteDelta(product, host, set(parsed_at.get((product, host), set())))
+
+    async def save_pages(host, pages, previous):
+        return {"pages": len(pages), "changed": 0, "unchanged": 0}
+
+    async def save_site(delta, supplier_name, current_model):
+        parsed_at.setdefault((delta.product, delta.host), set()).update(delta.names)
+
+    async def ingest_products(data, product, name, source):
+        return {"rows": len(data)}
+
+    monkeypatch.setattr(crawl_orchestrator, "INCREMENTAL_CRAWL", True)
+    monkeypatch.setattr(crawl_orchestrator, "load_pages", load_pages)
+    monkeypatch.setattr(crawl_orchestrator, "load_site", load_site)
+    monkeypatch.setattr(crawl_orchestrator, "save_pages", save_pages)
+    monkeypatch.setattr(crawl_orchestrator, "save_site", save_site)
+    monkeypatch.setattr(crawl_orchestrator, "ingest_products", ingest_products)
+    monkeypatch.setattr(crawl_orchestrator, "get_http_client", lambda: _FakeClient())
+
+
+def _run(ai_parser):
+    async def scrape():
+        return [{"page_num": 1}]
+
+    async def run():
+        progress = crawl_orchestrator.CompetitorProgress(name="test", host="example.com")
+        await crawl_orchestrator._run_competitor(progress, scrape, "batteries", ai_parser, lambda data: data)
+        return progress
+
+    return asyncio.run(run())
+
+
+def _parser(failed=()):
+    async def ai_parser(pages):
+        rows = html_compact.filter_rows(list(CARDS))
+        return [{"full_name": CARDS[row]} for row in rows if row not in failed]
+    return ai_parser
+
+
+def test_second_run_with_same_cards_has_no_changes(monkeypatch):
+    _patch_state(monkeypatch, {})
+
+    first = _run(_parser())
+    second = _run(_parser())
+
+    assert first.status == "done" and second.status == "done"
+    assert first.delta["items"]["changed"] == len(CARDS)
+    assert second.delta["items"]["changed"] == 0
+    assert second.delta["items"]["unchanged"] == len(CARDS)
+    assert second.rows == 0
+
+
+def test_cards_from_failed_chunk_are_parsed_again(monkeypatch):
+    _patch_state(monkeypatch, {})
+    failed = next(iter(CARDS))
+
+    first = _run(_parser(failed={failed}))
+    second = _run(_parser())
+
+    assert first.delta["items"]["parsed"] == len(CARDS) - 1
+    assert second.delta["items"]["changed"] == 1
+    assert second.rows == 1
@@ -0,0 +1,31 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from helpers.disk_cache import DiskCache
+
+
+def test_concurrent_threads_write_valid_json(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl=3600, max_bytes=10 * 1024 * 1024)
+    values = [{"rows": [str(i)] * 2000} for i in range(16)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda value: cache.set("samekey", value), values))
+
+    assert cache.get("samekey") in values
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files if name.endswith(".tmp")]
+
+
+def test_evict_ignores_files_removed_concurrently(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path), ttl=3600, max_bytes=0)
+    cache.set("a1", [1])
+    cache.set("b2", [2])
+    real_unlink = os.unlink
+
+    def unlink(path):
+        # Інший процес видалив файл між os.walk і os.unlink
+        real_unlink(path)
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "unlink", unlink)
+    assert cache.evict() == 0
+    assert cache.get("a1") is None
@@ -0,0 +1,28 @@
+import asyncio
+
+from helpers.html_compact import compact_html, filter_rows, track_site_stats
+
+
+def test_form_content_is_kept():
+    markup = (
+        '<div class="card"><form action="/cart">'
+        '<a class="title">Varta Blue Dynamic 60Ah 540A</a>'
+        '<span class="price">2 500 грн</span>'
+        '<input type="hidden" name="id" value="1"><button>Купити</button>'
+        '</form></div>'
+    )
+    text = compact_html(markup)
+
+    assert "Varta Blue Dynamic 60Ah 540A" in text
+    assert "2 500 грн" in text
+    assert "Купити" not in text
+
+
+def test_filter_rows_uses_filter_of_current_task():
+    async def run():
+        track_site_stats(lambda rows: rows[:1])
+        return filter_rows(["a", "b"])
+
+    assert asyncio.run(run()) == ["a"]
+    # Поза задачею з відбором рядки не фільтруються
+    assert filter_rows(["a", "b"]) == ["a", "b"]
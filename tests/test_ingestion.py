@@ -0,0 +1,18 @@
+from helpers.ingestion import map_battery, map_inverter
+
+
+def test_map_inverter_coerces_column_types():
+    row = map_inverter({
+        "name": "SUN-5K", "price": "25 000,00 грн", "full_name": "Deye SUN-5K-SG04LP1",
+        "inverter_type": "gybrid", "generation": 4, "string_count": "2", "firmware": None, "power": "5",
+    })
+
+    assert row["price"] == 25000.0
+    assert row["generation"] == "4"
+    assert row["string_count"] == 2
+    assert row["power"] == 5.0
+
+
+def test_entry_without_price_is_skipped():
+    assert map_battery({"name": "Varta", "price": None}) is None
+    assert map_inverter({"name": "Deye", "price": ""}) is None
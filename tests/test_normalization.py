@@ -0,0 +1,26 @@
+import pytest
+
+from helpers.normalization import coerce_number
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (60, 60.0),
+        ("60", 60.0),
+        ("60Ah", 60.0),
+        ("60 540", 60.0),
+        ("1 234,50 грн", 1234.5),
+        ("12 500 грн", 12500.0),
+        ("1\u00a0234", 1234.0),
+        ("", None),
+        (None, None),
+        ("без ціни", None),
+    ],
+)
+def test_coerce_number(value, expected):
+    assert coerce_number(value) == expected
+
+
+def test_coerce_number_int_rounds():
+    assert coerce_number("74,6 Ah", int) == 75
@@ -0,0 +1,48 @@
+import asyncio
+
+from services.backend import controllers
+
+PANEL = {"power": 450.0, "panel_type": "одностороння", "cell_type": "n-type", "thickness": 30.0, "brand_id": 1, "brand": "LONGI"}
+
+
+class _FakeResult:
+    def scalar_one_or_none(self):
+        return None
+
+
+class _FakeSession:
+    async def execute(self, query):
+        return _FakeResult()
+
+    async def close(self):
+        pass
+
+
+def test_solar_comparison_uses_solar_supplier_ids(monkeypatch):
+    products = []
+    calls = []
+
+    async def get_competitors_ids(session, product="batteries"):
+        products.append(product)
+        return [2]
+
+    async def get_my_id(session, product="batteries"):
+        products.append(product)
+        return 1
+
+    async def comparison_rows(session, model, brands_model, suppliers_model, columns, conditions):
+        calls.append(suppliers_model)
+        if len(calls) == 1:
+            return [{**PANEL, "full_name": "LONGI 450", "price": 5000.0, "price_per_w": 11.1, "supplier": "Я"}]
+        return [{**PANEL, "full_name": "LONGI 450W", "price": 5500.0, "price_per_w": 12.2, "supplier": "Конкурент"}]
+
+    monkeypatch.setattr(controllers, "SessionLocal", _FakeSession)
+    monkeypatch.setattr(controllers, "get_competitors_ids", get_competitors_ids)
+    monkeypatch.setattr(controllers, "get_my_id", get_my_id)
+    monkeypatch.setattr(controllers, "_comparison_rows", comparison_rows)
+
+    result = asyncio.run(controllers.get_sollar_panel_price_comparison_data(narrative=False))
+
+    assert products == ["sollar_panels", "sollar_panels"]
+    assert calls == [controllers.SollarPanelsSuppliers, controllers.SollarPanelsSuppliers]
+    assert result["comparison"]["summary"]["matched_models"] == 1